@@ -0,0 +1,189 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend import metrics
+
+logger = logging.getLogger("neuro_backend.jobs")
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_TTL = float(os.getenv("JOB_TTL", "86400"))  # seconds a finished job stays readable
+JOB_CAPACITY_WAIT = float(os.getenv("JOB_CAPACITY_WAIT", "300"))  # seconds a job stage waits out LLM load shedding
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    expires REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs (expires);
+"""
+
+
+class QueueFull(Exception):
+    """No room in the job queue; the caller should retry later."""
+
+
+class JobStore:
+    """Job records keyed by ID, in SQLite or (with `path=None`) in memory.
+
+    Each record expires `ttl` seconds after its last update; expired records
+    read as missing and are deleted on the next write.
+    """
+
+    def __init__(self, path: Optional[str] = JOB_DB_PATH, ttl: float = JOB_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory: Dict[str, Tuple[float, str, str]] = {}  # id -> (expires, status, JSON)
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def put(self, job: Dict) -> None:
+        now = time.time()
+        job["updated"] = now
+        expires = now + self.ttl
+        data = json.dumps(job, default=str)  # readers get their own copy, never the live dict
+        with self._lock:
+            if self._conn is None:
+                self._memory[job["id"]] = (expires, job["status"], data)
+                for job_id in [k for k, v in self._memory.items() if v[0] < now]:
+                    del self._memory[job_id]
+                return
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)", (job["id"], job["status"], expires, data))
+                self._conn.execute("DELETE FROM jobs WHERE expires < ?", (now,))
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                entry = self._memory.get(job_id)
+                row = (entry[2],) if entry is not None and entry[0] >= now else None
+            else:
+                row = self._conn.execute("SELECT data FROM jobs WHERE id = ? AND expires >= ?", (job_id, now)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def unfinished(self) -> List[Dict]:
+        """Jobs left queued or running, e.g. by a previous process."""
+        with self._lock:
+            if self._conn is None:
+                return [json.loads(v[2]) for v in self._memory.values() if v[1] in ("queued", "running")]
+            rows = self._conn.execute("SELECT data FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _alive(pid: Optional[int]) -> bool:
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    """Bounded queue of pipeline jobs drained by a fixed pool of worker threads.
+
+    `submit` returns immediately with the queued job, or raises QueueFull when
+    `queue_size` jobs are already waiting. Workers call `runner(request,
+    report)`; `report(stage, result)` stores each stage's result as soon as it
+    is available so pollers see partial progress. Capacity is the worker count:
+    at most `workers` jobs wait on the LLM at once, however many are submitted.
+    """
+
+    def __init__(self, runner: Callable[[Dict, Callable[[str, object], None]], object], store: JobStore,
+                 workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE):
+        self.runner = runner
+        self.store = store
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=queue_size)
+        self._requests: Dict[str, Dict] = {}
+        # Several backend workers may share one job DB: only fail jobs whose owning process is gone
+        self.owner = os.getpid()
+        for job in store.unfinished():
+            if not _alive(job.get("owner")):
+                job.update(status="failed", error="Interrupted by a backend restart")
+                store.put(job)
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+        atexit.register(self.close)
+
+    def submit(self, request: Dict) -> Dict:
+        job = {"id": uuid.uuid4().hex, "status": "queued", "created": time.time(), "owner": self.owner, "request": request,
+               "stages": {}, "result": None, "error": None}
+        self._requests[job["id"]] = job
+        self.store.put(job)
+        try:
+            self._queue.put_nowait(job["id"])
+        except queue.Full:
+            del self._requests[job["id"]]
+            job.update(status="rejected", error="Job queue full")
+            self.store.put(job)
+            metrics.JOBS.inc(status="rejected")
+            raise QueueFull(f"{self._queue.maxsize} jobs already queued")
+        metrics.JOBS_QUEUED.inc()
+        return {k: job[k] for k in ("id", "status", "created")}
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            metrics.JOBS_QUEUED.dec()
+            job = self._requests.pop(job_id)
+            job.update(status="running", started=time.time(), timings={})
+            self.store.put(job)
+            last = [job["started"]]
+
+            def report(stage: str, result: object) -> None:
+                now = time.time()
+                job["stages"][stage] = result
+                job["timings"][stage] = round(now - last[0], 3)  # seconds spent in this stage
+                last[0] = now
+                self.store.put(job)
+
+            try:
+                job["result"] = self.runner(job["request"], report)
+                job["status"] = "succeeded"
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                job.update(status="failed", error=str(e))
+            job["finished"] = time.time()
+            self.store.put(job)
+            metrics.JOBS.inc(status=job["status"])
+
+    def close(self) -> None:
+        for _ in self._workers:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
@@ -0,0 +1,133 @@
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from backend import metrics
+
+logger = logging.getLogger("neuro_backend.limiter")
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))  # starting limit per stage
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "32"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "32"))
+LLM_MAX_WAIT = float(os.getenv("LLM_MAX_WAIT", "10"))  # seconds a request may wait for a slot
+LLM_LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET", "0"))  # seconds; 0 = back off on 429s/timeouts only
+LLM_BACKOFF = 0.5
+
+
+class Overloaded(Exception):
+    """A request was shed before reaching the LLM; retry after `retry_after` seconds."""
+
+    def __init__(self, stage: str, reason: str, retry_after: int):
+        super().__init__(f"{stage} is overloaded ({reason}); retry after {retry_after}s")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_overload_signal(error: BaseException) -> bool:
+    """True for provider rate limits (429/503) and timeouts, from requests or the Cerebras SDK."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in (429, 503) or isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit with a bounded wait queue for one LLM-bound stage.
+
+    Each call holds a slot for its duration. The limit grows by one per
+    limit's worth of successful calls that actually used it, and is halved
+    when the provider rate-limits or times out (or, with a latency target,
+    when a call is slower than the target). Only calls started after the last
+    decrease can trigger another, so one burst of 429s halves the limit once.
+    Callers beyond the limit wait up to `max_wait` seconds in a queue of at
+    most `queue_size`; past either bound they get Overloaded at once, so the
+    API answers 503 instead of stacking blocked threads.
+    """
+
+    def __init__(self, stage: str, initial: int = LLM_CONCURRENCY, max_limit: int = LLM_CONCURRENCY_MAX,
+                 queue_size: int = LLM_QUEUE_SIZE, max_wait: float = LLM_MAX_WAIT,
+                 latency_target: float = LLM_LATENCY_TARGET, min_limit: int = 1):
+        self.stage = stage
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.latency_target = latency_target
+        self._limit = float(max(min_limit, min(initial, max_limit)))
+        self._in_flight = 0
+        self._waiting = 0
+        self._last_decrease = 0.0
+        self._latency = None  # EWMA of call latency, for Retry-After estimates
+        self._cond = threading.Condition()
+        metrics.LLM_LIMIT.set(self.limit, stage=stage)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def retry_after(self) -> int:
+        latency = self._latency if self._latency is not None else self.max_wait
+        return max(1, math.ceil((self._waiting + 1) * latency / self.limit))
+
+    def _shed(self, reason: str) -> None:
+        metrics.LLM_SHED.inc(stage=self.stage, reason=reason)
+        raise Overloaded(self.stage, reason, self.retry_after())
+
+    def _acquire(self) -> None:
+        with self._cond:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.queue_size:
+                self._shed("queue_full")
+            self._waiting += 1
+            metrics.LLM_QUEUED.inc(stage=self.stage)
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while self._in_flight >= self.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._shed("timeout")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+                metrics.LLM_QUEUED.dec(stage=self.stage)
+            self._in_flight += 1
+
+    def _release(self, started: float, overloaded: bool) -> None:
+        latency = time.monotonic() - started
+        with self._cond:
+            utilised = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            if not overloaded:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                overloaded = bool(self.latency_target) and latency > self.latency_target
+            if overloaded:
+                if started >= self._last_decrease:
+                    self._limit = max(self.min_limit, self._limit * LLM_BACKOFF)
+                    self._last_decrease = time.monotonic()
+                    logger.info("%s overloaded; concurrency limit now %d", self.stage, self.limit)
+            elif utilised:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            metrics.LLM_LIMIT.set(self.limit, stage=self.stage)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one slot around a call; raises Overloaded if none frees up in time."""
+        self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._release(started, is_overload_signal(e))
+            raise
+        self._release(started, False)
+
+    def stats(self) -> Dict[str, object]:
+        with self._cond:
+            return {"limit": self.limit, "in_flight": self._in_flight, "waiting": self._waiting,
+                    "latency_s": None if self._latency is None else round(self._latency, 3)}
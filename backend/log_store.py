@@ -0,0 +1,163 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("neuro_backend.log_store")
+
+LOG_DB_PATH = os.getenv("LOG_DB_PATH", "request_logs.db")
+LOG_MEMORY_SIZE = int(os.getenv("LOG_MEMORY_SIZE", "1000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Retention on disk: newest LOG_MAX_ROWS records, and none older than LOG_MAX_AGE seconds (0 disables either)
+LOG_MAX_ROWS = int(os.getenv("LOG_MAX_ROWS", "100000"))
+LOG_MAX_AGE = float(os.getenv("LOG_MAX_AGE", str(30 * 86400)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    endpoint TEXT,
+    latency_ms INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs (timestamp);
+CREATE INDEX IF NOT EXISTS idx_logs_endpoint_ts ON logs (endpoint, timestamp);
+"""
+
+
+class LogStore:
+    """Request log with a bounded in-memory ring buffer and batched SQLite writes.
+
+    `append` never blocks the request path: records go to the ring buffer and a
+    bounded queue drained by a background writer thread. When the queue is full
+    the record is still kept in memory but dropped from disk (counted in
+    `dropped`). Each batch write also prunes the table to `max_rows` records
+    and `max_age` seconds, so the file stays bounded too. Pass `path=None` to
+    keep logs in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = LOG_DB_PATH, memory_size: int = LOG_MEMORY_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL,
+                 queue_size: int = LOG_QUEUE_SIZE, max_rows: int = LOG_MAX_ROWS, max_age: float = LOG_MAX_AGE):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.recent = deque(maxlen=memory_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._writer = None
+        if path:
+            with self._connect() as conn:
+                conn.executescript(_SCHEMA)
+            self._writer = threading.Thread(target=self._run_writer, name="log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def append(self, record: Dict) -> None:
+        with self._lock:
+            self.recent.append(record)
+        if self._writer is None:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run_writer(self) -> None:
+        conn = self._connect()
+        try:
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = []
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                    while len(batch) < self.batch_size:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if batch:
+                    self._write_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Dict]) -> None:
+        rows = [
+            (r["id"], r["timestamp"], r.get("endpoint"), r.get("latency_ms"), json.dumps(r, default=str))
+            for r in batch
+        ]
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO logs VALUES (?, ?, ?, ?, ?)", rows)
+                self._prune(conn)
+        except sqlite3.Error:
+            logger.exception("Failed to persist %d log records", len(rows))
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        # rowids grow with insertion order, so the newest max_rows are the highest ones
+        if self.max_rows:
+            conn.execute("DELETE FROM logs WHERE rowid <= (SELECT max(rowid) FROM logs) - ?", (self.max_rows,))
+        if self.max_age:
+            conn.execute("DELETE FROM logs WHERE timestamp < ?", (time.time() - self.max_age,))
+
+    def query(self, endpoint: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Return records newest first, filtered by endpoint and [since, until).
+
+        Records still waiting in the write queue (at most `flush_interval`
+        seconds old) only show up once persisted.
+        """
+        if not self.path:
+            return self._query_memory(endpoint, since, until, limit, offset)
+        clauses, params = [], []
+        if endpoint:
+            clauses.append("endpoint = ?")
+            params.append(endpoint)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT data FROM logs {where} ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params + [limit, offset]).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(r[0]) for r in rows]
+
+    def _query_memory(self, endpoint, since, until, limit, offset) -> List[Dict]:
+        with self._lock:
+            records = list(self.recent)
+        records = [
+            r for r in reversed(records)
+            if (not endpoint or r.get("endpoint") == endpoint)
+            and (since is None or r["timestamp"] >= since)
+            and (until is None or r["timestamp"] < until)
+        ]
+        return records[offset:offset + limit]
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._writer is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._writer.join(timeout)
+
@@ -1,76 +1,121 @@
-from fastapi import FastAPI, Query, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Match
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
-from person_A.ingest_search.embeddings import semantic_search
-from person_A.hypothesis_gen.llama3_api import generate_hypothesis_from_papers
-from person_B.z3_validator.rules import z3_validate
+from person_A.ingest_search.metadata_filter import build_filter
+from person_A.ingest_search.schemas import SearchBatchRequest
 from person_B.experiment_design.exp_llama3_api import call_llama3_for_experiment
-import json, time, uuid, logging
+import time, uuid, logging
 from person_A.hypothesis_gen.main import Paper, PapersRequest, HypothesisResponse
 from person_B.z3_validator.main import HypothesisIn, ValidationOut
+from backend.log_store import LogStore
+from backend.jobs import JOB_CAPACITY_WAIT, JOB_DB_PATH, JobQueue, JobStore, QueueFull
+from backend.limiter import AdaptiveLimiter, Overloaded
+from backend.single_flight import SingleFlight, flight_key
+from backend import metrics, profiling, stages
+from backend.responses import fast
 
 app = FastAPI(title="Neuro Research Backend")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("neuro_backend")
-logs = []
+logs = LogStore()
+llm_limits = {stage: AdaptiveLimiter(stage) for stage in ("generate", "design")}
+# Identical concurrent requests (e.g. a class running the default query) share one computation per stage
+flights = {stage: SingleFlight(stage) for stage in ("search", "generate", "design")}
+
+def _limited(stage: str, fn, *args):
+    with llm_limits[stage].slot():
+        return fn(*args)
+
+@app.exception_handler(Overloaded)
+async def shed_overloaded(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+def _route_label(scope) -> str:
+    """The matched route's path template (e.g. /jobs/{job_id}); unknown paths
+    share one label so scanners can't blow up metric cardinality."""
+    route = scope.get("route")
+    if route is None:
+        route = next((r for r in app.router.routes if r.matches(scope)[0] == Match.FULL), None)
+    return getattr(route, "path", None) or "other"
+
+@app.middleware("http")
+async def track_request_metrics(request: Request, call_next):
+    in_flight = _route_label(request.scope)
+    metrics.IN_FLIGHT.inc(endpoint=in_flight)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        endpoint = _route_label(request.scope)
+        metrics.IN_FLIGHT.dec(endpoint=in_flight)
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint)
+        if status >= 500:
+            metrics.ERRORS.inc(endpoint=endpoint, stage="")
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    mode = profiling.requested_mode(request.headers.get("x-profile"), request.query_params.get("profile"))
+    if mode is None:
+        return await call_next(request)
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    profile = profiling.start(request_id, request.url.path, mode)
+    try:
+        response = await call_next(request)
+    finally:
+        profiling.finish(profile)
+    response.headers["X-Profile-Id"] = request_id
+    return response
 
 @app.get("/search")
-def search_papers(query: str = Query(...)) -> Dict[str, object]:
-    papers = semantic_search(query)
-    return {"papers": papers, "query": query}
+@profiling.profiled("search_papers")
+def search_papers(
+    query: str = Query(...),
+    top_k: int = Query(6, ge=1, le=100, description="Number of papers to return"),
+    mode: str = Query("dense", pattern="^(dense|lexical|hybrid)$", description="dense, lexical (BM25) or hybrid (RRF of both)"),
+    rerank: bool = Query(False, description="Re-rank candidates with a cross-encoder within RERANK_BUDGET_MS"),
+    paper_id: Optional[List[int]] = Query(None, description="Only these papers (repeatable)"),
+    year_from: Optional[int] = Query(None, description="Published in or after this year"),
+    year_to: Optional[int] = Query(None, description="Published in or before this year"),
+    journal: Optional[List[str]] = Query(None, description="Only these journals (repeatable)"),
+    study_type: Optional[List[str]] = Query(None, description="e.g. review, perspective, clinical_trial, animal_study, cohort_study")
+) -> Dict[str, object]:
+    filters = build_filter(paper_id, year_from, year_to, journal, study_type)
+    query = " ".join(query.split())
+    params = {"paper_id": paper_id, "year_from": year_from, "year_to": year_to, "journal": journal, "study_type": study_type}
+    papers = flights["search"].do(flight_key(query, top_k, mode, rerank, filters), stages.search,
+                                  query, top_k=top_k, mode=mode, rerank=rerank, filters=filters, params=params)
+    return fast({"papers": papers, "query": query})
+
+@app.post("/search/batch")
+@profiling.profiled("search_papers_batch")
+def search_papers_batch(request: SearchBatchRequest) -> Dict[str, object]:
+    results = stages.search_batch(request)
+    return fast({"results": [{"query": q, "papers": papers} for q, papers in zip(request.queries, results)]})
 
 @app.post("/generate", response_model=HypothesisResponse)
+@profiling.profiled("generate_hypothesis")
 def generate_hypothesis(request: PapersRequest) -> Dict:
-    papers_list = [p.dict() for p in request.papers]
-    hypothesis = generate_hypothesis_from_papers(papers_list, request.query)
-    try:
-        if 'gap' in hypothesis and not isinstance(hypothesis['gap'], str):
-            hypothesis['gap'] = json.dumps(hypothesis['gap'], ensure_ascii=False)
-        hypothesis.setdefault('hypothesis', '')
-        if not isinstance(hypothesis.get('hypothesis'), str):
-            hypothesis['hypothesis'] = str(hypothesis.get('hypothesis'))
-        hypothesis.setdefault('evidence', [])
-        if not isinstance(hypothesis.get('evidence'), list):
-            hypothesis['evidence'] = [str(hypothesis.get('evidence'))]
-        hypothesis.setdefault('prediction', '')
-        if not isinstance(hypothesis.get('prediction'), str):
-            hypothesis['prediction'] = str(hypothesis.get('prediction'))
-        hypothesis.setdefault('rules', [])
-        if not isinstance(hypothesis.get('rules'), list):
-            hypothesis['rules'] = [str(hypothesis.get('rules'))]
-        hypothesis.setdefault('classification', 'unknown')
-        if not isinstance(hypothesis.get('classification'), str):
-            hypothesis['classification'] = str(hypothesis.get('classification'))
-        hypothesis.setdefault('further_data', 'No further insights.')
-        if not isinstance(hypothesis.get('further_data'), str):
-            hypothesis['further_data'] = str(hypothesis.get('further_data'))
-    except Exception:
-        hypothesis = {
-            'gap': str(hypothesis.get('gap', '')) if isinstance(hypothesis, dict) else str(hypothesis),
-            'hypothesis': str(hypothesis.get('hypothesis', '') if isinstance(hypothesis, dict) else ''),
-            'evidence': hypothesis.get('evidence', []) if isinstance(hypothesis, dict) else [],
-            'prediction': str(hypothesis.get('prediction', '') if isinstance(hypothesis, dict) else ''),
-            'rules': hypothesis.get('rules', []) if isinstance(hypothesis, dict) else [],
-            'classification': 'unknown',
-            'further_data': 'Normalization failed'
-        }
-    return hypothesis
+    hypothesis = _generate([p.dict() for p in request.papers], request.query)
+    # The fast path skips response_model filtering, so drop any extra keys here
+    return fast({field: hypothesis[field] for field in HypothesisResponse.model_fields})
+
+def _generate(papers_list: List[Dict], query: str) -> Dict:
+    return flights["generate"].do(flight_key(papers_list, query), _limited, "generate", stages.generate, papers_list, query)
 
 @app.post("/validate", response_model=ValidationOut)
+@profiling.profiled("validate")
 def validate(h: HypothesisIn):
+    return fast(_validate(h.dict()))
+
+def _validate(h: Dict) -> Dict:
     start = time.time()
     try:
-        res = z3_validate(h.hypothesis, h.rules, h.classification, h.further_data)
-        response = {
-            "gap": h.gap,
-            "hypothesis": h.hypothesis,
-            "evidence": h.evidence,
-            "prediction": h.prediction,
-            "rules": h.rules,
-            "classification": h.classification,
-            "further_data": h.further_data,
-            "validation_result": {"additionalProp1": res}
-        }
+        response = stages.validate(h)
     except Exception as e:
         logger.exception("Validation failure")
         raise HTTPException(status_code=500, detail=str(e))
@@ -78,82 +123,117 @@ def validate(h: HypothesisIn):
     logs.append({
         "id": str(uuid.uuid4()),
         "timestamp": time.time(),
-        "hypothesis": h.hypothesis,
-        "result": res["valid"],
+        "hypothesis": h["hypothesis"],
+        "result": response["validation_result"]["additionalProp1"]["valid"],
         "latency_ms": latency_ms,
         "endpoint": "validate"
     })
     return response
 
 @app.post("/design")
+@profiling.profiled("design_experiment")
 def design_experiment(v: HypothesisIn):
+    return fast(_design(v.dict()))
+
+def _design(payload: Dict) -> Dict:
     start = time.time()
-    hypothesis = v.hypothesis
-    try:
-        hypothesis_text = f"{v.hypothesis}\nRules: {', '.join(v.rules)}\nClassification: {v.classification}\nFurther Data: {v.further_data}"
-        text = call_llama3_for_experiment(hypothesis_text)
-        try:
-            exp_json = json.loads(text)
-        except Exception:
-            exp_json = None
-    except Exception as e:
-        logger.warning("LLaMA call failed or not available; using fallback template. Error: %s", e)
-        exp_json = None
-    if exp_json is None:
-        outcome_measures = []
-        if "plaque" in hypothesis.lower() or "amyloid" in hypothesis.lower():
-            outcome_measures.append("Amyloid plaque staining (IHC)")
-        if "cogn" in hypothesis.lower() or "memory" in hypothesis.lower():
-            outcome_measures.append("Behavioral tests (Morris water maze)")
-        if "microglia" in hypothesis.lower():
-            outcome_measures.append("Microglial activation markers (Iba1, CD68)")
-        for rule in v.rules:
-            if "inflammation" in rule.lower():
-                outcome_measures.append("Inflammation markers (e.g., IL-6, TNF-alpha)")
-            if "phagocytosis" in rule.lower():
-                outcome_measures.append("Phagocytic activity assay")
-        if not outcome_measures:
-            outcome_measures = ["General histology", "Behavioral assays"]
-        exp_json = {
-            "model": "5xFAD transgenic mice",
-            "groups": ["Control (vehicle)", "Treatment A", "Treatment B", "Combination"],
-            "n_per_group": 12,
-            "duration_weeks": 12,
-            "treatment_route": "intraperitoneal injection",
-            "outcome_measures": outcome_measures,
-            "expected_result": f"Treatment groups will show improvement in {', '.join(outcome_measures)} compared to control.",
-            "latex": generate_latex(hypothesis, outcome_measures)
-        }
+    if stages.remote("design"):
+        exp_json = flights["design"].do(flight_key(payload), _limited, "design", stages.design, payload)
+    else:
+        # In-process, only the LLM call itself is coalesced and limited; its failures fall back to the template
+        exp_json = stages.design(payload, call_llm=_design_llm, passthrough=(Overloaded,))
     latency_ms = int((time.time() - start) * 1000)
     logs.append({
         "id": str(uuid.uuid4()),
         "timestamp": time.time(),
-        "hypothesis": hypothesis,
+        "hypothesis": payload["hypothesis"],
         "latency_ms": latency_ms,
         "endpoint": "design"
     })
     return exp_json
 
-def generate_latex(hypothesis, outcome_measures):
-    om = "\\\\ \n".join(outcome_measures)
-    latex = f"""
-\\section*{{Experiment Design}}
-\\textbf{{Hypothesis:}} {hypothesis}
-\\subsection*{{Model}}
-5xFAD transgenic mice
-\\subsection*{{Groups}}
-Control (vehicle), Treatment A, Treatment B, Combination
-\\subsection*{{Sample Size}}
-12 per group
-\\subsection*{{Duration}}
-12 weeks
-\\subsection*{{Outcome Measures}}
-{om}
-\\subsection*{{Expected Result}}
-Treatment groups will show improvement in outcome measures compared to control.
-"""
-    return latex
+def _design_llm(hypothesis_text: str) -> str:
+    return flights["design"].do(flight_key(hypothesis_text), _limited, "design", call_llama3_for_experiment, hypothesis_text)
+
+class JobRequest(BaseModel):
+    query: str
+    top_k: int = Field(3, ge=1, le=50)
+    mode: str = Field("dense", pattern="^(dense|lexical|hybrid)$")
+    rerank: bool = False
+
+def _when_capacity(fn, *args):
+    """Background jobs wait out load shedding instead of failing: a shed call
+    is retried after the limiter's Retry-After, for up to JOB_CAPACITY_WAIT
+    seconds in total, so a job can't hold a worker thread indefinitely."""
+    deadline = time.monotonic() + JOB_CAPACITY_WAIT
+    while True:
+        try:
+            return fn(*args)
+        except Overloaded as e:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"No {e.stage} capacity within {JOB_CAPACITY_WAIT:g}s ({e.reason})") from e
+            logger.info("Job waiting %ds for %s capacity (%s)", e.retry_after, e.stage, e.reason)
+            time.sleep(min(e.retry_after, remaining))
+
+def run_pipeline(request: Dict, report) -> Dict:
+    """search -> generate -> validate -> design, as the frontend runs it, reporting each stage."""
+    query = request["query"]
+    papers = stages.search(query, top_k=request["top_k"], mode=request["mode"], rerank=request["rerank"])
+    report("search", {"papers": papers, "query": query})
+    hypothesis = _when_capacity(_generate, papers, query)
+    report("generate", hypothesis)
+    validation = _validate(HypothesisIn(**hypothesis).dict())
+    report("validate", validation)
+    result = {"papers": papers, "hypothesis": hypothesis, "validation": validation, "design": None}
+    if validation["validation_result"]["additionalProp1"].get("valid"):
+        result["design"] = _when_capacity(_design, HypothesisIn(**hypothesis).dict())
+        report("design", result["design"])
+    return result
+
+jobs = JobQueue(run_pipeline, JobStore(JOB_DB_PATH or None))
+
+@app.post("/jobs", status_code=202)
+def submit_job(request: JobRequest):
+    """Queue a full pipeline run; poll GET /jobs/{id} for stage results."""
+    try:
+        return jobs.submit(request.dict())
+    except QueueFull as e:
+        return JSONResponse(status_code=503, content={"detail": str(e)}, headers={"Retry-After": "5"})
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job {job_id} (unknown or expired)")
+    return fast(job)
 
 @app.get("/logs")
-def get_logs():
-    return {"logs": logs}
\ No newline at end of file
+def get_logs(
+    endpoint: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Unix timestamp, inclusive"),
+    until: Optional[float] = Query(None, description="Unix timestamp, exclusive"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0)
+):
+    records = logs.query(endpoint=endpoint, since=since, until=until, limit=limit, offset=offset)
+    return fast({"logs": records, "limit": limit, "offset": offset, "count": len(records)})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/limits")
+def get_limits():
+    return {stage: limiter.stats() for stage, limiter in llm_limits.items()}
+
+@app.get("/profiles")
+def list_profiles(limit: int = Query(50, ge=1, le=200)):
+    return {"profiles": profiling.recent(limit)}
+
+@app.get("/profiles/{request_id}")
+def get_profile(request_id: str):
+    profile = profiling.get(request_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"No profile stored for request {request_id}")
+    return fast(profile)
@@ -0,0 +1,154 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+from backend import profiling
+
+# Seconds; spans sub-millisecond Z3 solves up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted((k, dict(v, counts=list(v["counts"]))) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                le = _format_labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {state['count']}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram("neuro_request_latency_seconds", "End-to-end latency per endpoint.", ["endpoint"])
+STAGE_LATENCY = Histogram("neuro_stage_latency_seconds", "Latency per pipeline sub-stage.", ["stage"])
+IN_FLIGHT = Gauge("neuro_requests_in_flight", "Requests currently being served per endpoint.", ["endpoint"])
+ERRORS = Counter("neuro_errors_total", "Failed requests and sub-stages.", ["endpoint", "stage"])
+CACHE_REQUESTS = Counter("neuro_cache_requests_total", "Cache lookups by cache name and result (hit/miss).", ["cache", "result"])
+JOBS = Counter("neuro_jobs_total", "Pipeline jobs by final status.", ["status"])
+JOBS_QUEUED = Gauge("neuro_jobs_queued", "Pipeline jobs waiting for a worker.")
+LLM_LIMIT = Gauge("neuro_llm_concurrency_limit", "Current adaptive concurrency limit per LLM-bound stage.", ["stage"])
+LLM_QUEUED = Gauge("neuro_llm_queued", "Requests waiting for an LLM slot per stage.", ["stage"])
+LLM_SHED = Counter("neuro_llm_shed_total", "Requests rejected with 503 per stage and reason (queue_full/timeout).", ["stage", "reason"])
+ENCODE_BATCH = Histogram("neuro_encode_batch_size", "Texts per micro-batched encoder forward pass.", buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+COALESCED = Counter("neuro_coalesced_requests_total", "Stage calls that ran (leader) or shared an identical in-flight call (joined).", ["stage", "result"])
+
+
+@contextmanager
+def stage(name: str):
+    """Time a sub-stage (encode, vector_query, llm_*, json_repair, z3_*) of a request.
+
+    Also records a span when the request is being profiled.
+    """
+    start = time.perf_counter()
+    try:
+        with profiling.span(name):
+            yield
+    except Exception:
+        ERRORS.inc(endpoint="", stage=name)
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=name)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.append("# HELP neuro_cache_hit_ratio Fraction of cache lookups that hit.")
+    lines.append("# TYPE neuro_cache_hit_ratio gauge")
+    for cache in sorted({k[0] for k in list(CACHE_REQUESTS._values)}):
+        hits, misses = CACHE_REQUESTS.get(cache=cache, result="hit"), CACHE_REQUESTS.get(cache=cache, result="miss")
+        if hits + misses:
+            lines.append(f'neuro_cache_hit_ratio{{cache="{_escape(cache)}"}} {hits / (hits + misses)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,166 @@
+import contextvars
+import functools
+import io
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Fraction of requests profiled without being asked to (0 disables sampling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "200"))
+PROFILE_MODES = ("spans", "cprofile", "pyinstrument")
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: float) -> Dict:
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round((end - self.start) * 1000, 3),
+            "children": [c.to_dict(origin) for c in self.children],
+        }
+
+
+class Profile:
+    """Wall-clock span tree (plus optional profiler output) for one request."""
+
+    def __init__(self, request_id: str, endpoint: str, mode: str = "spans"):
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.mode = mode
+        self.created = time.time()
+        self.root = Span(endpoint)
+        self.profiler_output: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "request_id": self.request_id,
+            "endpoint": self.endpoint,
+            "mode": self.mode,
+            "timestamp": self.created,
+            "spans": self.root.to_dict(self.root.start),
+            "profiler_output": self.profiler_output,
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_current_profile: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar("current_profile", default=None)
+
+_store: "OrderedDict[str, Dict]" = OrderedDict()
+_store_lock = threading.Lock()
+
+
+def requested_mode(header: Optional[str], query_flag: Optional[str]) -> Optional[str]:
+    """Profiling mode asked for by the X-Profile header / ?profile= flag, or picked by sampling."""
+    flag = (header or query_flag or "").strip().lower()
+    if flag in PROFILE_MODES:
+        return flag
+    if flag in ("1", "true", "yes"):
+        return "spans"
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "spans"
+    return None
+
+
+def start(request_id: str, endpoint: str, mode: str) -> Profile:
+    profile = Profile(request_id, endpoint, mode)
+    _current_profile.set(profile)
+    _current_span.set(profile.root)
+    return profile
+
+
+def finish(profile: Profile) -> None:
+    profile.root.end = time.perf_counter()
+    with _store_lock:
+        _store[profile.request_id] = profile.to_dict()
+        while len(_store) > PROFILE_STORE_SIZE:
+            _store.popitem(last=False)
+
+
+def get(request_id: str) -> Optional[Dict]:
+    with _store_lock:
+        return _store.get(request_id)
+
+
+def recent(limit: int = 50) -> List[Dict]:
+    with _store_lock:
+        items = list(_store.values())[-limit:]
+    return [
+        {"request_id": p["request_id"], "endpoint": p["endpoint"], "mode": p["mode"],
+         "timestamp": p["timestamp"], "duration_ms": p["spans"]["duration_ms"]}
+        for p in reversed(items)
+    ]
+
+
+@contextmanager
+def span(name: str):
+    parent = _current_span.get()
+    if parent is None:
+        yield
+        return
+    child = Span(name)
+    parent.children.append(child)
+    token = _current_span.set(child)
+    try:
+        yield
+    finally:
+        child.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def _run_profiler(mode: str, fn, *args, **kwargs):
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            mode = "cprofile"
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.stop()
+                _current_profile.get().profiler_output = profiler.output_text(unicode=True)
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(40)
+        _current_profile.get().profiler_output = out.getvalue()
+
+
+def profiled(name: str):
+    """Wrap an endpoint so its body is a span and, when asked, runs under a profiler.
+
+    Profilers are per-thread, so this runs inside the worker thread FastAPI uses
+    for sync endpoints rather than in the middleware.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                if profile.mode in ("cprofile", "pyinstrument"):
+                    return _run_profiler(profile.mode, fn, *args, **kwargs)
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,30 @@
+import json
+import os
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder still skips FastAPI's jsonable_encoder pass
+    orjson = None
+
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when installed, else compact stdlib json."""
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def fast(content):
+    """`content` as a FastJSONResponse when FAST_JSON is on, else unchanged.
+
+    Returning a Response makes FastAPI skip jsonable_encoder and response_model
+    validation, so only use it for results the backend built (or a service
+    already validated) in the response model's shape.
+    """
+    return FastJSONResponse(content) if FAST_JSON else content
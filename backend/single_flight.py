@@ -0,0 +1,56 @@
+import copy
+import json
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from backend import metrics
+
+
+def flight_key(*parts) -> str:
+    """Stable key for a call's inputs; strings are whitespace-normalized."""
+    def normalize(value):
+        if isinstance(value, str):
+            return " ".join(value.split())
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        return value
+    return json.dumps(normalize(list(parts)), sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """Share one in-flight computation among concurrent callers with the same key.
+
+    The first caller (the leader) runs the call; callers arriving while it is
+    in flight wait for it and get the same result or exception. Nothing is
+    cached once the call finishes. Every caller gets its own deep copy, since
+    endpoints post-process results in place.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable, *args, **kwargs):
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+        metrics.COALESCED.inc(stage=self.stage, result="leader" if leader else "joined")
+        if leader:
+            try:
+                fut.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return copy.deepcopy(fut.result())
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,72 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from person_A.ingest_search.embeddings import semantic_search, semantic_search_batch
+from person_A.hypothesis_gen.llama3_api import generate_hypothesis
+from person_B.z3_validator.validation import validate_hypothesis
+from person_B.experiment_design.design import design_experiment
+
+# Each stage has one implementation, in the service that owns it. The
+# microservices serve it behind their endpoint and the backend calls it here,
+# in-process by default or over HTTP when the stage's *_SERVICE_URL is set.
+SERVICE_URLS = {
+    "search": os.getenv("SEARCH_SERVICE_URL", ""),
+    "generate": os.getenv("GENERATE_SERVICE_URL", ""),
+    "validate": os.getenv("VALIDATE_SERVICE_URL", ""),
+    "design": os.getenv("DESIGN_SERVICE_URL", ""),
+}
+STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT", "90"))
+
+_client = None
+
+
+def remote(stage: str) -> bool:
+    return bool(SERVICE_URLS[stage])
+
+
+def _call(stage: str, method: str, path: str, **kwargs):
+    global _client
+    if _client is None:
+        # One pooled client for all stages keeps connections to the services warm
+        _client = httpx.Client(timeout=STAGE_TIMEOUT, limits=httpx.Limits(max_connections=100, max_keepalive_connections=20))
+    r = _client.request(method, SERVICE_URLS[stage].rstrip("/") + path, **kwargs)
+    r.raise_for_status()
+    return r.json()
+
+
+def search(query: str, top_k: int = 6, mode: str = "dense", rerank: bool = False, filters: Optional[Dict] = None,
+           params: Optional[Dict] = None) -> List[Dict]:
+    """Papers for a query. `filters` is the built metadata filter for in-process
+    calls; `params` the raw /search filter parameters sent to the service."""
+    if remote("search"):
+        query_params = {"query": query, "top_k": top_k, "mode": mode, "rerank": rerank}
+        query_params.update({k: v for k, v in (params or {}).items() if v is not None})
+        return _call("search", "GET", "/search", params=query_params)["papers"]
+    return semantic_search(query, top_k=top_k, mode=mode, rerank=rerank, filters=filters)
+
+
+def search_batch(request) -> List[List[Dict]]:
+    if remote("search"):
+        return [r["papers"] for r in _call("search", "POST", "/search/batch", json=request.dict())["results"]]
+    return semantic_search_batch(request.queries, request.top_k, request.mode, request.rerank, request.filters())
+
+
+def generate(papers: List[Dict], query: str) -> Dict:
+    if remote("generate"):
+        return _call("generate", "POST", "/generate", json={"papers": papers, "query": query})
+    return generate_hypothesis(papers, query)
+
+
+def validate(hypothesis: Dict) -> Dict:
+    if remote("validate"):
+        return _call("validate", "POST", "/validate", json=hypothesis)
+    return validate_hypothesis(hypothesis)
+
+
+def design(hypothesis: Dict, call_llm: Optional[Callable[[str], str]] = None, passthrough=()) -> Dict:
+    """Experiment plan; `call_llm` and `passthrough` apply to in-process calls (see design_experiment)."""
+    if remote("design"):
+        return _call("design", "POST", "/design", json=hypothesis)
+    return design_experiment(hypothesis, call_llm=call_llm, passthrough=passthrough)
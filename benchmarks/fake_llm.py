@@ -0,0 +1,146 @@
+"""Stub OpenAI-compatible chat completions server standing in for Cerebras.
+
+Serves POST /v1/chat/completions with canned hypothesis / experiment JSON after
+a configurable delay, and returns malformed JSON (prose-wrapped or truncated)
+at a configurable rate so the repair paths get exercised too. Requests with a
+json_schema response_format always get well-formed JSON, as from a provider
+with structured output. With
+--max-concurrency it answers 429 above that many in-flight requests, like a
+provider's rate limit.
+
+    python benchmarks/fake_llm.py --port 8900 --latency 0.8 --malformed-rate 0.1
+    python benchmarks/fake_llm.py --max-concurrency 8
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HYPOTHESIS = {
+    "gap": "Anti-amyloid therapies clear plaques without restoring cognition.",
+    "hypothesis": "Chronic inflammation drives microglia dysfunction and reduced phagocytosis in Alzheimer's disease.",
+    "evidence": ["Microglial activation markers rise with plaque load.", "Plaque clearance trials show little cognitive benefit."],
+    "prediction": "Restoring microglial phagocytosis lowers tau phosphorylation in 5xFAD mice.",
+    "rules": ["Implies(chronic_inflammation, microglia_dysfunction)", "Implies(microglia_dysfunction, reduced_phagocytosis)"],
+}
+
+DESIGN = {
+    "model": "5xFAD transgenic mice",
+    "groups": ["Control (vehicle)", "Treatment A", "Treatment B", "Combination"],
+    "n_per_group": 12,
+    "duration_weeks": 12,
+    "treatment_route": "intraperitoneal injection",
+    "outcome_measures": ["Microglial activation markers (Iba1, CD68)", "Phagocytic activity assay"],
+    "expected_result": "Treatment groups will show restored phagocytosis compared to control.",
+    "latex": "\\section*{Experiment Design}",
+}
+
+
+class FakeLLMServer:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, jitter=0.2, malformed_rate=0.0, seed=0, max_concurrency=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.malformed_rate = malformed_rate
+        self.max_concurrency = max_concurrency
+        self.requests = 0
+        self.rate_limited = 0
+        self._in_flight = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                # The Cerebras SDK warms its connection with a GET on construction
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._rng_lock:
+                    limited = server.max_concurrency and server._in_flight >= server.max_concurrency
+                    if limited:
+                        server.rate_limited += 1
+                    else:
+                        server._in_flight += 1
+                if limited:
+                    self.send_error(429, "Too many concurrent requests")
+                    return
+                try:
+                    payload = json.dumps(server.complete(body)).encode()
+                finally:
+                    with server._rng_lock:
+                        server._in_flight -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def complete(self, body):
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        with self._rng_lock:
+            self.requests += 1
+            delay = max(0.0, self.latency * (1 + self._rng.uniform(-self.jitter, self.jitter)))
+            malformed = self._rng.random() < self.malformed_rate
+        time.sleep(delay)
+        result = DESIGN if "experiment plan" in prompt else HYPOTHESIS
+        content = json.dumps(result)
+        structured = (body.get("response_format") or {}).get("type") == "json_schema"
+        if malformed and not structured and "Convert the following text" not in prompt:
+            content = f"Here is the JSON you asked for:\n{content[:-1]}"
+        return {
+            "id": f"chatcmpl-fake-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "llama3.1-8b"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(content.split()),
+                      "total_tokens": len(prompt.split()) + len(content.split())},
+            "time_info": {},
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative +/- spread around --latency")
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-concurrency", type=int, default=0, help="answer 429 above this many in-flight requests (0 = unlimited)")
+    args = parser.parse_args()
+    server = FakeLLMServer(args.host, args.port, args.latency, args.jitter, args.malformed_rate, args.seed, args.max_concurrency)
+    print(f"Fake LLM listening on {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,99 @@
+"""Query encoding throughput and latency with and without the micro-batcher.
+
+Sends single-query encode calls from N concurrent threads, once straight to
+the encoder (one forward pass per query, serialized like a model saturating
+the CPU) and once through MicroBatcher for each --max-wait-ms setting, and
+reports queries per second and p50/p95 latency per concurrency level.
+
+By default the encoder is synthetic: a forward pass costs --pass-ms plus
+--per-text-ms per text and only one pass runs at a time, which is the cost
+shape of a transformer encoder on CPU. --embedding-model measures a real
+SentenceTransformer instead.
+
+    python benchmarks/micro_batching.py
+    python benchmarks/micro_batching.py --pass-ms 15 --per-text-ms 1 --concurrency 1,16 --requests 200
+    python benchmarks/micro_batching.py --embedding-model stsb-roberta-large --concurrency 1,8,32
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "person_A", "ingest_search"))
+
+from micro_batcher import MicroBatcher  # noqa: E402
+
+
+def synthetic_encoder(pass_ms, per_text_ms, dims=64):
+    lock = threading.Lock()
+
+    def encode(texts):
+        with lock:
+            time.sleep((pass_ms + per_text_ms * len(texts)) / 1000)
+        return np.zeros((len(texts), dims), dtype=np.float32)
+    return encode
+
+
+def measure(encode, concurrency, requests):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        encode([f"query {i} about tau and amyloid"])
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {"qps": round(requests / wall, 1), "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+            "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pass-ms", type=float, default=15.0, help="synthetic encoder: fixed cost per forward pass")
+    parser.add_argument("--per-text-ms", type=float, default=1.0, help="synthetic encoder: cost per text in a pass")
+    parser.add_argument("--embedding-model", default=None, help="measure this SentenceTransformer instead")
+    parser.add_argument("--concurrency", default="1,16", help="comma-separated caller thread counts")
+    parser.add_argument("--requests", type=int, default=200, help="encode calls per run")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", default="0,2", help="comma-separated MicroBatcher wait settings")
+    parser.add_argument("--output", default=None, help="also write results JSON here")
+    args = parser.parse_args(argv)
+
+    if args.embedding_model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.embedding_model)
+        encode = model.encode
+        encoder = args.embedding_model
+    else:
+        encode = synthetic_encoder(args.pass_ms, args.per_text_ms)
+        encoder = f"synthetic ({args.pass_ms} ms/pass + {args.per_text_ms} ms/text)"
+    print(f"encoder: {encoder}")
+    variants = [("direct", encode)] + [
+        (f"batched {w} ms", MicroBatcher(encode, args.max_batch, float(w)).encode) for w in args.max_wait_ms.split(",")
+    ]
+    results = []
+    for name, fn in variants:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            row = dict(variant=name, concurrency=concurrency, **measure(fn, concurrency, args.requests))
+            results.append(row)
+            print(f"{name:<14} concurrency={concurrency:<3} {row['qps']:8.1f} q/s  "
+                  f"p50 {row['p50_ms']:7.2f} ms  p95 {row['p95_ms']:7.2f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"encoder": encoder, "max_batch": args.max_batch, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
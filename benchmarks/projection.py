@@ -0,0 +1,106 @@
+"""Retrieval overlap and speed of reduced-dimension embeddings.
+
+Encodes the corpus once at full dimension, fits each requested projection on
+it and reports, per method and size, overlap@k of the top chunks against
+full-dimension search (|top_k full ∩ top_k reduced| / k), vector memory and
+per-query latency of the in-memory index.
+
+    python benchmarks/projection.py --dims 128,256,384
+    python benchmarks/projection.py --store person_A/chunk_store --methods pca,truncate
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "person_A", "ingest_search"))
+
+from chunk_store import ChunkStore  # noqa: E402
+from projection import PROJECTION_METHODS, Projection  # noqa: E402
+from vector_index import InMemoryIndex  # noqa: E402
+
+QUERIES = [
+    "Why do anti-amyloid drugs fail?",
+    "Role of tau in Alzheimer's disease progression",
+    "Microglia dysfunction and chronic inflammation",
+    "APOE-e4 and amyloid-beta clearance",
+    "Blood-brain barrier disruption in neurodegeneration",
+    "Cognitive outcomes of plaque reduction trials",
+]
+
+
+def corpus_embeddings(store, model, model_name):
+    blocks, texts = [], []
+    for segment in store.segments():
+        table = store.read(segment)
+        matrix = store.embeddings(table, model_name)
+        if matrix is None:
+            matrix = model.encode(table.column("text").to_pylist())
+        blocks.append(np.asarray(matrix, dtype=np.float32))
+        texts.extend(table.column("text").to_pylist())
+    return np.concatenate(blocks), texts
+
+
+def search(vectors, queries, top_k):
+    index = InMemoryIndex(vectors.shape[1], precision="float32")
+    index.upsert([{"id": str(i), "values": v} for i, v in enumerate(vectors)])
+    index.query_batch(queries[:1], top_k)
+    start = time.perf_counter()
+    results = [index.query(q, top_k) for q in queries]
+    elapsed = time.perf_counter() - start
+    return [[m["id"] for m in r["matches"]] for r in results], elapsed / len(queries), index.describe_index_stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=None, help="chunk store (default: import person_A/chunks into a temp store)")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT, "person_A", "chunks"))
+    parser.add_argument("--embedding-model", default=os.getenv("EMBEDDING_MODEL", "stsb-roberta-large"))
+    parser.add_argument("--dims", default="128,256,384", help="comma-separated target dimensions")
+    parser.add_argument("--methods", default="pca", help="comma-separated subset of " + ",".join(PROJECTION_METHODS))
+    parser.add_argument("--sample-queries", type=int, default=200, help="chunk texts used as extra queries")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="also write results JSON here")
+    args = parser.parse_args(argv)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(args.embedding_model)
+    store_dir = args.store
+    if store_dir is None:
+        store_dir = tempfile.mkdtemp(prefix="projection-chunks-")
+        ChunkStore(store_dir).import_json_dir(args.chunks_dir)
+    vectors, texts = corpus_embeddings(ChunkStore(store_dir), model, args.embedding_model)
+    rng = np.random.default_rng(args.seed)
+    picks = rng.choice(len(texts), min(args.sample_queries, len(texts)), replace=False)
+    queries = np.asarray(model.encode(QUERIES + [texts[i][:200] for i in picks]), dtype=np.float32)
+    top_k = min(args.top_k, len(vectors))
+
+    full, full_ms, full_stats = search(vectors, queries, top_k)
+    print(f"{'full':<9} {vectors.shape[1]:>5} dims  {full_stats['vector_bytes_in_memory'] / 2**20:8.2f} MiB  "
+          f"overlap@{top_k} 1.0000  {full_ms * 1000:.3f} ms/query")
+    results = []
+    for method in [m.strip() for m in args.methods.split(",") if m.strip()]:
+        for dims in [int(d) for d in args.dims.split(",") if d.strip()]:
+            if dims >= vectors.shape[1]:
+                continue
+            projection = Projection.fit(vectors, dims, method, args.embedding_model)
+            reduced, ms, stats = search(projection.apply(vectors), projection.apply(queries), top_k)
+            overlap = float(np.mean([len(set(a) & set(b)) / top_k for a, b in zip(full, reduced)]))
+            results.append({"method": method, "dims": dims, "overlap": round(overlap, 4), "query_ms": round(ms * 1000, 3),
+                            "vector_bytes": stats["vector_bytes_in_memory"], "version": projection.version})
+            print(f"{method:<9} {dims:>5} dims  {stats['vector_bytes_in_memory'] / 2**20:8.2f} MiB  "
+                  f"overlap@{top_k} {overlap:.4f}  {ms * 1000:.3f} ms/query")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "full_dims": int(vectors.shape[1]), "full_query_ms": round(full_ms * 1000, 3),
+                       "top_k": top_k, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Recall and memory of the compact vector precisions in InMemoryIndex.
+
+Indexes the same vectors at float32, float16 and int8 and reports, for each,
+the bytes of vectors held in memory, recall@k against exact float32 search
+(first pass only and after rescoring) and per-query latency.
+
+    python benchmarks/quantization.py                        # synthetic 1024-dim clustered vectors
+    python benchmarks/quantization.py --store person_A/chunk_store
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "person_A", "ingest_search"))
+
+from vector_index import InMemoryIndex  # noqa: E402
+from quantization import PRECISIONS  # noqa: E402
+
+
+def synthetic(n, dim, clusters, rng):
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, n)
+    return centers[labels] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def from_store(path):
+    from chunk_store import ChunkStore
+    store = ChunkStore(path)
+    blocks = []
+    for segment in store.segments():
+        table = store.read(segment)
+        meta = table.schema.metadata or {}
+        matrix = store.embeddings(table, meta.get(b"embedding_model", b"").decode())
+        if matrix is not None:
+            blocks.append(matrix)
+    if not blocks:
+        raise SystemExit(f"No stored embeddings in {path}; build the index first")
+    return np.concatenate(blocks)
+
+
+def evaluate(vectors, queries, top_k, precision, rescore_factor, truth):
+    index = InMemoryIndex(vectors.shape[1], precision=precision, rescore_factor=rescore_factor, compact_min_bytes=0)
+    for start in range(0, len(vectors), 1000):
+        index.upsert([{"id": str(i), "values": v} for i, v in enumerate(vectors[start:start + 1000], start)])
+    index.query_batch(queries[:1], top_k)  # builds the compact copy
+    start = time.perf_counter()
+    results = [index.query(q, top_k) for q in queries]
+    elapsed = time.perf_counter() - start
+    hits = sum(len({m["id"] for m in r["matches"]} & t) for r, t in zip(results, truth))
+    return {
+        "precision": precision,
+        "rescore_factor": rescore_factor,
+        "vector_bytes": index.describe_index_stats()["vector_bytes_in_memory"],
+        "recall": round(hits / (len(queries) * top_k), 4),
+        "query_ms": round(elapsed / len(queries) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=None, help="chunk store with embeddings (default: synthetic vectors)")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="also write results JSON here")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    vectors = from_store(args.store) if args.store else synthetic(args.vectors, args.dim, args.clusters, rng)
+    picks = rng.integers(0, len(vectors), args.queries)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, vectors.shape[1])).astype(np.float32)
+    top_k = min(args.top_k, len(vectors))
+
+    exact = InMemoryIndex(vectors.shape[1], precision="float32")
+    exact.upsert([{"id": str(i), "values": v} for i, v in enumerate(vectors)])
+    truth = [{m["id"] for m in r["matches"]} for r in exact.query_batch(queries, top_k)]
+
+    results = []
+    for precision in PRECISIONS:
+        factors = [1] if precision == "float32" else [1, args.rescore_factor]
+        for factor in factors:
+            results.append(evaluate(vectors, queries, top_k, precision, factor, truth))
+            r = results[-1]
+            print(f"{precision:<8} rescore x{factor:<3} {r['vector_bytes'] / 2**20:8.1f} MiB  "
+                  f"recall@{top_k} {r['recall']:.4f}  {r['query_ms']:.3f} ms/query")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "dim": int(vectors.shape[1]), "top_k": top_k, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
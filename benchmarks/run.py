@@ -0,0 +1,243 @@
+"""End-to-end benchmark for the backend against local fakes.
+
+Runs /search, /search/batch, /generate, /validate, /design and the full pipeline in-process
+(httpx ASGI transport, no sockets on the API side) with the in-memory vector
+index loaded from person_A/chunks and benchmarks/fake_llm.py standing in for
+Cerebras. Reports p50/p95/p99 latency and requests per second per stage, and
+compares against a stored baseline.
+
+    python benchmarks/run.py --requests 200 --concurrency 16
+    python benchmarks/run.py --save-baseline          # record benchmarks/baseline.json
+    python benchmarks/run.py --tolerance 0.15         # fail if >15% worse than baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+STAGES = ("search", "search_batch", "generate", "validate", "design", "pipeline")
+
+QUERIES = [
+    "Why do anti-amyloid drugs fail?",
+    "Role of tau in Alzheimer's disease progression",
+    "Microglia dysfunction and chronic inflammation",
+    "APOE-e4 and amyloid-beta clearance",
+    "Blood-brain barrier disruption in neurodegeneration",
+    "Cognitive outcomes of plaque reduction trials",
+]
+
+
+def setup_environment(args):
+    """Configure and import the backend so every remote dependency is local."""
+    sys.path.insert(0, BENCH_DIR)
+    from fake_llm import FakeLLMServer
+
+    llm = FakeLLMServer(latency=args.llm_latency, jitter=args.llm_jitter,
+                        malformed_rate=args.malformed_rate, seed=args.seed, max_concurrency=args.llm_max_concurrency).start()
+    os.environ["CEREBRAS_BASE_URL"] = llm.base_url
+    os.environ.setdefault("CEREBRAS_API_KEY", "benchmark")
+    os.environ["VECTOR_BACKEND"] = "memory"
+    os.environ["LOG_DB_PATH"] = ""
+    os.environ["JOB_DB_PATH"] = ""
+    if args.embedding_model:
+        os.environ["EMBEDDING_MODEL"] = args.embedding_model
+    # The backend imports the services as packages from the repo root, and the
+    # services import their siblings by bare module name
+    for path in (ROOT, os.path.join(ROOT, "person_A", "ingest_search"), os.path.join(ROOT, "person_A", "hypothesis_gen"),
+                 os.path.join(ROOT, "person_B", "z3_validator")):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    from person_A.ingest_search import embeddings
+    from chunk_store import ChunkStore
+    start = time.perf_counter()
+    store_dir = args.chunks_dir
+    if not ChunkStore(store_dir).segments():
+        # Legacy one-JSON-per-paper directory (the committed person_A/chunks)
+        store_dir = tempfile.mkdtemp(prefix="bench-chunks-")
+        ChunkStore(store_dir).import_json_dir(args.chunks_dir)
+    embeddings.create_embeddings(store_dir)
+    print(f"Indexed {embeddings.index.describe_index_stats()['total_vector_count']} chunks "
+          f"in {time.perf_counter() - start:.1f}s")
+    from backend.main import app
+    return app, llm
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def summarize(latencies, errors, wall, shed=0):
+    values = sorted(latencies)
+    return {
+        "requests": len(values) + errors + shed,
+        "errors": errors,
+        "shed": shed,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "rps": round(len(values) / wall, 2) if wall > 0 else 0.0,
+    }
+
+
+async def _post(client, path, payload):
+    r = await client.post(path, json=payload)
+    r.raise_for_status()
+    return r.json()
+
+
+async def run_stage(client, stage, fixtures, n, concurrency, rng):
+    sem = asyncio.Semaphore(concurrency)
+    latencies, errors, shed = [], 0, 0
+
+    async def one(i):
+        nonlocal errors, shed
+        query = rng.choice(QUERIES)
+        async with sem:
+            start = time.perf_counter()
+            try:
+                if stage == "search":
+                    r = await client.get("/search", params={"query": query, "mode": fixtures["search_mode"], "rerank": fixtures["rerank"]})
+                    r.raise_for_status()
+                elif stage == "search_batch":
+                    queries = [rng.choice(QUERIES) for _ in range(fixtures["batch_size"])]
+                    await _post(client, "/search/batch", {"queries": queries, "mode": fixtures["search_mode"], "rerank": fixtures["rerank"]})
+                elif stage == "generate":
+                    await _post(client, "/generate", {"papers": fixtures["papers"], "query": query})
+                elif stage == "validate":
+                    await _post(client, "/validate", fixtures["hypothesis"])
+                elif stage == "design":
+                    await _post(client, "/design", fixtures["hypothesis"])
+                else:
+                    r = await client.get("/search", params={"query": query, "mode": fixtures["search_mode"], "rerank": fixtures["rerank"]})
+                    r.raise_for_status()
+                    hyp = await _post(client, "/generate", {"papers": r.json()["papers"], "query": query})
+                    val = await _post(client, "/validate", hyp)
+                    if val["validation_result"]["additionalProp1"]["valid"]:
+                        await _post(client, "/design", hyp)
+            except Exception as e:
+                # 503s are the backend shedding load on purpose, not failures
+                if getattr(getattr(e, "response", None), "status_code", None) == 503:
+                    shed += 1
+                else:
+                    errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    summary = summarize(latencies, errors, time.perf_counter() - start, shed)
+    if stage == "search_batch":
+        summary["queries_per_s"] = round(summary["rps"] * fixtures["batch_size"], 2)
+    return summary
+
+
+async def run_benchmarks(app, args):
+    import httpx
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+        r = await client.get("/search", params={"query": QUERIES[0]})
+        r.raise_for_status()
+        hyp = await _post(client, "/generate", {"papers": r.json()["papers"], "query": QUERIES[0]})
+        fixtures = {"papers": r.json()["papers"], "hypothesis": hyp, "search_mode": args.search_mode, "rerank": args.rerank,
+                    "batch_size": args.batch_size}
+        results = {}
+        for stage in args.stages:
+            results[stage] = await run_stage(client, stage, fixtures, args.requests, args.concurrency, rng)
+            print(f"{stage:<10} {json.dumps(results[stage])}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions: p95 up or throughput down by more than tolerance."""
+    regressions = []
+    for stage, cur in results.items():
+        base = baseline.get("results", {}).get(stage)
+        if not base:
+            continue
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {cur['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{stage}: {cur['rps']} rps vs baseline {base['rps']} rps")
+        if cur["errors"] > base["errors"]:
+            regressions.append(f"{stage}: {cur['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of " + ",".join(STAGES))
+    parser.add_argument("--requests", type=int, default=100, help="requests per stage")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM mean latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2)
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="fraction of malformed LLM JSON replies")
+    parser.add_argument("--llm-max-concurrency", type=int, default=0, help="fake LLM answers 429 above this many in-flight calls")
+    parser.add_argument("--embedding-model", default=None, help="override EMBEDDING_MODEL for a faster encoder")
+    parser.add_argument("--search-mode", default="dense", choices=("dense", "lexical", "hybrid"))
+    parser.add_argument("--rerank", action="store_true", help="enable cross-encoder re-ranking on /search")
+    parser.add_argument("--batch-size", type=int, default=32, help="queries per /search/batch request")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT, "person_A", "chunks"))
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--output", default=None, help="also write results JSON here")
+    args = parser.parse_args(argv)
+    args.stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    app, llm = setup_environment(args)
+    try:
+        results = asyncio.run(run_benchmarks(app, args))
+    finally:
+        llm.stop()
+
+    report = {
+        "config": {k: getattr(args, k) for k in ("requests", "concurrency", "search_mode", "rerank", "batch_size", "llm_latency", "llm_jitter",
+                                                 "llm_max_concurrency", "malformed_rate", "embedding_model", "seed")},
+        "timestamp": time.time(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to record one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print("Warning: baseline was recorded with a different configuration.")
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print("REGRESSION", line)
+    print("No regressions against baseline." if not regressions else f"{len(regressions)} regression(s).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
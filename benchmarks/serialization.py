@@ -0,0 +1,109 @@
+"""Response serialization cost per endpoint shape, default path vs FAST_JSON.
+
+Serves precomputed payloads shaped like /validate (hypothesis echo plus proof
+trace), /logs, /search/batch and /jobs/{id} from a throwaway app in-process
+(httpx ASGI transport), once through FastAPI's default path (response_model
+validation where the endpoint has one, then jsonable_encoder) and once as a
+FastJSONResponse, and reports mean ms per request and response size for each
+payload size. Routing overhead is the same on both paths, so the difference is
+the serialization cost saved.
+
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 100,1000,10000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+for path in ("person_A/hypothesis_gen", "person_B/z3_validator"):
+    sys.path.insert(0, os.path.join(ROOT, path))
+
+from fastapi import FastAPI  # noqa: E402
+from backend.responses import FastJSONResponse, orjson  # noqa: E402
+from person_B.z3_validator.main import ValidationOut  # noqa: E402
+
+RULE = "Implies(microglia_dysfunction, reduced_phagocytosis)"
+PAPER = {"id": 3, "title": "Regional Abeta-tau interactions promote tau spreading",
+         "abstract": "Network flow-based model identifies tau propagation hubs in inferior temporal gyri. " * 4}
+
+
+def payloads(n):
+    hypothesis = {"gap": "Anti-amyloid therapies clear plaques without restoring cognition.",
+                  "hypothesis": "Chronic inflammation drives microglia dysfunction.",
+                  "evidence": [f"Evidence sentence {i} about microglial activation markers." for i in range(n)],
+                  "prediction": "Restoring phagocytosis lowers tau phosphorylation.",
+                  "rules": [RULE] * min(n, 50), "classification": "supported", "further_data": "insights"}
+    return {
+        "validate": dict(hypothesis, validation_result={"additionalProp1": {
+            "valid": True, "reason": "No contradiction.", "proof_trace": [f"Added dynamic rule {i}: {RULE}" for i in range(n)],
+            "warnings": []}}),
+        "logs": {"logs": [{"id": f"{i:032x}", "timestamp": 1.7e9 + i, "hypothesis": hypothesis["hypothesis"],
+                           "result": i % 2 == 0, "latency_ms": i % 500, "endpoint": "validate"} for i in range(n)],
+                 "limit": n, "offset": 0, "count": n},
+        "search_batch": {"results": [{"query": f"query {i}", "papers": [PAPER] * 3} for i in range(max(1, n // 10))]},
+        "job": {"id": "f" * 32, "status": "succeeded", "stages": {"validate": dict(hypothesis)}, "result": {"papers": [PAPER] * n}},
+    }
+
+
+def build_app(data):
+    app = FastAPI()
+    app.post("/default/validate", response_model=ValidationOut)(lambda: data["validate"])
+    app.post("/fast/validate", response_model=ValidationOut)(lambda: FastJSONResponse(data["validate"]))
+    for name in ("logs", "search_batch", "job"):
+        app.post(f"/default/{name}")(lambda name=name: data[name])
+        app.post(f"/fast/{name}")(lambda name=name: FastJSONResponse(data[name]))
+    return app
+
+
+async def measure(client, path, repeat):
+    r = await client.post(path)
+    r.raise_for_status()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await client.post(path)
+    return (time.perf_counter() - start) / repeat, len(r.content)
+
+
+async def run(sizes, repeat):
+    import httpx
+
+    results = []
+    for n in sizes:
+        data = payloads(n)
+        transport = httpx.ASGITransport(app=build_app(data))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in data:
+                default_s, size = await measure(client, f"/default/{name}", repeat)
+                fast_s, fast_size = await measure(client, f"/fast/{name}", repeat)
+                results.append({"endpoint": name, "n": n, "bytes": size, "fast_bytes": fast_size,
+                                "default_ms": round(default_s * 1000, 3), "fast_ms": round(fast_s * 1000, 3),
+                                "speedup": round(default_s / fast_s, 2) if fast_s else None})
+                row = results[-1]
+                print(f"{name:<13} n={n:<6} {size / 1024:9.1f} KiB  default {row['default_ms']:8.3f} ms  "
+                      f"fast {row['fast_ms']:8.3f} ms  x{row['speedup']}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated list lengths (proof trace, logs, ...)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None, help="also write results JSON here")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(f"fast path encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    results = asyncio.run(run([int(s) for s in args.sizes.split(",") if s.strip()], args.repeat))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"encoder": "orjson" if orjson is not None else "json", "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import call_search, call_generate, call_validate, call_design
+from utils import call_search, call_generate, call_validate, call_design, call_pipeline, cached_stage, coalesced_call, pipeline_artifacts, seed_stages
 import json
 import time
 import pandas as pd
@@ -184,6 +184,11 @@ with st.sidebar:
 
     run = st.button("🚀 Run Discovery Pipeline")
 
+    if st.button("♻️ Clear Cached Results", help="Forget this session's pipeline results so the next run recomputes them."):
+        st.session_state.pop("pipeline_artifacts", None)
+        st.session_state.pop("request_cache", None)
+        st.session_state.pop("pipeline_shown", None)
+
 st.html("<h1 class='header'>Neuro-Symbolic Research Scientist Agent for Alzheimer’s Disease 🧠</h1>")
 st.html("<p class='subheader'>Unraveling Alzheimer’s Disease with AI</p>")
 
@@ -211,14 +216,37 @@ st.html("""
 </div>
 """)
 
+request_cache = st.session_state.setdefault("request_cache", {})
+# Results stay on screen across reruns (toggling options, downloads) and are
+# re-rendered from the session's artifacts; only stages whose inputs changed re-run
+query = " ".join(query.split())
+run_key = (query, int(top_k))
 if run:
+    st.session_state["pipeline_shown"] = run_key
+artifacts = None
+if st.session_state.get("pipeline_shown") == run_key:
+    artifacts = pipeline_artifacts(st.session_state.setdefault("pipeline_artifacts", {}), run_key)
+
+if artifacts is not None:
     progress = st.progress(0)
     st.html("<h2 class='subheader'>Pipeline Results</h2>")
-    
+
+    # A new run goes through the backend's job queue, which waits out LLM load
+    # shedding; stages it didn't finish, and later changes, are called one by one
+    if not artifacts:
+        try:
+            with st.spinner("🚀 Running discovery pipeline (search → hypothesis → validation → design)..."):
+                job = coalesced_call(call_pipeline, query, top_k=int(top_k))["response"]
+            seed_stages(artifacts, job)
+            if job["status"] != "succeeded":
+                st.warning(f"Pipeline job {job['status']}: {job.get('error')}. Running the remaining stages directly.")
+        except Exception as e:
+            st.warning(f"Pipeline job unavailable ({str(e)}); running stages directly.")
+
     # Step 1: Search
     try:
         with st.spinner("🔍 Searching papers..."):
-            res = call_search(query, top_k=top_k)
+            res = cached_stage(artifacts, "search", call_search, query, top_k=top_k, cache=request_cache)
             papers = res["response"].get("papers", [])
             progress.progress(25)
             st.subheader("📄 Papers Retrieved")
@@ -241,7 +269,8 @@ if run:
     # Step 2: Generate Hypothesis
     try:
         with st.spinner("🤖 Generating hypothesis..."):
-            hyp = call_generate(papers, query)["response"]
+            gen = cached_stage(artifacts, "generate", call_generate, papers, query, cache=request_cache)
+            hyp = gen["response"]
             progress.progress(50)
             st.subheader("🧪 Generated Hypothesis")
             st.html(f"""
@@ -260,7 +289,7 @@ if run:
             st.html(f"<div class='main-card'><strong>Classification</strong>: {hyp.get('classification', 'Unknown')}</div>")
             st.html(f"<div class='main-card'><strong>Further Insights</strong>: {hyp.get('further_data', 'None')}</div>")
             if show_metrics:
-                st.html(f"<div class='metric-card'>Hypothesis Generation Latency: {call_generate(papers, query)['latency']:.2f} s</div>")
+                st.html(f"<div class='metric-card'>Hypothesis Generation Latency: {gen['latency']:.2f} s</div>")
             if show_raw_json:
                 with st.expander("Raw Hypothesis Output"):
                     st.json(hyp)
@@ -281,7 +310,7 @@ if run:
                 "classification": hyp.get("classification", ""),
                 "further_data": hyp.get("further_data", "")
             }
-            val = call_validate(hyp_input)
+            val = cached_stage(artifacts, "validate", call_validate, hyp_input, cache=request_cache)
             validation_result = val["response"].get("validation_result", {}).get("additionalProp1", {})
             progress.progress(75)
             st.subheader("✅ Validation Result")
@@ -319,7 +348,7 @@ if run:
                     "classification": hyp.get("classification", ""),
                     "further_data": hyp.get("further_data", "")
                 }
-                result = call_design(design_input)
+                result = cached_stage(artifacts, "design", call_design, design_input, cache=request_cache)
                 exp = result["response"]
                 progress.progress(100)
                 st.subheader("🧪 Experiment Blueprint")
@@ -1,8 +1,9 @@
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import json, os, time, logging
-from typing import List, Dict
+import json, os, time, logging, threading
+from concurrent.futures import Future
+from typing import Callable, List, Dict, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("cerebro_pipeline")
@@ -13,12 +14,105 @@ SEARCH_URL = f"{BASE_URL}/search"
 GENERATE_URL = f"{BASE_URL}/generate"
 VALIDATE_URL = f"{BASE_URL}/validate"
 DESIGN_URL = f"{BASE_URL}/design"
+JOBS_URL = f"{BASE_URL}/jobs"
 
 session = requests.Session()
 retries = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
 session.mount("http://", HTTPAdapter(max_retries=retries))
 session.mount("https://", HTTPAdapter(max_retries=retries))
 
+# Results of identical calls are reused for this many seconds within a session
+CACHE_TTL = float(os.getenv("FRONTEND_CACHE_TTL", "300"))
+# Pipeline runs (per query and top_k) whose artifacts a session keeps for re-rendering
+ARTIFACT_LIMIT = int(os.getenv("FRONTEND_ARTIFACT_LIMIT", "20"))
+JOB_POLL_INTERVAL = float(os.getenv("FRONTEND_JOB_POLL_INTERVAL", "1.0"))
+JOB_TIMEOUT = float(os.getenv("FRONTEND_JOB_TIMEOUT", "600"))  # seconds to wait for a pipeline job
+
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+def _request_key(fn: Callable, args: tuple, kwargs: dict) -> str:
+    return f"{fn.__name__}:" + json.dumps([args, kwargs], sort_keys=True, default=str)
+
+def _single_flight(key: str, fn: Callable, *args, **kwargs) -> Dict:
+    """Run fn once for all concurrent callers sharing the same key."""
+    with _inflight_lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = Future()
+            _inflight[key] = fut
+    if not leader:
+        logger.info(f"Joined in-flight request {key[:80]}")
+        return fut.result()
+    try:
+        result = fn(*args, **kwargs)
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def coalesced_call(fn: Callable, *args, cache: Optional[Dict] = None, ttl: float = CACHE_TTL, **kwargs) -> Dict:
+    """Call one of the call_* helpers, deduplicating identical in-flight calls
+    and memoizing results in `cache` (e.g. st.session_state) for `ttl` seconds.
+    """
+    key = _request_key(fn, args, kwargs)
+    now = time.time()
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1]
+        # Drop expired entries so the per-session cache stays small
+        for k in [k for k, (ts, _) in cache.items() if now - ts >= ttl]:
+            del cache[k]
+    result = _single_flight(key, fn, *args, **kwargs)
+    if cache is not None:
+        cache[key] = (time.time(), result)
+    return result
+
+def pipeline_artifacts(store: Dict, key: tuple, limit: int = ARTIFACT_LIMIT) -> Dict:
+    """Stage artifacts for one (query, top_k) run, kept in `store` (e.g.
+    st.session_state) across reruns; the least recently used runs beyond
+    `limit` are dropped.
+    """
+    artifacts = store.pop(key, None) or {}
+    store[key] = artifacts
+    while len(store) > limit:
+        del store[next(iter(store))]
+    return artifacts
+
+def cached_stage(artifacts: Dict, stage: str, fn: Callable, *args, cache: Optional[Dict] = None, **kwargs) -> Dict:
+    """The `stage` artifact if it was computed from the same inputs, else a
+    fresh coalesced_call stored in its place. A stage whose upstream result
+    changed gets new inputs and re-runs; unchanged stages are reused. Stages
+    seeded from a job (see seed_stages) are taken as computed from the inputs
+    they are first asked for.
+    """
+    key = _request_key(fn, args, kwargs)
+    entry = artifacts.get(stage)
+    if entry is not None and entry[0] is None:
+        entry = artifacts[stage] = (key, entry[1])
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    result = coalesced_call(fn, *args, cache=cache, **kwargs)
+    artifacts[stage] = (key, result)
+    return result
+
+def seed_stages(artifacts: Dict, job: Dict) -> None:
+    """Store each stage a pipeline job finished as that stage's artifact.
+
+    The job ran every stage on its predecessor's result, so when the stages
+    are next asked for in pipeline order they get exactly the job's inputs;
+    stages the job didn't reach are left for cached_stage to call.
+    """
+    timings = job.get("timings") or {}
+    for stage, result in (job.get("stages") or {}).items():
+        artifacts[stage] = (None, {"response": result, "latency": timings.get(stage, 0.0)})
+
 def call_search(query: str, top_k: int = 3) -> Dict:
     start_time = time.time()
     try:
@@ -80,4 +174,30 @@ def call_design(validated_hypothesis: Dict) -> Dict:
         return {"response": response, "latency": time.time() - start_time}
     except Exception as e:
         logger.error(f"Experiment design failed: {e}")
-        raise ValueError(f"Design service error: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Design service error: {str(e)}")
+
+def call_pipeline(query: str, top_k: int = 3) -> Dict:
+    """Run the whole pipeline as a backend job: POST /jobs, then poll
+    GET /jobs/{id} until it finishes. The response is the job record, with
+    each finished stage's result under "stages" and its time under "timings"."""
+    start_time = time.time()
+    try:
+        r = session.post(JOBS_URL, json={"query": query, "top_k": top_k}, timeout=30)
+        if r.status_code == 503:
+            raise ValueError(f"Backend busy; retry in {r.headers.get('Retry-After', '5')}s")
+        r.raise_for_status()
+        job_id = r.json()["id"]
+        while True:
+            r = session.get(f"{JOBS_URL}/{job_id}", timeout=30)
+            r.raise_for_status()
+            job = r.json()
+            if job["status"] not in ("queued", "running"):
+                break
+            if time.time() - start_time > JOB_TIMEOUT:
+                raise ValueError(f"Job {job_id} still {job['status']} after {JOB_TIMEOUT:.0f}s")
+            time.sleep(JOB_POLL_INTERVAL)
+        logger.info(f"Pipeline job {job_id} {job['status']} in {time.time() - start_time:.2f}s")
+        return {"response": job, "latency": time.time() - start_time}
+    except Exception as e:
+        logger.error(f"Pipeline job failed: {e}")
+        raise ValueError(f"Pipeline job error: {str(e)}")
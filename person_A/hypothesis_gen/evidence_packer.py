@@ -0,0 +1,102 @@
+import os
+import re
+import math
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a BPE-like estimate
+    tiktoken = None
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))  # tokens of paper evidence per prompt
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "cl100k_base")  # tiktoken encoding, if tiktoken is installed
+DEDUP_THRESHOLD = float(os.getenv("EVIDENCE_DEDUP_THRESHOLD", "0.7"))  # word-set Jaccard above which a sentence is a repeat
+MIN_TRIM_TOKENS = 24  # don't bother trimming a sentence into a smaller gap than this
+
+# Words are split into pieces of up to 6 characters, roughly how BPE splits rare words
+_PIECE = re.compile(r"\w{1,6}|[^\w\s]")
+_WORD = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'])")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from has have how in into is it its of on or that the their this to "
+    "was were what which why with we our these those than then also can may not".split()
+)
+
+_encoding = None
+
+
+def count_tokens(text):
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding(PROMPT_TOKENIZER)
+        return len(_encoding.encode(text))
+    return len(_PIECE.findall(text))
+
+
+def _terms(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def _trim(sentence, budget):
+    """Longest word prefix of `sentence` within `budget` tokens, with an ellipsis."""
+    words = sentence.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(" ".join(words[:mid]) + " ...") <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + " ..." if lo else ""
+
+
+def pack_evidence(papers, query, budget=PROMPT_TOKEN_BUDGET):
+    """Paper evidence for the prompt, packed into at most `budget` tokens.
+
+    Abstracts are split into sentences, scored by IDF-weighted overlap with the
+    query (plus a small bonus for higher-ranked papers and leading sentences),
+    and near-duplicates across papers are dropped. The best sentences are taken
+    greedily until the budget is spent, trimming the last one to fit, and are
+    emitted per paper in their original order.
+    """
+    sentences = []  # (paper index, position, text, term set)
+    for i, paper in enumerate(papers):
+        abstract = " ".join(str(paper.get("abstract", "")).split())
+        for j, text in enumerate(s for s in _SENTENCE_END.split(abstract) if s):
+            sentences.append((i, j, text, set(_terms(text))))
+    if not sentences:
+        return "\n".join(f"Title: {p.get('title', '')}" for p in papers)
+
+    df = {}
+    for _, _, _, terms in sentences:
+        for term in terms:
+            df[term] = df.get(term, 0) + 1
+    n = len(sentences)
+    query_terms = set(_terms(query))
+
+    def score(item):
+        i, j, _, terms = item
+        overlap = sum(math.log(1 + n / df[t]) for t in query_terms & terms)
+        return overlap / math.sqrt(1 + len(terms)) + 0.3 / (1 + i) + 0.2 / (1 + j)
+
+    headers = {i: f"Title: {p.get('title', '')}\nEvidence:" for i, p in enumerate(papers)}
+    chosen, kept, used = {}, [], 0
+    for item in sorted(sentences, key=score, reverse=True):
+        i, j, text, terms = item
+        if any(len(terms & other) / max(1, len(terms | other)) > DEDUP_THRESHOLD for other in kept):
+            continue
+        cost = count_tokens(text) + 1 + (0 if i in chosen else count_tokens(headers[i]) + 1)
+        if used + cost > budget:
+            room = budget - used - (cost - count_tokens(text))
+            if room < MIN_TRIM_TOKENS:
+                continue
+            text = _trim(text, room)
+            if not text:
+                continue
+            cost = budget - used
+        chosen.setdefault(i, []).append((j, text))
+        kept.append(terms)
+        used += cost
+        if budget - used < MIN_TRIM_TOKENS:
+            break
+    return "\n".join(f"{headers[i]} " + " ".join(text for _, text in sorted(chosen[i])) for i in sorted(chosen))
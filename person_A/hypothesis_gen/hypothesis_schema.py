@@ -0,0 +1,53 @@
+import json
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+
+class HypothesisDraft(BaseModel):
+    """The fields the LLM writes; classification and further_data are derived afterwards."""
+    model_config = ConfigDict(extra="forbid")
+
+    gap: str
+    hypothesis: str
+    evidence: List[str]
+    prediction: str
+    rules: List[str]
+
+
+# OpenAI-style structured output: the provider constrains decoding to this schema
+HYPOTHESIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "hypothesis", "strict": True, "schema": HypothesisDraft.model_json_schema()},
+}
+
+
+def parse_hypothesis(content: str) -> Optional[Dict]:
+    """Validate an LLM reply against HypothesisDraft in one pass; None if it doesn't conform."""
+    try:
+        return HypothesisDraft.model_validate_json(content).model_dump()
+    except ValidationError:
+        return None
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else str(value)
+
+
+def normalize_hypothesis(hypothesis) -> Dict:
+    """Coerce a hypothesis from any parse path into the HypothesisResponse shape.
+
+    Schema-valid replies pass through unchanged; replies recovered by the
+    fallback parsers get missing fields defaulted and wrong types stringified.
+    """
+    if not isinstance(hypothesis, dict):
+        hypothesis = {"gap": _text(hypothesis), "further_data": "Normalization failed"}
+    defaults = {"gap": "", "hypothesis": "", "evidence": [], "prediction": "", "rules": [],
+                "classification": "unknown", "further_data": "No further insights."}
+    for key, default in defaults.items():
+        value = hypothesis.get(key, default)
+        if isinstance(default, list):
+            value = [_text(v) for v in value] if isinstance(value, list) else [_text(value)]
+        else:
+            value = _text(value)
+        hypothesis[key] = value
+    return hypothesis
@@ -3,15 +3,22 @@ import requests
 import json
 import re
 from dotenv import load_dotenv
+from evidence_packer import pack_evidence
+from hypothesis_schema import HYPOTHESIS_RESPONSE_FORMAT, normalize_hypothesis, parse_hypothesis
+from service_metrics import stage
 
 load_dotenv()
 
 CEREBRAS_API_KEY = os.getenv("CEREBRAS_API_KEY")
-API_URL = "https://api.cerebras.ai/v1/chat/completions"
+# Point at any OpenAI-compatible server (e.g. benchmarks/fake_llm.py) by overriding the base URL
+CEREBRAS_BASE_URL = os.getenv("CEREBRAS_BASE_URL", "https://api.cerebras.ai")
+API_URL = f"{CEREBRAS_BASE_URL.rstrip('/')}/v1/chat/completions"
 HEADERS = {
     "Authorization": f"Bearer {CEREBRAS_API_KEY}",
     "Content-Type": "application/json"
 }
+# Send the JSON schema as response_format so replies are schema-valid; set to 0 for servers without it
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") == "1"
 
 def fix_json_with_llm(raw_text):
     prompt = f"""
@@ -25,7 +32,10 @@ Text:
         "max_tokens": 300,
         "temperature": 0.0
     }
-    resp = requests.post(API_URL, headers=HEADERS, json=payload, timeout=30)
+    if LLM_STRUCTURED_OUTPUT:
+        payload["response_format"] = HYPOTHESIS_RESPONSE_FORMAT
+    with stage("json_repair"):
+        resp = requests.post(API_URL, headers=HEADERS, json=payload, timeout=30)
     print("Fix JSON LLM response:", resp.status_code, resp.text)
     resp.raise_for_status()
     content = resp.json().get("choices", [])[0].get("message", {}).get("content", "")
@@ -35,10 +45,26 @@ Text:
         print("Final JSON decode error:", e)
         return {"error": "Could not decode JSON after fix", "raw": content}
 
+def _parse_unstructured(content):
+    # Try direct JSON parsing first
+    try:
+        return json.loads(content)
+    except Exception as e:
+        print("Direct JSON decode error:", e)
+    match = re.search(r"({.*})", content, re.DOTALL)
+    if not match:
+        return fix_json_with_llm(content)
+    json_str = match.group(1)
+    try:
+        return json.loads(json_str)
+    except Exception as e:
+        print("Regex JSON decode error:", e)
+        return fix_json_with_llm(json_str)
+
 def generate_hypothesis_from_papers(papers, query=''):
-    papers_str = "\n".join(
-        [f"Title: {p['title']}\nAbstract: {p['abstract']}" for p in papers]
-    )
+    # Relevant sentences within PROMPT_TOKEN_BUDGET, so prompt size doesn't grow with top_k
+    with stage("evidence_pack"):
+        papers_str = pack_evidence(papers, query)
     prompt = f"""
 You are a neuroscientist. Read these paper summaries and generate a hypothesis about Alzheimer's based on the query: '{query}'.
 {papers_str}
@@ -52,26 +78,19 @@ Do not include any explanation, markdown, or text outside the JSON. Your entire
         "max_tokens": 500,
         "temperature": 0.7
     }
-    resp = requests.post(API_URL, headers=HEADERS, json=payload, timeout=30)
+    if LLM_STRUCTURED_OUTPUT:
+        payload["response_format"] = HYPOTHESIS_RESPONSE_FORMAT
+    with stage("llm_hypothesis"):
+        resp = requests.post(API_URL, headers=HEADERS, json=payload, timeout=30)
     print("Cerebras response:", resp.status_code, resp.text)
     resp.raise_for_status()
     content = resp.json().get("choices", [])[0].get("message", {}).get("content", "")
 
-    # Try direct JSON parsing first
-    try:
-        result = json.loads(content)
-    except Exception as e:
-        print("Direct JSON decode error:", e)
-        match = re.search(r"({.*})", content, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-            try:
-                result = json.loads(json_str)
-            except Exception as e:
-                print("Regex JSON decode error:", e)
-                result = fix_json_with_llm(json_str)
-        else:
-            result = fix_json_with_llm(content)
+    # Schema-valid replies are validated in one pass; the fallbacks only run
+    # when structured output is off or the server ignored it
+    result = parse_hypothesis(content)
+    if result is None:
+        result = _parse_unstructured(content)
 
     # Post-processing to enforce cure_claim for cure-related queries
     if "cure" in query.lower() or "treat" in query.lower():
@@ -97,6 +116,10 @@ Do not include any explanation, markdown, or text outside the JSON. Your entire
 
     return result
 
+def generate_hypothesis(papers, query=''):
+    """generate_hypothesis_from_papers, normalized to the HypothesisResponse shape."""
+    return normalize_hypothesis(generate_hypothesis_from_papers(papers, query))
+
 def classify_based_on_rules(hypothesis: str, rules: list) -> dict:
     supported_count = 0
     insights = []
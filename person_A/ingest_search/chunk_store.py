@@ -0,0 +1,214 @@
+import os
+import json
+import uuid
+import pyarrow as pa
+from paper_metadata import extract_paper_metadata
+
+SEGMENT_ROWS = int(os.getenv("CHUNK_SEGMENT_ROWS", "8192"))  # chunks buffered before a segment is written
+MANIFEST = "segments.json"  # live segment names, in order
+
+SCHEMA = pa.schema([
+    ("paper_id", pa.int64()),
+    ("chunk_idx", pa.int32()),
+    ("title", pa.string()),
+    ("text", pa.string()),
+    # paper-level fields, repeated on each chunk so indexes can filter rows directly
+    ("year", pa.int16()),
+    ("journal", pa.string()),
+    ("study_type", pa.string()),
+])
+PAPER_FIELDS = ("year", "journal", "study_type")
+
+
+class ChunkStore:
+    """Append-only columnar chunk store: a directory of Arrow IPC segment files.
+
+    Each `flush` writes one immutable `part-*.arrow` segment (written to a temp
+    file, then renamed, so readers never see a partial file). Scans memory-map
+    the segments and yield record batches, so re-embedding streams at disk speed
+    instead of parsing one JSON file per paper. Embeddings, when attached, live
+    in an extra fixed-size-list column tagged with the encoder name.
+
+    A segment is never overwritten, since readers may still have it mapped
+    (and Windows can't replace a mapped file). Rewrites go to a new file and
+    swap it into the `segments.json` manifest; files that drop out of the
+    manifest are deleted once nothing maps them. A directory without a
+    manifest (an older store, or a snapshot's copy) lists its part files.
+    """
+
+    def __init__(self, path, segment_rows=SEGMENT_ROWS):
+        self.path = path
+        self.segment_rows = segment_rows
+        self._pending = {name: [] for name in SCHEMA.names}
+        os.makedirs(path, exist_ok=True)
+
+    def _files(self):
+        return sorted(f for f in os.listdir(self.path) if f.startswith("part-") and f.endswith(".arrow"))
+
+    def segments(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as f:
+                names = json.load(f)["segments"]
+        except FileNotFoundError:
+            names = self._files()
+        return [os.path.join(self.path, name) for name in names]
+
+    def _commit(self, segments):
+        """Make `segments` the live set, then delete files no longer in it."""
+        names = [os.path.basename(s) for s in segments]
+        tmp = os.path.join(self.path, f".{MANIFEST}.{uuid.uuid4().hex[:8]}")
+        with open(tmp, "w") as f:
+            json.dump({"segments": names}, f)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+        for name in set(self._files()) - set(names):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:  # still memory-mapped on Windows; removed by a later commit
+                pass
+
+    def drop(self, segments):
+        """Remove `segments` from the store."""
+        self._commit([s for s in self.segments() if s not in set(segments)])
+
+    def append(self, paper_id, title, chunks, metadata=None):
+        metadata = metadata or {}
+        for idx, text in enumerate(chunks):
+            self._pending["paper_id"].append(paper_id)
+            self._pending["chunk_idx"].append(idx)
+            self._pending["title"].append(title)
+            self._pending["text"].append(text)
+            for field in PAPER_FIELDS:
+                self._pending[field].append(metadata.get(field))
+        if len(self._pending["text"]) >= self.segment_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending["text"]:
+            return None
+        table = pa.table(self._pending, schema=SCHEMA)
+        self._pending = {name: [] for name in SCHEMA.names}
+        segments = self.segments()
+        name = f"part-{len(segments):06d}-{uuid.uuid4().hex[:8]}.arrow"
+        path = self._write(os.path.join(self.path, name), table)
+        self._commit(segments + [path])
+        return path
+
+    @staticmethod
+    def _write(path, table):
+        tmp = f"{path}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+        return path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    @staticmethod
+    def read(segment):
+        """Memory-mapped, zero-copy view of one segment."""
+        return pa.ipc.open_file(pa.memory_map(segment, "r")).read_all()
+
+    @staticmethod
+    def select(table, columns):
+        """Project `table` onto `columns`, filling ones missing from older segments with nulls."""
+        for name in columns:
+            if name not in table.column_names:
+                table = table.append_column(SCHEMA.field(name), pa.nulls(table.num_rows, SCHEMA.field(name).type))
+        return table.select(columns)
+
+    def scan(self, columns=None, batch_size=1024):
+        """Yield record batches across all segments, reading only `columns`."""
+        for segment in self.segments():
+            table = self.read(segment)
+            if columns:
+                table = table.select([c for c in columns if c in table.column_names])
+            yield from table.to_batches(max_chunksize=batch_size)
+
+    def num_rows(self):
+        return sum(self.read(s).num_rows for s in self.segments())
+
+    @staticmethod
+    def embeddings(table, model_name):
+        """Stored embeddings for a segment as a numpy matrix, or None if absent or from another encoder."""
+        if "embedding" not in table.column_names:
+            return None
+        meta = table.schema.metadata or {}
+        if meta.get(b"embedding_model", b"").decode() != model_name:
+            return None
+        column = table.column("embedding").combine_chunks()
+        return column.values.to_numpy(zero_copy_only=False).reshape(len(column), column.type.list_size)
+
+    def attach_embeddings(self, segment, table, embeddings, model_name):
+        """Rewrite `segment` with an embedding column so later rebuilds skip encoding.
+
+        The rewrite is a new segment file that takes the old one's place;
+        returns its path.
+        """
+        dim = embeddings.shape[1]
+        values = pa.array(embeddings.astype("float32").reshape(-1), type=pa.float32())
+        column = pa.FixedSizeListArray.from_arrays(values, dim)
+        if "embedding" in table.column_names:
+            table = table.drop(["embedding"])
+        table = table.append_column("embedding", column)
+        table = table.replace_schema_metadata({"embedding_model": model_name})
+        prefix = os.path.basename(segment).rsplit("-", 1)[0]
+        path = self._write(os.path.join(self.path, f"{prefix}-{uuid.uuid4().hex[:8]}.arrow"), table)
+        self._commit([path if s == segment else s for s in self.segments()])
+        return path
+
+    def import_json_dir(self, json_dir):
+        """Load legacy `<pdf>.json` chunk files (one per paper) into the store."""
+        for json_file in sorted(os.listdir(json_dir)):
+            if json_file.endswith(".json"):
+                with open(os.path.join(json_dir, json_file), "r") as f:
+                    data = json.load(f)
+                metadata = extract_paper_metadata(" ".join(data["chunks"][:3]))
+                self.append(data["id"], data["title"], data["chunks"], metadata)
+        self.flush()
+        return self
+
+
+def chunk_id(paper_id, chunk_idx):
+    return f"{paper_id}_{chunk_idx}"
+
+
+class ChunkTextLookup:
+    """Resolve vector IDs (`<paper_id>_<chunk_idx>`) to full chunk text.
+
+    Only (segment, row) positions are kept in memory; the text itself stays in
+    the memory-mapped segments, so vector metadata doesn't have to carry it.
+    """
+
+    def __init__(self, store):
+        self._tables = []
+        self._positions = {}
+        for segment in store.segments():
+            table = store.select(store.read(segment), ["paper_id", "chunk_idx", "title", "text", *PAPER_FIELDS])
+            seg = len(self._tables)
+            self._tables.append(table)
+            ids = zip(table.column("paper_id").to_pylist(), table.column("chunk_idx").to_pylist())
+            for row, (pid, idx) in enumerate(ids):
+                self._positions[chunk_id(pid, idx)] = (seg, row)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def get(self, vector_id, default=None):
+        pos = self._positions.get(vector_id)
+        if pos is None:
+            return default
+        seg, row = pos
+        return self._tables[seg].column("text")[row].as_py()
+
+    def record(self, vector_id):
+        """paper_id, chunk_idx, title, text and paper fields for a vector ID, or None."""
+        pos = self._positions.get(vector_id)
+        if pos is None:
+            return None
+        seg, row = pos
+        return self._tables[seg].slice(row, 1).to_pylist()[0]
@@ -1,18 +1,55 @@
 import os
-import json
-from sentence_transformers import SentenceTransformer
-from pinecone import Pinecone, ServerlessSpec
+import time
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from chunk_store import PAPER_FIELDS, ChunkStore, ChunkTextLookup, chunk_id
+from metadata_filter import paper_fields
+from upsert_writer import UpsertWriter
+from lexical_index import BM25Builder, BM25Index, reciprocal_rank_fusion
+from reranker import RERANK_CANDIDATES, get_reranker
+from projection import Projection
+from snapshot import SnapshotMismatch, open_snapshot, write_snapshot
+from encoder_service import ENCODER_URL, RemoteEncoder, get_model
+from micro_batcher import ENCODE_MAX_BATCH, MicroBatcher
+from service_metrics import stage
 
 load_dotenv()
+logger = logging.getLogger("embeddings")
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-INDEX_NAME = "neuro-scientist"
-pc = Pinecone(api_key=PINECONE_API_KEY)
-model = SentenceTransformer("stsb-roberta-large")
+# Optional projection of embeddings to fewer dimensions at ingest and query time (0 keeps the encoder's)
+EMBEDDING_DIMS = int(os.getenv("EMBEDDING_DIMS", "0"))
+PROJECTION_METHOD = os.getenv("PROJECTION_METHOD", "pca")  # "pca" or "truncate" for Matryoshka encoders
+PROJECTION_SAMPLE = int(os.getenv("PROJECTION_SAMPLE", "50000"))  # embeddings the PCA is fitted on
+INDEX_NAME = f"neuro-scientist-{EMBEDDING_DIMS}d" if EMBEDDING_DIMS else "neuro-scientist"
+# "pinecone" (default) or "memory" for the local numpy index used in dev and benchmarks
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "stsb-roberta-large")
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "person_A/chunk_store")
+# Only a preview of each chunk goes into vector metadata; full text is looked up by ID in the chunk store
+METADATA_TEXT_CHARS = int(os.getenv("METADATA_TEXT_CHARS", "300"))
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", os.path.join(CHUNK_STORE_PATH, "lexical"))
+PROJECTION_PATH = os.getenv("PROJECTION_PATH", os.path.join(CHUNK_STORE_PATH, "projection.npz"))
+# Versioned snapshots of the search state written by create_embeddings and restored at startup ("" disables)
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+# Each retriever contributes this many candidates per requested result to the fusion
+FUSION_DEPTH = int(os.getenv("FUSION_DEPTH", "4"))
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))  # queries per encoder forward pass in batch search
+# With ENCODER_URL set, every worker shares the encoder service's weights instead of loading its own copy
+model = RemoteEncoder(ENCODER_URL, EMBEDDING_MODEL) if ENCODER_URL else get_model()
+# Concurrent single-query searches share forward passes; the encoder service batches across workers itself
+_query_batcher = MicroBatcher(model.encode) if ENCODE_MAX_BATCH > 1 and not ENCODER_URL else None
 
 def initialize_index():
-    desired_dim = model.get_sentence_embedding_dimension()
+    desired_dim = EMBEDDING_DIMS or model.get_sentence_embedding_dimension()
+    if VECTOR_BACKEND == "memory":
+        from vector_index import InMemoryIndex
+        return InMemoryIndex(desired_dim)
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     if INDEX_NAME not in pc.list_indexes().names():
         pc.create_index(
             name=INDEX_NAME,
@@ -27,47 +64,283 @@ def initialize_index():
 
 index = initialize_index()
 
-def create_embeddings(json_dir):
-    for json_file in os.listdir(json_dir):
-        if json_file.endswith(".json"):
-            with open(os.path.join(json_dir, json_file), "r") as f:
-                data = json.load(f)
-                chunks = data["chunks"]
-                embeddings = model.encode(chunks).tolist()
-                vectors = [
-                    {
-                        "id": f"{data['id']}_{idx}",
-                        "values": embeddings[idx],
-                        "metadata": {
-                            "title": data["title"],
-                            "paper_id": data["id"],
-                            "chunk_idx": idx,
-                            "text": chunk
-                        }
+def fit_projection(store, dims=EMBEDDING_DIMS, method=PROJECTION_METHOD, sample=PROJECTION_SAMPLE, seed=0):
+    """Fit a Projection on (a uniform sample of) the stored chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    fraction = min(1.0, sample / max(store.num_rows(), 1))
+    blocks = []
+    for segment in store.segments():
+        embeddings = store.embeddings(store.read(segment), EMBEDDING_MODEL)
+        keep = rng.random(len(embeddings)) < fraction
+        blocks.append(np.asarray(embeddings[keep]))
+    return Projection.fit(np.concatenate(blocks), dims, method, EMBEDDING_MODEL)
+
+def encoder_config():
+    """What determines the vector space; snapshots built under another config are refused."""
+    model_dims = model.get_sentence_embedding_dimension()
+    return {"model": EMBEDDING_MODEL, "model_dims": model_dims, "dims": EMBEDDING_DIMS or model_dims,
+            "projection": PROJECTION_METHOD if EMBEDDING_DIMS else None}
+
+def create_embeddings(store_dir):
+    """Embed every chunk in the chunk store and upsert it, one segment at a time.
+
+    Embeddings are written back into the store, so rebuilding the index with the
+    same encoder skips encoding entirely. With EMBEDDING_DIMS set, a projection
+    is fitted on the stored embeddings, applied before upserting and saved as
+    `<store_dir>/projection.npz` for query time. Upserts go through
+    UpsertWriter in size-bounded, concurrent, retried batches. The BM25 index
+    for lexical and hybrid search is built in the same pass and saved under
+    `<store_dir>/lexical`. Paper-level fields (year, journal, study type) go
+    into both indexes so searches can filter on them.
+    """
+    global chunk_texts, lexical_index, projection
+    store = ChunkStore(store_dir)
+    for segment in store.segments():
+        table = store.read(segment)
+        if store.embeddings(table, EMBEDDING_MODEL) is None:
+            store.attach_embeddings(segment, table, model.encode(table.column("text").to_pylist()), EMBEDDING_MODEL)
+    fitted = fit_projection(store) if EMBEDDING_DIMS else None
+    lexical = BM25Builder()
+    with UpsertWriter(index) as writer:
+        for segment in store.segments():
+            table = store.read(segment)
+            embeddings = store.embeddings(table, EMBEDDING_MODEL)
+            if fitted is not None:
+                embeddings = fitted.apply(embeddings)
+            rows = store.select(table, ["paper_id", "chunk_idx", "title", "text", *PAPER_FIELDS]).to_pylist()
+            for row in rows:
+                lexical.add(chunk_id(row["paper_id"], row["chunk_idx"]), f"{row['title']} {row['text']}", paper_fields(row))
+            writer.add_many(
+                {
+                    "id": chunk_id(row["paper_id"], row["chunk_idx"]),
+                    "values": embeddings[i].tolist(),
+                    "metadata": {
+                        "title": row["title"],
+                        "chunk_idx": row["chunk_idx"],
+                        "text": row["text"][:METADATA_TEXT_CHARS],
+                        **paper_fields(row)
                     }
-                    for idx, chunk in enumerate(chunks)
-                ]
-                index.upsert(vectors=vectors)
-    print("All embeddings upserted to Pinecone.")
-
-def semantic_search(query, top_k=6):
-    query_emb = model.encode([query]).tolist()[0]
-    result = index.query(
-        vector=query_emb,
-        top_k=top_k,
-        include_metadata=True
-    )
+                }
+                for i, row in enumerate(rows)
+            )
+    chunk_texts = ChunkTextLookup(store)
+    lexical_index = lexical.build()
+    lexical_index.save(os.path.join(store_dir, "lexical"))
+    if fitted is not None:
+        fitted.save(os.path.join(store_dir, "projection.npz"))
+        print(f"Projected embeddings to {fitted.dims} dims ({fitted.method}, version {fitted.version}).")
+    projection = fitted
+    print(f"All embeddings upserted ({writer.upserted} vectors).")
+    if SNAPSHOT_DIR:
+        version = write_snapshot(SNAPSHOT_DIR, encoder_config(), index, lexical_index, store, projection)
+        print(f"Search snapshot {version} written to {SNAPSHOT_DIR}.")
+
+def load_chunk_texts(store_dir=CHUNK_STORE_PATH):
+    if not os.path.isdir(store_dir):
+        return None
+    return ChunkTextLookup(ChunkStore(store_dir))
+
+def load_lexical_index(path=LEXICAL_INDEX_PATH):
+    if not os.path.isdir(path):
+        return None
+    return BM25Index.load(path)
+
+def load_projection(path=PROJECTION_PATH):
+    """The projection the index was built with, or None when not reducing dimensions."""
+    if not EMBEDDING_DIMS or not os.path.exists(path):
+        return None
+    loaded = Projection.load(path)
+    if loaded.dims != EMBEDDING_DIMS or loaded.model_name != EMBEDDING_MODEL:
+        raise ValueError(f"Projection at {path} maps {loaded.model_name} to {loaded.dims} dims; "
+                         f"configured for {EMBEDDING_MODEL} at {EMBEDDING_DIMS}")
+    return loaded
+
+_retrievers = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_THREADS", "8")), thread_name_prefix="retrieve")
+
+def chunk_text_for(match):
+    """Full text of a matched chunk, falling back to the metadata preview."""
+    meta = match["metadata"] or {}
+    text = chunk_texts.get(match["id"]) if chunk_texts is not None else None
+    return text if text is not None else meta.get("text", "")
+
+def _query_index(query_emb, top_k, filters=None):
+    kwargs = {"filter": filters} if filters else {}
+    with stage("vector_query"):
+        result = index.query(
+            vector=query_emb,
+            top_k=top_k,
+            include_metadata=True,
+            **kwargs
+        )
+    return result["matches"]
+
+def encode_queries(queries, **kwargs):
+    """Encode queries into the index's vector space (projected when EMBEDDING_DIMS is set).
+
+    Calls without encoder options go through the micro-batcher, so concurrent
+    searches are encoded together instead of one forward pass each. With
+    ENCODER_URL set they go straight to the encoder service, which batches
+    requests from all workers, so a query waits for one batch window, not two.
+    """
+    if _query_batcher is not None and not kwargs:
+        query_embs = _query_batcher.encode(queries)
+    else:
+        query_embs = model.encode(queries, **kwargs)
+    if EMBEDDING_DIMS:
+        if projection is None:
+            raise RuntimeError("Projection not fitted; run create_embeddings first")
+        query_embs = projection.apply(query_embs)
+    return query_embs
+
+def dense_search(query, top_k, filters=None):
+    with stage("encode"):
+        query_emb = encode_queries([query]).tolist()[0]
+    return _query_index(query_emb, top_k, filters)
+
+def dense_search_batch(queries, top_k, filters=None):
+    """Dense matches for many queries: one batched encoder pass, then one
+    matrix-multiply top-k on the local index or concurrent queries on Pinecone."""
+    with stage("encode"):
+        query_embs = encode_queries(queries, batch_size=ENCODE_BATCH_SIZE)
+    if hasattr(index, "query_batch"):
+        with stage("vector_query"):
+            results = index.query_batch(query_embs, top_k, include_metadata=True, filter=filters)
+        return [r["matches"] for r in results]
+    return list(_retrievers.map(lambda emb: _query_index(emb.tolist(), top_k, filters), query_embs))
+
+def lexical_search(query, top_k, filters=None):
+    if lexical_index is None:
+        raise RuntimeError("Lexical index not built; run create_embeddings first")
+    with stage("lexical_query"):
+        return lexical_index.search(query, top_k, filter=filters)
+
+def _match_record(vector_id, dense_by_id):
+    match = dense_by_id.get(vector_id)
+    if match is not None:
+        meta = match["metadata"]
+        return {"paper_id": meta["paper_id"], "title": meta["title"], "text": chunk_text_for(match)}
+    return chunk_texts.record(vector_id) if chunk_texts is not None else None
+
+def _dense_depth(depth, mode):
+    return depth * FUSION_DEPTH if mode == "hybrid" else depth
+
+def _retrieve(query, depth, mode, filters=None, matches=None):
+    """Ranked chunk IDs plus the dense matches (by ID) for the chosen mode.
+
+    `matches` are precomputed dense matches (from a batched search) to use
+    instead of querying the index again.
+    """
+    if mode != "dense" and lexical_index is None:
+        logger.warning("Lexical index not built; serving mode=%s from dense retrieval", mode)
+        mode = "dense"
+    if mode == "dense":
+        if matches is None:
+            matches = dense_search(query, depth, filters)
+        matches = matches[:depth]
+        return [m["id"] for m in matches], {m["id"]: m for m in matches}
+    fused_depth = _dense_depth(depth, mode)
+    lexical_future = _retrievers.submit(lexical_search, query, fused_depth, filters)
+    if matches is None:
+        matches = dense_search(query, fused_depth, filters) if mode == "hybrid" else []
+    lexical_ids = [doc_id for doc_id, _ in lexical_future.result()]
+    dense_by_id = {m["id"]: m for m in matches}
+    if mode == "hybrid":
+        return reciprocal_rank_fusion([[m["id"] for m in matches], lexical_ids])[:depth], dense_by_id
+    return lexical_ids, dense_by_id
+
+def _search_depth(top_k, mode, rerank):
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode {mode!r}; expected one of {SEARCH_MODES}")
+    return max(top_k, RERANK_CANDIDATES) if rerank else top_k
+
+def _papers(query, ranked, dense_by_id, top_k, rerank):
+    records = {}
+    for vector_id in ranked:
+        record = _match_record(vector_id, dense_by_id)
+        if record is not None:
+            records[vector_id] = record
+    ranked = [vid for vid in ranked if vid in records]
+    if rerank and ranked:
+        order = get_reranker().rerank(query, [(vid, records[vid]["text"]) for vid in ranked])
+        if order is not None:
+            ranked = order
 
     papers = []
     seen_papers = set()
-    for match in result["matches"]:
-        meta = match["metadata"]
-        pid = meta["paper_id"]
+    for vector_id in ranked[:top_k]:
+        record = records[vector_id]
+        pid = record["paper_id"]
         if pid not in seen_papers:
             papers.append({
                 "id": pid,
-                "title": meta["title"],
-                "abstract": meta["text"][:300] + "..."
+                "title": record["title"],
+                "abstract": record["text"]  # whole chunk; the hypothesis prompt packs it by tokens
             })
             seen_papers.add(pid)
-    return papers
\ No newline at end of file
+    return papers
+
+def semantic_search(query, top_k=6, mode="dense", rerank=False, filters=None):
+    """Return one entry per paper for the top_k best chunks.
+
+    mode="hybrid" runs dense and BM25 retrieval in parallel and merges them
+    with reciprocal-rank fusion; "lexical" uses BM25 only. Both fall back to
+    dense retrieval while no BM25 index has been built. With rerank=True the
+    top RERANK_CANDIDATES chunks are re-scored by a cross-encoder, falling back
+    to retrieval order if that exceeds the latency budget. `filters` is a
+    metadata filter (see metadata_filter.build_filter) applied inside each
+    index, so filtered searches still return top_k matching chunks.
+    """
+    depth = _search_depth(top_k, mode, rerank)
+    ranked, dense_by_id = _retrieve(query, depth, mode, filters)
+    return _papers(query, ranked, dense_by_id, top_k, rerank)
+
+def semantic_search_batch(queries, top_k=6, mode="dense", rerank=False, filters=None):
+    """semantic_search for many queries, with their dense retrieval done as one batch."""
+    depth = _search_depth(top_k, mode, rerank)
+    if mode == "lexical":
+        dense = [None] * len(queries)
+    else:
+        dense = dense_search_batch(queries, _dense_depth(depth, mode), filters)
+    results = []
+    for query, matches in zip(queries, dense):
+        ranked, dense_by_id = _retrieve(query, depth, mode, filters, matches)
+        results.append(_papers(query, ranked, dense_by_id, top_k, rerank))
+    return results
+
+def restore_snapshot(root=SNAPSHOT_DIR):
+    """Load the current search snapshot under `root`; False if there is none.
+
+    Vectors and the lexical index are memory-mapped and chunk text stays in the
+    snapshot's segments, so this reads little more than ids and metadata. A
+    warm-up query then builds lazy structures before the first real request.
+    """
+    global index, chunk_texts, lexical_index, projection
+    start = time.perf_counter()
+    opened = open_snapshot(root, encoder_config())
+    if opened is None:
+        return False
+    path, manifest = opened
+    parts = manifest["parts"]
+    if VECTOR_BACKEND == "memory":
+        if "index" not in parts:
+            raise SnapshotMismatch(f"Snapshot {manifest['version']} has no vectors for the in-memory index")
+        from vector_index import InMemoryIndex
+        index = InMemoryIndex.load(os.path.join(path, "index"))
+    lexical_index = BM25Index.load(os.path.join(path, "lexical")) if "lexical" in parts else None
+    chunk_texts = ChunkTextLookup(ChunkStore(os.path.join(path, "chunks"))) if "chunks" in parts else None
+    projection = Projection.load(os.path.join(path, "projection.npz")) if "projection" in parts else None
+    if VECTOR_BACKEND == "memory":
+        index.query(encode_queries(["warm-up"])[0], top_k=1)
+    logger.info("Restored search snapshot %s in %.2fs", manifest["version"], time.perf_counter() - start)
+    return True
+
+def load_search_state():
+    """Startup: restore the current snapshot if configured, else load from the chunk store."""
+    global chunk_texts, lexical_index, projection
+    if SNAPSHOT_DIR and restore_snapshot(SNAPSHOT_DIR):
+        return
+    chunk_texts = load_chunk_texts()
+    lexical_index = load_lexical_index()
+    projection = load_projection()
+
+load_search_state()
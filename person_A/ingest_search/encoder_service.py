@@ -0,0 +1,136 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Response
+from pydantic import BaseModel, Field
+from micro_batcher import ENCODE_MAX_BATCH, MicroBatcher
+from service_metrics import record_cache
+
+logger = logging.getLogger("encoder_service")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "stsb-roberta-large")
+# Shared encoder for multi-worker serving: when set, search processes call it instead of loading the model
+ENCODER_URL = os.getenv("ENCODER_URL", "")
+ENCODER_TIMEOUT = float(os.getenv("ENCODER_TIMEOUT", "30"))
+ENCODER_CACHE_SIZE = int(os.getenv("ENCODER_CACHE_SIZE", "10000"))  # embeddings kept by text, shared by all callers
+SHAPE_HEADER = "X-Embedding-Shape"
+
+
+class RemoteEncoder:
+    """SentenceTransformer stand-in that encodes on the shared encoder service.
+
+    Every backend worker talks to one process holding the weights, so adding
+    workers adds no model memory. Embeddings come back as raw float32 bytes.
+    """
+
+    def __init__(self, url=ENCODER_URL, model_name=EMBEDDING_MODEL, timeout=ENCODER_TIMEOUT):
+        import httpx
+
+        self.url = url.rstrip("/")
+        self.model_name = model_name
+        self._client = httpx.Client(timeout=timeout)
+        self._dims = None
+
+    def get_sentence_embedding_dimension(self):
+        if self._dims is None:
+            r = self._client.get(self.url + "/info")
+            r.raise_for_status()
+            info = r.json()
+            if info["model"] != self.model_name:
+                raise RuntimeError(f"Encoder service at {self.url} serves {info['model']}, expected {self.model_name}")
+            self._dims = info["dimension"]
+        return self._dims
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        r = self._client.post(self.url + "/encode", json={"texts": texts, "batch_size": batch_size})
+        r.raise_for_status()
+        rows, dims = (int(n) for n in r.headers[SHAPE_HEADER].split(","))
+        embs = np.frombuffer(bytearray(r.content), dtype=np.float32).reshape(rows, dims)
+        return embs[0] if single else embs
+
+
+class EncodeRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=4096)
+    batch_size: int = Field(32, ge=1, le=512)
+
+
+_model = None
+_model_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_batcher = None
+
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL)
+    return _model
+
+
+def _forward(texts, batch_size=32):
+    """One forward pass; concurrent small requests from all workers are coalesced first."""
+    global _batcher
+    if ENCODE_MAX_BATCH <= 1 or len(texts) >= ENCODE_MAX_BATCH:
+        return get_model().encode(texts, batch_size=batch_size)
+    if _batcher is None:
+        with _model_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(lambda batch: get_model().encode(batch, batch_size=ENCODE_MAX_BATCH))
+    return _batcher.encode(texts)
+
+
+def encode(texts, batch_size=32):
+    """Embeddings for `texts` as float32 rows; cached texts skip the forward pass."""
+    with _cache_lock:
+        cached = [_cache.get(t) for t in texts]
+        for t, emb in zip(texts, cached):
+            if emb is not None:
+                _cache.move_to_end(t)
+    for emb in cached:
+        record_cache("encoder", emb is not None)
+    missing = list(dict.fromkeys(t for t, emb in zip(texts, cached) if emb is None))
+    if missing:
+        fresh = dict(zip(missing, np.asarray(_forward(missing, batch_size), dtype=np.float32)))
+        cached = [fresh[t] if emb is None else emb for t, emb in zip(texts, cached)]
+        if ENCODER_CACHE_SIZE:
+            with _cache_lock:
+                _cache.update(fresh)
+                while len(_cache) > ENCODER_CACHE_SIZE:
+                    _cache.popitem(last=False)
+    if not cached:
+        return np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.stack(cached)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    get_model()  # load the weights once, before the first request
+    logger.info("Encoder %s ready", EMBEDDING_MODEL)
+    yield
+
+
+app = FastAPI(title="Encoder Service", lifespan=lifespan)
+
+
+@app.get("/info")
+def info():
+    return {"model": EMBEDDING_MODEL, "dimension": get_model().get_sentence_embedding_dimension()}
+
+
+@app.post("/encode")
+def encode_texts(request: EncodeRequest):
+    """float32 embeddings, row-major, with their shape in the X-Embedding-Shape header."""
+    embs = encode(request.texts, request.batch_size)
+    return Response(content=embs.tobytes(), media_type="application/octet-stream",
+                    headers={SHAPE_HEADER: f"{embs.shape[0]},{embs.shape[1]}"})
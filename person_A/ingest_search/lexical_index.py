@@ -0,0 +1,142 @@
+import os
+import re
+import json
+import math
+from collections import defaultdict
+import numpy as np
+from metadata_filter import FILTER_FIELDS, BitmapFilter
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Keeps biomedical identifiers like "apoe-e4", "5xfad", "cd68", "aβ" whole
+TOKEN = re.compile(r"[a-z0-9Ͱ-Ͽ]+(?:[-/][a-z0-9Ͱ-Ͽ]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or that the their this to was were "
+    "which with we our these those than then also can may not".split()
+)
+
+
+def tokenize(text):
+    """Lowercased terms; hyphenated identifiers are indexed whole and by their parts."""
+    terms = []
+    for tok in TOKEN.findall(text.lower()):
+        if tok in STOPWORDS:
+            continue
+        terms.append(tok)
+        if "-" in tok or "/" in tok:
+            parts = [p for p in re.split(r"[-/]", tok) if p and p not in STOPWORDS]
+            terms.extend(parts)
+            terms.append("".join(parts))
+    return terms
+
+
+class BM25Builder:
+    def __init__(self):
+        self.doc_ids = []
+        self.doc_lens = []
+        self.fields = {field: [] for field in FILTER_FIELDS}
+        self._postings = defaultdict(list)
+
+    def add(self, doc_id, text, fields=None):
+        """Index `text` under `doc_id`; `fields` holds its filterable paper metadata."""
+        doc = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        for field, values in self.fields.items():
+            values.append((fields or {}).get(field))
+        counts = defaultdict(int)
+        for term in tokenize(text):
+            counts[term] += 1
+        self.doc_lens.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self._postings[term].append((doc, tf))
+
+    def build(self):
+        vocab = sorted(self._postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for i, term in enumerate(vocab):
+            offsets[i + 1] = offsets[i] + len(self._postings[term])
+        docs = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for i, term in enumerate(vocab):
+            plist = self._postings[term]
+            docs[offsets[i]:offsets[i + 1]] = [d for d, _ in plist]
+            tfs[offsets[i]:offsets[i + 1]] = [min(tf, 65535) for _, tf in plist]
+        return BM25Index(vocab, offsets, docs, tfs, np.asarray(self.doc_lens, dtype=np.int32), self.doc_ids, self.fields)
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR-style inverted index.
+
+    Postings for term i are docs[offsets[i]:offsets[i+1]] (int32) with term
+    frequencies in the parallel uint16 `tfs` array, so memory is ~6 bytes per
+    posting and the arrays can be memory-mapped from disk. A metadata `filter`
+    is turned into a document bitmap that drops postings before they are
+    scored.
+    """
+
+    def __init__(self, vocab, offsets, docs, tfs, doc_lens, doc_ids, fields=None):
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.doc_ids = doc_ids
+        self.fields = fields or {}
+        self.filter = BitmapFilter(self.fields, len(doc_ids))
+        self.avgdl = float(doc_lens.mean()) if len(doc_lens) else 0.0
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def search(self, query, top_k=10, filter=None):
+        """Return [(doc_id, score)] for the top_k highest-scoring documents matching `filter`."""
+        n = len(self.doc_ids)
+        if not n:
+            return []
+        allowed = self.filter.mask(filter) if filter else None
+        scores = np.zeros(n, dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lens / max(self.avgdl, 1e-9))
+        for term in set(tokenize(query)):
+            i = self.vocab.get(term)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            docs, tfs = self.docs[start:end], self.tfs[start:end].astype(np.float32)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            if allowed is not None:
+                keep = allowed[docs]
+                docs, tfs = docs[keep], tfs[keep]
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.doc_ids[i], float(scores[i])) for i in top]
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        for name in ("offsets", "docs", "tfs", "doc_lens"):
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "terms.json"), "w") as f:
+            json.dump({"vocab": vocab, "doc_ids": self.doc_ids, "fields": self.fields}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+                  for name in ("offsets", "docs", "tfs", "doc_lens")}
+        with open(os.path.join(path, "terms.json")) as f:
+            terms = json.load(f)
+        return cls(terms["vocab"], arrays["offsets"], arrays["docs"], arrays["tfs"], arrays["doc_lens"],
+                   terms["doc_ids"], terms.get("fields"))
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked ID lists: score(id) = sum over lists of 1 / (k + rank)."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
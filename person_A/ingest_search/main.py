@@ -1,16 +1,36 @@
 from fastapi import FastAPI, Query
-from typing import List, Dict
-from embeddings import semantic_search
+from typing import List, Dict, Optional
+from embeddings import semantic_search, semantic_search_batch
+from metadata_filter import build_filter
+from schemas import SearchBatchRequest
 
 app = FastAPI(title="Ingest & Search Service", port=8000)
 
 
 @app.get("/search")
-def search_papers(query: str = Query(...)) -> Dict[str, object]:
+def search_papers(
+    query: str = Query(...),
+    top_k: int = Query(6, ge=1, le=100, description="Number of papers to return"),
+    mode: str = Query("dense", pattern="^(dense|lexical|hybrid)$", description="dense, lexical (BM25) or hybrid (RRF of both)"),
+    rerank: bool = Query(False, description="Re-rank candidates with a cross-encoder within RERANK_BUDGET_MS"),
+    paper_id: Optional[List[int]] = Query(None, description="Only these papers (repeatable)"),
+    year_from: Optional[int] = Query(None, description="Published in or after this year"),
+    year_to: Optional[int] = Query(None, description="Published in or before this year"),
+    journal: Optional[List[str]] = Query(None, description="Only these journals (repeatable)"),
+    study_type: Optional[List[str]] = Query(None, description="e.g. review, perspective, clinical_trial, animal_study, cohort_study")
+) -> Dict[str, object]:
     """Perform semantic search and return both the papers and the original query.
 
     Returning the query lets downstream services (e.g. /generate) accept the
     search output directly without missing required fields.
     """
-    papers = semantic_search(query)
-    return {"papers": papers, "query": query}
\ No newline at end of file
+    filters = build_filter(paper_id, year_from, year_to, journal, study_type)
+    papers = semantic_search(query, top_k=top_k, mode=mode, rerank=rerank, filters=filters)
+    return {"papers": papers, "query": query}
+
+
+@app.post("/search/batch")
+def search_papers_batch(request: SearchBatchRequest) -> Dict[str, object]:
+    """Run many searches with one batched encoder pass; results are in query order."""
+    results = semantic_search_batch(request.queries, request.top_k, request.mode, request.rerank, request.filters())
+    return {"results": [{"query": q, "papers": papers} for q, papers in zip(request.queries, results)]}
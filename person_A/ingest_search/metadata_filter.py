@@ -0,0 +1,120 @@
+import numpy as np
+
+# Paper-level fields that can be filtered on, and whether they are numeric
+FILTER_FIELDS = {"paper_id": True, "year": True, "journal": False, "study_type": False}
+MISSING = np.iinfo(np.int64).min
+
+
+def build_filter(paper_ids=None, year_from=None, year_to=None, journals=None, study_types=None):
+    """Pinecone-style metadata filter for the given predicates, or None if unfiltered."""
+    clauses = {}
+    if paper_ids:
+        clauses["paper_id"] = {"$in": [int(p) for p in paper_ids]}
+    years = {}
+    if year_from is not None:
+        years["$gte"] = int(year_from)
+    if year_to is not None:
+        years["$lte"] = int(year_to)
+    if years:
+        clauses["year"] = years
+    if journals:
+        clauses["journal"] = {"$in": list(journals)}
+    if study_types:
+        clauses["study_type"] = {"$in": list(study_types)}
+    return clauses or None
+
+
+def paper_fields(row):
+    """The filterable fields of a chunk row, dropping unknown values (Pinecone rejects nulls)."""
+    return {field: row[field] for field in FILTER_FIELDS if row.get(field) is not None}
+
+
+class BitmapFilter:
+    """Evaluates Pinecone-style filters to a boolean row mask over column arrays.
+
+    Numeric fields are int64 columns compared vectorized; string fields are
+    dictionary-encoded so `$eq`/`$in` are integer compares, and the bitmap for
+    each (field, value) is cached. Indexes apply the mask while scoring, so a
+    filtered query never spends its top_k on rows that would be dropped.
+    Supports `$eq $ne $in $nin $gt $gte $lt $lte` and `$and`/`$or`.
+    """
+
+    def __init__(self, columns, size):
+        self.size = size
+        self._numeric = {}
+        self._codes = {}
+        self._bitmaps = {}
+        for field, numeric in FILTER_FIELDS.items():
+            values = columns.get(field) or [None] * size
+            if numeric:
+                self._numeric[field] = np.array([MISSING if v is None else v for v in values], dtype=np.int64)
+            else:
+                vocab = {}
+                codes = np.array([-1 if v is None else vocab.setdefault(v, len(vocab)) for v in values], dtype=np.int32)
+                self._codes[field] = (vocab, codes)
+
+    @classmethod
+    def from_rows(cls, rows):
+        return cls({field: [r.get(field) for r in rows] for field in FILTER_FIELDS}, len(rows))
+
+    def _bitmap(self, field, value):
+        key = (field, value)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            if field in self._numeric:
+                bitmap = self._numeric[field] == value
+            else:
+                vocab, codes = self._codes[field]
+                code = vocab.get(value)
+                bitmap = codes == code if code is not None else np.zeros(self.size, dtype=bool)
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def _any_of(self, field, values):
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            mask |= self._bitmap(field, value)
+        return mask
+
+    def _predicate(self, field, op, operand):
+        if op == "$eq":
+            return self._bitmap(field, operand)
+        if op == "$ne":
+            return ~self._bitmap(field, operand)
+        if op == "$in":
+            return self._any_of(field, operand)
+        if op == "$nin":
+            return ~self._any_of(field, operand)
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if field not in self._numeric:
+                raise ValueError(f"Range operator {op} needs a numeric field, got {field!r}")
+            column = self._numeric[field]
+            present = column != MISSING
+            if op == "$gt":
+                return present & (column > operand)
+            if op == "$gte":
+                return present & (column >= operand)
+            if op == "$lt":
+                return present & (column < operand)
+            return present & (column <= operand)
+        raise ValueError(f"Unsupported filter operator {op!r}")
+
+    def mask(self, flt):
+        """Boolean array with True for rows matching `flt` (all True if empty)."""
+        mask = np.ones(self.size, dtype=bool)
+        for key, condition in (flt or {}).items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self.mask(sub)
+            elif key == "$or":
+                any_mask = np.zeros(self.size, dtype=bool)
+                for sub in condition:
+                    any_mask |= self.mask(sub)
+                mask &= any_mask
+            elif key in FILTER_FIELDS:
+                ops = condition if isinstance(condition, dict) else {"$eq": condition}
+                for op, operand in ops.items():
+                    mask &= self._predicate(key, op, operand)
+            else:
+                raise ValueError(f"Unknown filter field {key!r}; expected one of {tuple(FILTER_FIELDS)}")
+        return mask
@@ -0,0 +1,62 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from service_metrics import ENCODE_BATCH
+
+ENCODE_MAX_BATCH = int(os.getenv("ENCODE_MAX_BATCH", "32"))  # texts per coalesced forward pass (1 disables batching)
+ENCODE_MAX_WAIT_MS = float(os.getenv("ENCODE_MAX_WAIT_MS", "2"))  # how long a batch waits to fill
+
+
+class MicroBatcher:
+    """Coalesces concurrent `encode(texts)` calls into batched forward passes.
+
+    Callers block on a future while one worker thread takes the first waiting
+    request, collects more for up to `max_wait_ms` or until `max_batch` texts,
+    runs `encode_fn` once on all of them and hands each caller its rows. While
+    a pass is running new requests queue up, so under load batches fill without
+    waiting; a lone request pays at most `max_wait_ms` extra.
+    """
+
+    def __init__(self, encode_fn, max_batch=ENCODE_MAX_BATCH, max_wait_ms=ENCODE_MAX_WAIT_MS, name="encode"):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def encode(self, texts):
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            ENCODE_BATCH.observe(len(texts))
+            try:
+                embs = self.encode_fn(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for item_texts, future in batch:
+                future.set_result(embs[start:start + len(item_texts)])
+                start += len(item_texts)
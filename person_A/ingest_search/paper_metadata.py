@@ -0,0 +1,80 @@
+import re
+import datetime
+
+HEAD_CHARS = 3000  # front matter searched for metadata
+
+YEAR = r"((?:19|20)\d{2})"
+YEAR_CUES = [
+    re.compile(r"(?:©|\(c\)|copyright)\s*" + YEAR, re.I),
+    re.compile(r"(?:published|accepted)(?:\s+online)?:?\s*(?:\d{1,2}\s+)?(?:[A-Z][a-z]+\s+)?(?:\d{1,2},?\s*)?" + YEAR, re.I),
+    re.compile(r"\b(?:vol(?:ume)?\.?\s*\d+\W+(?:no\.?\s*\d+\W+)?)(?:[A-Z][a-z]+\s+)?" + YEAR, re.I),
+    re.compile(r"\(" + YEAR + r"\)\s*\d+\s*\(\d+\)"),  # "(2015) 5(3)" citation line
+    re.compile(r"received:?\s*(?:\d{1,2}\s+)?(?:[A-Z][a-z]+\s+)?(?:\d{1,2},?\s*)?" + YEAR, re.I),
+]
+JOURNAL_CUES = [
+    # "Nature Reviews Neurology | Volume 19", "NEURAL REGENERATION RESEARCH | Vol 18"
+    re.compile(r"^\W*(?:\d+\s+)?([A-Za-z][A-Za-z&.()' ]{3,60}?)\s*[|｜,]\s*Vol(?:ume)?\.?\s*\d+"),
+    # "Clin. Invest. (Lond.) (2015) 5(3)"
+    re.compile(r"^\W*(?:\d+\s+)?([A-Za-z][A-Za-z&.()' ]{3,60}?)\s*\((?:19|20)\d{2}\)\s*\d+\s*\(\d+\)"),
+]
+# Article-type labels printed in the front matter, most specific first
+ARTICLE_TYPES = [
+    ("meta_analysis", re.compile(r"\bmeta-analys[ie]s\b", re.I)),
+    ("systematic_review", re.compile(r"\bsystematic review\b", re.I)),
+    ("perspective", re.compile(r"\b(?:perspective|commentary|opinion)", re.I)),
+    ("review", re.compile(r"\breview(?: article)?\b", re.I)),
+]
+# Otherwise the design is inferred from how often these terms appear
+STUDY_DESIGNS = [
+    ("clinical_trial", re.compile(r"\brandomi[sz]ed\b|\bplacebo\b|\bphase (?:i{1,3}|[123])\b|\bclinical trial\b", re.I)),
+    ("animal_study", re.compile(r"\b(?:mice|mouse|murine|rats?|transgenic)\b", re.I)),
+    ("cohort_study", re.compile(r"\b(?:cohort|participants|longitudinal|cross-sectional)\b", re.I)),
+]
+LABEL_CHARS = 400
+
+
+def _year(head, info):
+    created = str((info or {}).get("/CreationDate") or "")
+    match = re.match(r"D:" + YEAR, created)
+    if match:
+        return int(match.group(1))
+    latest = datetime.date.today().year + 1
+    for cue in YEAR_CUES:
+        for match in cue.finditer(head):
+            year = int(match.group(1))
+            if 1900 <= year <= latest:
+                return year
+    return None
+
+
+def _journal(head, info):
+    subject = str((info or {}).get("/Subject") or "").strip()
+    if subject and len(subject.split(",")[0]) <= 80:
+        return subject.split(",")[0].strip()
+    for cue in JOURNAL_CUES:
+        match = cue.search(head)
+        if match:
+            name = " ".join(match.group(1).split())
+            return name.title() if name.isupper() else name
+    return None
+
+
+def _study_type(head):
+    label = head[:LABEL_CHARS]
+    for study_type, pattern in ARTICLE_TYPES:
+        if pattern.search(label):
+            return study_type
+    counts = {study_type: len(pattern.findall(head)) for study_type, pattern in STUDY_DESIGNS}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else None
+
+
+def extract_paper_metadata(text, info=None):
+    """Best-effort year, journal and study type from a paper's front matter.
+
+    `text` is the first page (or first chunks) of the paper and `info` the PDF
+    document-info dict, which takes precedence when it carries a date/subject.
+    Fields that can't be determined are None.
+    """
+    head = " ".join(text[:HEAD_CHARS].split())
+    return {"year": _year(head, info), "journal": _journal(head, info), "study_type": _study_type(head)}
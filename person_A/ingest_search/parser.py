@@ -1,30 +1,131 @@
 import os
-import json
+import re
+import itertools
+from functools import lru_cache
 from PyPDF2 import PdfReader
+from chunk_store import ChunkStore
+from paper_metadata import extract_paper_metadata
 
-CHUNK_SIZE = 500  # words
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "stsb-roberta-large")
+# stsb-roberta-large encodes at most 128 tokens (its max_seq_length); anything
+# past the budget would be truncated at encode time, so chunks are cut to fit
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "128"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "32"))  # tokens repeated from the previous chunk
 
-def extract_text_from_pdf(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = ""
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+HEADING = re.compile(r"^(\d+(\.\d+)*\.?\s+[A-Z][^.]{0,80}|[A-Z][A-Z \-]{2,60}|Abstract|Introduction|Methods|Results|Discussion|Conclusions?|References)$")
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer(model_name=EMBEDDING_MODEL):
+    from transformers import AutoTokenizer
+    name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(name)
+
+
+def iter_pages(pdf):
+    """Yield the text of each page without holding the whole document in memory."""
+    reader = pdf if isinstance(pdf, PdfReader) else PdfReader(pdf)
     for page in reader.pages:
-        text += page.extract_text() + " "
-    return text
+        yield page.extract_text() or ""
+
+
+def extract_text_from_pdf(pdf_path):
+    return " ".join(iter_pages(pdf_path)) + " "
+
+
+def split_units(text):
+    """Split page text into (unit, is_heading) pairs: headings and sentences,
+    the only places a chunk boundary may fall."""
+    buffer = []
+
+    def sentences():
+        joined = " ".join(" ".join(buffer).split())
+        buffer.clear()
+        return [s for s in SENTENCE_END.split(joined) if s]
+
+    for line in text.split("\n"):
+        stripped = " ".join(line.split())
+        if stripped and HEADING.match(stripped):
+            for sentence in sentences():
+                yield sentence, False
+            yield stripped, True
+        else:
+            buffer.append(line)
+    for sentence in sentences():
+        yield sentence, False
+
+
+def chunk_pages(pages, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP, tokenizer=None):
+    """Stream token-budgeted chunks from an iterable of page texts.
+
+    Chunks end on sentence boundaries and start a new chunk at section headings
+    once the current one is half full. The last `overlap` tokens' worth of
+    sentences are repeated at the start of the next chunk. A sentence longer
+    than the budget is split into token windows.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    budget = max_tokens - tokenizer.num_special_tokens_to_add()
+    overlap = min(overlap, budget // 2)
+    current, size = [], 0
+
+    def count(text):
+        return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def carry_over(units):
+        kept, total = [], 0
+        for text, n in reversed(units):
+            if total + n > overlap:
+                break
+            kept.insert(0, (text, n))
+            total += n
+        return kept, total
+
+    for page in pages:
+        for text, is_heading in split_units(page):
+            n = count(text)
+            if n > budget:
+                if current:
+                    yield " ".join(t for t, _ in current)
+                    current, size = [], 0
+                ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+                step = budget - overlap
+                for start in range(0, len(ids), step):
+                    yield tokenizer.decode(ids[start:start + budget])
+                    if start + budget >= len(ids):
+                        break
+                continue
+            if current and (size + n > budget or (is_heading and size >= budget // 2)):
+                yield " ".join(t for t, _ in current)
+                current, size = carry_over(current) if not is_heading else ([], 0)
+                while current and size + n > budget:  # the overlap must not push this unit past the budget
+                    size -= current.pop(0)[1]
+            current.append((text, n))
+            size += n
+    if current:
+        yield " ".join(t for t, _ in current)
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    return list(chunk_pages([text], max_tokens, overlap))
 
-def chunk_text(text, chunk_size=CHUNK_SIZE):
-    words = text.split()
-    chunks = []
-    for i in range(0, len(words), chunk_size):
-        chunks.append(" ".join(words[i:i+chunk_size]))
-    return chunks
 
 def preprocess_pdfs(pdf_dir, output_dir):
-    os.makedirs(output_dir, exist_ok=True)
+    """Chunk every PDF in pdf_dir into the columnar chunk store at output_dir,
+    tagging each paper with the year, journal and study type found on its first page.
+
+    A full ingest replaces the store's previous segments once the new ones are
+    written, so re-running it yields the same chunks and IDs instead of duplicates.
+    """
     paper_id = 0
-    for pdf_file in os.listdir(pdf_dir):
-        if pdf_file.endswith(".pdf"):
-            text = extract_text_from_pdf(os.path.join(pdf_dir, pdf_file))
-            chunks = chunk_text(text)
-            with open(os.path.join(output_dir, f"{pdf_file}.json"), "w") as f:
-                json.dump({"id": paper_id, "title": pdf_file, "chunks": chunks}, f)
-            paper_id += 1
\ No newline at end of file
+    with ChunkStore(output_dir) as store:
+        previous = store.segments()
+        for pdf_file in sorted(os.listdir(pdf_dir)):
+            if pdf_file.endswith(".pdf"):
+                reader = PdfReader(os.path.join(pdf_dir, pdf_file))
+                pages = iter_pages(reader)
+                first = next(pages, "")
+                metadata = extract_paper_metadata(first, reader.metadata)
+                store.append(paper_id, pdf_file, chunk_pages(itertools.chain([first], pages)), metadata)
+                paper_id += 1
+    store.drop(previous)
@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+PROJECTION_METHODS = ("pca", "truncate")
+
+
+class Projection:
+    """Linear map from encoder embeddings to `dims` dimensions: x @ components.
+
+    "pca" keeps the top principal axes of the corpus embeddings. They are fitted
+    uncentred: the leading eigenvectors of X^T X best preserve the raw inner
+    products, and so the cosine rankings, which mean-centring would distort.
+    "truncate" keeps the first `dims` coordinates, for Matryoshka-trained
+    encoders whose leading dimensions are meaningful on their own. The same
+    projection must be applied at ingest and query time, so it is saved next
+    to the index it was used to build and identified by `version`.
+    """
+
+    def __init__(self, components, method, model_name):
+        self.components = np.asarray(components, dtype=np.float32)
+        self.method = method
+        self.model_name = model_name
+
+    @property
+    def input_dims(self):
+        return self.components.shape[0]
+
+    @property
+    def dims(self):
+        return self.components.shape[1]
+
+    @property
+    def version(self):
+        digest = hashlib.sha256(self.components.tobytes())
+        digest.update(f"{self.method}:{self.model_name}".encode())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def fit(cls, matrix, dims, method="pca", model_name=""):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"Unknown projection method {method!r}; expected one of {PROJECTION_METHODS}")
+        if not 0 < dims <= matrix.shape[1]:
+            raise ValueError(f"Cannot project {matrix.shape[1]}-dim embeddings to {dims} dims")
+        if method == "truncate":
+            return cls(np.eye(matrix.shape[1], dims), method, model_name)
+        if len(matrix) < dims:
+            raise ValueError(f"PCA to {dims} dims needs at least {dims} embeddings, got {len(matrix)}")
+        # eigh returns ascending eigenvalues; the d x d Gram matrix keeps memory independent of corpus size
+        _, vectors = np.linalg.eigh(matrix.T.astype(np.float64) @ matrix)
+        return cls(vectors[:, ::-1][:, :dims], method, model_name)
+
+    def apply(self, vectors):
+        return np.asarray(vectors, dtype=np.float32) @ self.components
+
+    def save(self, path):
+        tmp = f"{path}.tmp.npz"
+        meta = json.dumps({"method": self.method, "model_name": self.model_name, "version": self.version})
+        np.savez(tmp, components=self.components, meta=np.array(meta))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            projection = cls(data["components"], meta["method"], meta["model_name"])
+        if projection.version != meta["version"]:
+            raise ValueError(f"Projection at {path} is corrupt (version {projection.version} != {meta['version']})")
+        return projection
@@ -0,0 +1,66 @@
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8")
+SCORE_BLOCK_ROWS = 2048  # rows widened to float32 at a time; small enough to stay in cache
+
+
+class Int8Quantizer:
+    """Per-dimension affine scalar quantization: x ~= code * scale + offset."""
+
+    def __init__(self, low, high):
+        self.offset = ((high + low) / 2).astype(np.float32)
+        self.scale = np.maximum((high - low) / 254, 1e-12).astype(np.float32)
+
+    @classmethod
+    def fit(cls, matrix):
+        return cls(matrix.min(axis=0), matrix.max(axis=0))
+
+    def encode(self, values):
+        return np.clip(np.rint((values - self.offset) / self.scale), -127, 127).astype(np.int8)
+
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale + self.offset
+
+
+class CompactMatrix:
+    """float16 or int8 copy of a float32 matrix for approximate first-pass scoring.
+
+    Scores are computed a block of rows at a time so the float32 working set
+    stays bounded. For int8, q . (c * s + o) is computed as (q * s) . c + q . o,
+    so codes are only widened, never fully decoded.
+    """
+
+    def __init__(self, matrix, precision):
+        if precision not in ("float16", "int8"):
+            raise ValueError(f"Unsupported compact precision {precision!r}")
+        self.precision = precision
+        self.quantizer = None
+        if precision == "float16":
+            self.values = np.asarray(matrix, dtype=np.float16)
+        else:
+            self.quantizer = Int8Quantizer.fit(np.asarray(matrix))
+            self.values = np.empty(matrix.shape, dtype=np.int8)
+            for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+                self.values[start:start + SCORE_BLOCK_ROWS] = self.quantizer.encode(matrix[start:start + SCORE_BLOCK_ROWS])
+
+    @property
+    def nbytes(self):
+        extra = 0 if self.quantizer is None else self.quantizer.scale.nbytes + self.quantizer.offset.nbytes
+        return self.values.nbytes + extra
+
+    def scores(self, queries, rows=None):
+        """Approximate (len(queries), len(rows)) dot products; all rows if `rows` is None."""
+        values = self.values if rows is None else self.values[rows]
+        if self.quantizer is not None:
+            bias = queries @ self.quantizer.offset
+            queries = queries * self.quantizer.scale
+        out = np.empty((len(queries), len(values)), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(values)), values.shape[1]), dtype=np.float32)
+        for start in range(0, len(values), SCORE_BLOCK_ROWS):
+            chunk = values[start:start + SCORE_BLOCK_ROWS]
+            block = buffer[:len(chunk)]
+            np.copyto(block, chunk, casting="unsafe")
+            out[:, start:start + len(block)] = queries @ block.T
+        if self.quantizer is not None:
+            out += bias[:, None]
+        return out
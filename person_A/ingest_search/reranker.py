@@ -0,0 +1,111 @@
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from service_metrics import stage, record_cache
+
+logger = logging.getLogger("reranker")
+
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # top-N chunks scored per query
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "50000"))
+RERANK_CONCURRENCY = int(os.getenv("RERANK_CONCURRENCY", "2"))  # batches scored at once
+
+
+class Reranker:
+    """Cross-encoder re-ranking of retrieved chunks under a latency budget.
+
+    Uncached (query, chunk_id) pairs are scored in one batch on a worker
+    thread. If that takes longer than the budget, `rerank` returns None and the
+    caller keeps its original order; the batch still completes in the
+    background and fills the cache, so a repeated query is re-ranked for free.
+    At most `concurrency` batches run at once. A request that finds them all
+    busy waits for one only within its budget, so stale work never piles up
+    behind the workers. Scoring errors also keep the original order.
+    """
+
+    def __init__(self, model_name=RERANK_MODEL, budget_ms=RERANK_BUDGET_MS, cache_size=RERANK_CACHE_SIZE,
+                 concurrency=RERANK_CONCURRENCY):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rerank")
+        self._slots = threading.Semaphore(concurrency)  # one held per batch scoring
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def _cached(self, query, chunk_id):
+        with self._cache_lock:
+            score = self._cache.get((query, chunk_id))
+            if score is not None:
+                self._cache.move_to_end((query, chunk_id))
+        record_cache("rerank", score is not None)
+        return score
+
+    def _score(self, query, candidates):
+        try:
+            with stage("rerank"):
+                scores = self.model.predict([(query, text) for _, text in candidates])
+        finally:
+            self._slots.release()
+        with self._cache_lock:
+            for (cid, _), score in zip(candidates, scores):
+                self._cache[(query, cid)] = float(score)
+                self._cache.move_to_end((query, cid))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return {cid: float(s) for (cid, _), s in zip(candidates, scores)}
+
+    def rerank(self, query, candidates, budget_ms=None):
+        """Order `candidates` [(chunk_id, text)] by cross-encoder score.
+
+        Returns the re-ordered chunk IDs, or None when the budget ran out or
+        scoring failed.
+        """
+        scores, missing = {}, []
+        for cid, text in candidates:
+            score = self._cached(query, cid)
+            if score is None:
+                missing.append((cid, text))
+            else:
+                scores[cid] = score
+        if missing:
+            budget = (self.budget_ms if budget_ms is None else budget_ms) / 1000
+            deadline = time.monotonic() + budget
+            if not self._slots.acquire(timeout=budget):
+                logger.info("Re-ranker busy for %.0f ms; keeping retrieval order for %d candidates", budget * 1000, len(missing))
+                return None
+            future = self._executor.submit(self._score, query, missing)
+            try:
+                scores.update(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except TimeoutError:
+                logger.info("Re-rank of %d candidates exceeded %.0f ms; keeping retrieval order", len(missing), budget * 1000)
+                return None
+            except Exception:
+                logger.exception("Re-rank of %d candidates failed; keeping retrieval order", len(missing))
+                return None
+        return sorted((cid for cid, _ in candidates), key=lambda cid: scores[cid], reverse=True)
+
+
+_reranker = None
+
+
+def get_reranker():
+    global _reranker
+    if _reranker is None:
+        _reranker = Reranker()
+    return _reranker
@@ -0,0 +1,21 @@
+import os
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from metadata_filter import build_filter
+
+SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "1000"))
+
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=SEARCH_BATCH_MAX)
+    top_k: int = Field(6, ge=1, le=100)
+    mode: str = Field("dense", pattern="^(dense|lexical|hybrid)$")
+    rerank: bool = False
+    paper_id: Optional[List[int]] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    journal: Optional[List[str]] = None
+    study_type: Optional[List[str]] = None
+
+    def filters(self):
+        return build_filter(self.paper_id, self.year_from, self.year_to, self.journal, self.study_type)
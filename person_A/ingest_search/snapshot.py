@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+
+logger = logging.getLogger("snapshot")
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))  # versions kept on disk, newest first
+CURRENT = "CURRENT"
+
+
+class SnapshotMismatch(ValueError):
+    """The snapshot was built with another format or encoder configuration."""
+
+
+def config_hash(config):
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def write_snapshot(root, config, index=None, lexical_index=None, chunk_store=None, projection=None):
+    """Write a new snapshot version under `root` and point CURRENT at it.
+
+    The version is assembled in a hidden temp directory and renamed into place,
+    then CURRENT is swapped with os.replace, so a reader sees either the old
+    version or the complete new one. Chunk-store segments are immutable and are
+    hard-linked rather than copied where the filesystem allows. Returns the
+    version name.
+    """
+    os.makedirs(root, exist_ok=True)
+    digest = config_hash(config)
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{digest[:8]}-{uuid.uuid4().hex[:4]}"
+    tmp = os.path.join(root, f".tmp-{version}")
+    os.makedirs(tmp)
+    try:
+        parts = []
+        if index is not None and hasattr(index, "save"):
+            index.save(os.path.join(tmp, "index"))
+            parts.append("index")
+        if lexical_index is not None:
+            lexical_index.save(os.path.join(tmp, "lexical"))
+            parts.append("lexical")
+        if chunk_store is not None:
+            os.makedirs(os.path.join(tmp, "chunks"))
+            for segment in chunk_store.segments():
+                _link_or_copy(segment, os.path.join(tmp, "chunks", os.path.basename(segment)))
+            parts.append("chunks")
+        if projection is not None:
+            projection.save(os.path.join(tmp, "projection.npz"))
+            parts.append("projection")
+        manifest = {"format": SNAPSHOT_FORMAT, "version": version, "created": time.time(),
+                    "config": config, "config_hash": digest, "parts": parts}
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(tmp, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    pointer = os.path.join(root, f".{CURRENT}.{version}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, CURRENT))
+    _prune(root, keep=SNAPSHOT_KEEP)
+    logger.info("Wrote search snapshot %s (%s)", version, ", ".join(parts))
+    return version
+
+
+def _created(root, version):
+    try:
+        with open(os.path.join(root, version, "manifest.json")) as f:
+            return json.load(f)["created"]
+    except (OSError, ValueError, KeyError):
+        return 0.0
+
+
+def _prune(root, keep):
+    # Names only order by the second, so versions written within one second are ordered by their manifests
+    current = current_version(root)
+    versions = sorted((d for d in os.listdir(root) if not d.startswith(".") and d != CURRENT),
+                      key=lambda d: _created(root, d), reverse=True)
+    for old in versions[keep:]:
+        if old != current:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+def current_version(root):
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def open_snapshot(root, config):
+    """(path, manifest) of the current snapshot, or None if there is none.
+
+    Raises SnapshotMismatch if it was written in another format or for another
+    encoder configuration, rather than serving vectors from a different space.
+    """
+    version = current_version(root)
+    if version is None:
+        return None
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotMismatch(f"Snapshot {version} has format {manifest.get('format')}, expected {SNAPSHOT_FORMAT}")
+    if manifest.get("config_hash") != config_hash(config):
+        raise SnapshotMismatch(f"Snapshot {version} was built for {manifest.get('config')}, running with {config}")
+    return path, manifest
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("upsert_writer")
+
+# Pinecone caps upserts at 1000 vectors and 2 MB per request
+UPSERT_BATCH_VECTORS = int(os.getenv("UPSERT_BATCH_VECTORS", "200"))
+UPSERT_BATCH_BYTES = int(os.getenv("UPSERT_BATCH_BYTES", str(1_500_000)))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "5"))
+
+
+def estimate_size(vector):
+    """Approximate serialized request size of one vector in bytes."""
+    return 12 * len(vector["values"]) + len(vector["id"]) + len(json.dumps(vector.get("metadata", {}))) + 32
+
+
+class UpsertWriter:
+    """Packs vectors into size-bounded batches and upserts them concurrently.
+
+    At most `concurrency` batches are in flight and at most `2 * concurrency`
+    are queued, so callers block instead of buffering the whole corpus. Failed
+    batches are retried with jittered exponential backoff; upserts are keyed by
+    vector ID, so a retried batch overwrites rather than duplicates.
+    """
+
+    def __init__(self, index, max_vectors=UPSERT_BATCH_VECTORS, max_bytes=UPSERT_BATCH_BYTES,
+                 concurrency=UPSERT_CONCURRENCY, max_retries=UPSERT_MAX_RETRIES, backoff=0.5):
+        self.index = index
+        self.max_vectors = max_vectors
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.upserted = 0
+        self.failed_batches = []
+        self._batch, self._batch_bytes = [], 0
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upsert")
+        self._slots = threading.BoundedSemaphore(2 * concurrency)
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def add(self, vector):
+        size = estimate_size(vector)
+        if self._batch and (len(self._batch) >= self.max_vectors or self._batch_bytes + size > self.max_bytes):
+            self._submit()
+        self._batch.append(vector)
+        self._batch_bytes += size
+
+    def add_many(self, vectors):
+        for vector in vectors:
+            self.add(vector)
+
+    def _submit(self):
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        self._slots.acquire()
+        future = self._executor.submit(self._send, batch)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+
+    def _send(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.index.upsert(vectors=batch)
+                with self._lock:
+                    self.upserted += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error("Upsert of %d vectors failed after %d attempts: %s", len(batch), attempt + 1, e)
+                    with self._lock:
+                        self.failed_batches.append(batch)
+                    return
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                logger.warning("Upsert failed (%s); retrying in %.2fs", e, delay)
+                time.sleep(delay)
+
+    def flush(self):
+        """Send any partial batch and wait for all batches; raise if any batch was given up on."""
+        if self._batch:
+            self._submit()
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        if self.failed_batches:
+            count = sum(len(b) for b in self.failed_batches)
+            raise RuntimeError(f"{count} vectors in {len(self.failed_batches)} batches could not be upserted")
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,175 @@
+import os
+import json
+import tempfile
+import threading
+import numpy as np
+from metadata_filter import BitmapFilter
+from quantization import PRECISIONS, CompactMatrix
+
+# float16 halves and int8 quarters the in-memory vectors; first-pass results are rescored exactly
+EMBEDDING_PRECISION = os.getenv("EMBEDDING_PRECISION", "float32")
+RESCORE_FACTOR = int(os.getenv("RESCORE_FACTOR", "4"))  # candidates rescored per requested result
+# Compact scoring widens every row on each query (~10x slower than float32), so smaller indexes skip it
+COMPACT_MIN_BYTES = int(os.getenv("COMPACT_MIN_BYTES", str(256 * 2 ** 20)))
+
+
+def _top_k(scores, k):
+    """Column indices and values of the k largest scores in each row, best first."""
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-values, axis=1)
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+class InMemoryIndex:
+    """Local stand-in for a Pinecone index (upsert/query) backed by a numpy matrix.
+
+    Vectors are L2-normalized on insert so a dot product gives cosine scores,
+    matching the "cosine" metric the Pinecone index is created with. A `filter`
+    (Pinecone syntax) is evaluated to a row bitmap first and only matching rows
+    are scored, so filtering never eats into top_k.
+
+    With precision "float16" or "int8" only a compact copy of the vectors is
+    kept in memory; the float32 vectors are spilled to a memory-mapped temp
+    file. Queries rank on the compact copy, then rescore the best
+    `top_k * rescore_factor` candidates with the float32 vectors. Compact
+    scoring is much slower than a float32 matmul, so while the float32 vectors
+    are under `compact_min_bytes` they are scored directly from the spill file.
+    """
+
+    def __init__(self, dimension, precision=EMBEDDING_PRECISION, rescore_factor=RESCORE_FACTOR,
+                 compact_min_bytes=COMPACT_MIN_BYTES):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}; expected one of {PRECISIONS}")
+        self.dimension = dimension
+        self.precision = precision
+        self.rescore_factor = max(1, rescore_factor)
+        self.compact_min_bytes = compact_min_bytes
+        self._ids = []
+        self._pos = {}
+        self._metadata = []
+        self._matrix = np.zeros((0, dimension), dtype=np.float32)
+        self._spill = tempfile.TemporaryFile(prefix="vector-index-") if precision != "float32" else None
+        self._compact = None  # CompactMatrix over _matrix, rebuilt after upserts
+        self._filter = None  # BitmapFilter over _metadata, rebuilt after upserts
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(values):
+        arr = np.asarray(values, dtype=np.float32)
+        norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+        return arr / np.maximum(norms, 1e-12)
+
+    def _store_rows(self, positions, rows):
+        n = len(self._ids)
+        if self._spill is not None:
+            fd = self._spill.fileno()
+            for pos, row in zip(positions, rows):
+                os.pwrite(fd, row.tobytes(), int(pos) * row.nbytes)
+            self._matrix = np.memmap(self._spill, dtype=np.float32, mode="r", shape=(n, self.dimension))
+            return
+        if n > len(self._matrix):
+            grown = np.zeros((n, self.dimension), dtype=np.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+        self._matrix[positions] = rows
+
+    def upsert(self, vectors, **kwargs):
+        if not vectors:
+            return {"upserted_count": 0}
+        rows = self._normalize([v["values"] for v in vectors])
+        with self._lock:
+            positions = []
+            for vec in vectors:
+                vid = vec["id"]
+                pos = self._pos.get(vid)
+                if pos is None:
+                    pos = self._pos[vid] = len(self._ids)
+                    self._ids.append(vid)
+                    self._metadata.append(vec.get("metadata", {}))
+                else:
+                    self._metadata[pos] = vec.get("metadata", {})
+                positions.append(pos)
+            self._store_rows(np.asarray(positions), rows)
+            self._filter = None
+            self._compact = None
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k=10, include_metadata=False, filter=None, **kwargs):
+        return self.query_batch([vector], top_k, include_metadata, filter)[0]
+
+    def query_batch(self, vectors, top_k=10, include_metadata=False, filter=None, block=256):
+        """Top-k for many query vectors with one matrix multiply per `block` queries."""
+        with self._lock:
+            matrix, ids, metadata = self._matrix, self._ids, self._metadata
+            if filter and self._filter is None:
+                self._filter = BitmapFilter.from_rows(metadata)
+            if self._spill is not None and self._compact is None and len(matrix) and matrix.nbytes >= self.compact_min_bytes:
+                self._compact = CompactMatrix(matrix, self.precision)
+            bitmaps, compact = self._filter, self._compact
+        queries = self._normalize(vectors).reshape(-1, self.dimension)
+        rows = np.flatnonzero(bitmaps.mask(filter)) if filter else np.arange(len(matrix))
+        k = min(top_k, len(rows))
+        if k == 0:
+            return [{"matches": []} for _ in queries]
+        candidates_matrix = (matrix[rows] if filter else matrix) if compact is None else None
+        results = []
+        for start in range(0, len(queries), block):
+            batch = queries[start:start + block]
+            if compact is None:
+                top, scores = _top_k(batch @ candidates_matrix.T, k)
+            else:
+                approx = compact.scores(batch, rows if filter else None)
+                candidates, _ = _top_k(approx, min(k * self.rescore_factor, len(rows)))
+                exact = np.einsum("bd,bcd->bc", batch, matrix[rows[candidates]])
+                order, scores = _top_k(exact, k)
+                top = np.take_along_axis(candidates, order, axis=1)
+            for row_top, row_scores in zip(top, scores):
+                matches = []
+                for j, score in zip(row_top, row_scores):
+                    i = rows[j]
+                    match = {"id": ids[i], "score": float(score)}
+                    if include_metadata:
+                        match["metadata"] = metadata[i]
+                    matches.append(match)
+                results.append({"matches": matches})
+        return results
+
+    def save(self, path):
+        """Write vectors (vectors.npy) and ids/metadata (index.json) under `path`."""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            matrix, ids, metadata = self._matrix, list(self._ids), list(self._metadata)
+        np.save(os.path.join(path, "vectors.npy"), np.asarray(matrix[:len(ids)]))
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump({"ids": ids, "metadata": metadata}, f)
+
+    @classmethod
+    def load(cls, path, precision=EMBEDDING_PRECISION, rescore_factor=RESCORE_FACTOR, compact_min_bytes=COMPACT_MIN_BYTES):
+        """Index saved by `save`. float32 vectors are memory-mapped copy-on-write, so
+        startup reads no vector data and later upserts never touch the file."""
+        matrix = np.load(os.path.join(path, "vectors.npy"), mmap_mode="c")
+        with open(os.path.join(path, "index.json")) as f:
+            saved = json.load(f)
+        index = cls(matrix.shape[1], precision, rescore_factor, compact_min_bytes)
+        index._ids = saved["ids"]
+        index._metadata = saved["metadata"]
+        index._pos = {vid: i for i, vid in enumerate(index._ids)}
+        if index._spill is None:
+            index._matrix = matrix
+        elif len(matrix):
+            for start in range(0, len(matrix), 65536):
+                index._spill.write(np.ascontiguousarray(matrix[start:start + 65536]).tobytes())
+            index._spill.flush()
+            index._matrix = np.memmap(index._spill, dtype=np.float32, mode="r", shape=matrix.shape)
+        return index
+
+    def describe_index_stats(self):
+        with self._lock:
+            matrix, compact = self._matrix, self._compact
+        if compact is not None:
+            resident = compact.nbytes
+        else:
+            resident = matrix.nbytes if self._spill is None or matrix.nbytes < self.compact_min_bytes else 0
+        return {"dimension": self.dimension, "total_vector_count": len(self._ids),
+                "precision": self.precision, "vector_bytes_in_memory": resident}
@@ -0,0 +1,83 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+try:
+    from design_schema import parse_design
+    from exp_llama3_api import call_llama3_for_experiment
+except ImportError:  # imported as a package by the backend
+    from person_B.experiment_design.design_schema import parse_design
+    from person_B.experiment_design.exp_llama3_api import call_llama3_for_experiment
+
+logger = logging.getLogger("experiment_design")
+
+
+def design_experiment(v: Dict, call_llm: Optional[Callable[[str], str]] = None, passthrough=()) -> Dict:
+    """Experiment plan for a validated hypothesis: the LLM's, or a rule-based template.
+
+    `v` has the HypothesisIn fields. `call_llm` replaces call_llama3_for_experiment
+    (the backend wraps it with coalescing and concurrency limits); exceptions of
+    the `passthrough` types propagate instead of falling back to the template.
+    """
+    hypothesis = v["hypothesis"]
+    rules = v.get("rules") or []
+    exp_json = None
+    try:
+        hypothesis_text = f"{hypothesis}\nRules: {', '.join(rules)}\nClassification: {v.get('classification', '')}\nFurther Data: {v.get('further_data', '')}"
+        text = (call_llm or call_llama3_for_experiment)(hypothesis_text)
+        exp_json = parse_design(text)
+        if exp_json is None:
+            logger.warning("LLM design reply did not match the schema; using fallback template.")
+    except passthrough:
+        raise
+    except Exception as e:
+        logger.warning("LLaMA call failed or not available; using fallback template. Error: %s", e)
+    return exp_json if exp_json is not None else template_design(hypothesis, rules)
+
+
+def template_design(hypothesis: str, rules: List[str]) -> Dict:
+    outcome_measures = []
+    if "plaque" in hypothesis.lower() or "amyloid" in hypothesis.lower():
+        outcome_measures.append("Amyloid plaque staining (IHC)")
+    if "cogn" in hypothesis.lower() or "memory" in hypothesis.lower():
+        outcome_measures.append("Behavioral tests (Morris water maze)")
+    if "microglia" in hypothesis.lower():
+        outcome_measures.append("Microglial activation markers (Iba1, CD68)")
+    # Use dynamic rules to refine outcome measures
+    for rule in rules:
+        if "inflammation" in rule.lower():
+            outcome_measures.append("Inflammation markers (e.g., IL-6, TNF-alpha)")
+        if "phagocytosis" in rule.lower():
+            outcome_measures.append("Phagocytic activity assay")
+    if not outcome_measures:
+        outcome_measures = ["General histology", "Behavioral assays"]
+    return {
+        "model": "5xFAD transgenic mice",
+        "groups": ["Control (vehicle)", "Treatment A", "Treatment B", "Combination"],
+        "n_per_group": 12,
+        "duration_weeks": 12,
+        "treatment_route": "intraperitoneal injection",
+        "outcome_measures": outcome_measures,
+        "expected_result": f"Treatment groups will show improvement in {', '.join(outcome_measures)} compared to control.",
+        "latex": generate_latex(hypothesis, outcome_measures)
+    }
+
+
+def generate_latex(hypothesis, outcome_measures):
+    om = "\\\\ \n".join(outcome_measures)
+    latex = f"""
+\\section*{{Experiment Design}}
+\\textbf{{Hypothesis:}} {hypothesis}
+\\subsection*{{Model}}
+5xFAD transgenic mice
+\\subsection*{{Groups}}
+Control (vehicle), Treatment A, Treatment B, Combination
+\\subsection*{{Sample Size}}
+12 per group
+\\subsection*{{Duration}}
+12 weeks
+\\subsection*{{Outcome Measures}}
+{om}
+\\subsection*{{Expected Result}}
+Treatment groups will show improvement in outcome measures compared to control.
+"""
+    return latex
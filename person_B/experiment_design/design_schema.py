@@ -0,0 +1,40 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+
+class ExperimentDesign(BaseModel):
+    """The experiment plan the LLM is asked for; same keys as the fallback template."""
+    model_config = ConfigDict(extra="forbid")
+
+    model: str
+    groups: List[str]
+    n_per_group: int
+    duration_weeks: int
+    treatment_route: str
+    outcome_measures: List[str]
+    expected_result: str
+    latex: str
+
+
+# OpenAI-style structured output: the provider constrains decoding to this schema
+DESIGN_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "experiment_design", "strict": True, "schema": ExperimentDesign.model_json_schema()},
+}
+
+
+class _LenientDesign(ExperimentDesign):
+    """ExperimentDesign that drops unknown keys: without structured output the LLM may add its own."""
+    model_config = ConfigDict(extra="ignore")
+
+
+def parse_design(text: str) -> Optional[Dict]:
+    """Validate an LLM reply against ExperimentDesign in one pass; None if it doesn't conform.
+
+    Extra keys are dropped rather than rejected, so an otherwise complete plan
+    from a server without structured output isn't replaced by the template.
+    """
+    try:
+        return _LenientDesign.model_validate_json(text).model_dump()
+    except ValidationError:
+        return None
@@ -1,9 +1,17 @@
 import os
 from cerebras.cloud.sdk import Cerebras
 from dotenv import load_dotenv
+try:
+    from design_schema import DESIGN_RESPONSE_FORMAT
+except ImportError:  # imported as a package by the backend
+    from person_B.experiment_design.design_schema import DESIGN_RESPONSE_FORMAT
+from service_metrics import stage
 
 load_dotenv()
 
+# Send the JSON schema as response_format so replies are schema-valid; set to 0 for servers without it
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "1") == "1"
+
 def call_llama3_for_experiment(hypothesis_text: str) -> str:
     """
     Use Cerebras SDK to call LLaMA 3.1 8B and generate an experiment plan as JSON text.
@@ -12,7 +20,8 @@ def call_llama3_for_experiment(hypothesis_text: str) -> str:
     if not api_key:
         raise RuntimeError("CEREBRAS_API_KEY environment variable is not set")
 
-    client = Cerebras(api_key=api_key)
+    base_url = os.getenv("CEREBRAS_BASE_URL")
+    client = Cerebras(api_key=api_key, base_url=base_url) if base_url else Cerebras(api_key=api_key)
 
     prompt = f"""
 You are an expert preclinical neuroscientist. Convert this validated hypothesis and associated metadata into a structured experiment plan.
@@ -25,11 +34,14 @@ model, groups, n_per_group, duration_weeks, treatment_route, outcome_measures, e
 Use the provided rules, classification, and further data to refine outcome measures and expected results.
 """
 
-    response = client.chat.completions.create(
-        model="llama3.1-8b",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=600
-    )
+    extra = {"response_format": DESIGN_RESPONSE_FORMAT} if LLM_STRUCTURED_OUTPUT else {}
+    with stage("llm_design"):
+        response = client.chat.completions.create(
+            model="llama3.1-8b",
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=600,
+            **extra
+        )
 
     try:
         generated = response.choices[0].message.content
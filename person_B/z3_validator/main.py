@@ -1,10 +1,12 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from rules import z3_validate
+from validation import validate_hypothesis
 import time
 import uuid
 import logging
+import os
+from collections import deque
 
 app = FastAPI(title="Z3 Validator Service (Person B)")
 
@@ -30,25 +32,14 @@ class ValidationOut(BaseModel):
     further_data: Optional[str] = ""
     validation_result: Dict
 
-validation_logs = []
+# Bounded so long-running services keep flat memory; the backend persists logs to SQLite
+validation_logs = deque(maxlen=int(os.getenv("LOG_MEMORY_SIZE", "1000")))
 
 @app.post("/validate", response_model=ValidationOut)
 def validate(h: HypothesisIn):
     start = time.time()
     try:
-        res = z3_validate(h.hypothesis, h.rules, h.classification, h.further_data)
-        response = {
-            "gap": h.gap,
-            "hypothesis": h.hypothesis,
-            "evidence": h.evidence,
-            "prediction": h.prediction,
-            "rules": h.rules,
-            "classification": h.classification,
-            "further_data": h.further_data,
-            "validation_result": {
-                "additionalProp1": res
-            }
-        }
+        response = validate_hypothesis(h.dict())
     except Exception as e:
         logger.exception("Validation failure")
         raise HTTPException(status_code=500, detail=str(e))
@@ -57,11 +48,11 @@ def validate(h: HypothesisIn):
         "id": str(uuid.uuid4()),
         "timestamp": time.time(),
         "hypothesis": h.hypothesis,
-        "result": res["valid"],
+        "result": response["validation_result"]["additionalProp1"]["valid"],
         "latency_ms": latency_ms
     })
     return response
 
 @app.get("/logs")
 def get_logs():
-    return {"logs": validation_logs}
\ No newline at end of file
+    return {"logs": list(validation_logs)}
\ No newline at end of file
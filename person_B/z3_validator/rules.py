@@ -1,5 +1,6 @@
 import re
-from z3 import Solver, Bool, Implies, Not, sat, unsat
+from z3 import Context, Solver, Bool, Implies, Not, sat, unsat
+from service_metrics import stage
 
 PATTERNS = {
     "plaque_decrease": re.compile(r"(plaque|amyloid).*(decrease|reduce|reduction|clear)", re.I),
@@ -33,19 +34,21 @@ def z3_validate(hypothesis_text, dynamic_rules=None, classification=None, furthe
     proof_trace = []
     warnings = []
 
-    plaque_decrease = Bool("plaque_decrease")
-    cognition_improvement = Bool("cognition_improvement")
-    microglia_dysfunction = Bool("microglia_dysfunction")
-    chronic_inflammation = Bool("chronic_inflammation")
-    reduced_phagocytosis = Bool("reduced_phagocytosis")
-    cure_claim = Bool("cure_claim")
-    apoe_e4 = Bool("apoe_e4")
-    impaired_amyloid_beta_clearance = Bool("impaired_amyloid_beta_clearance")
-    blood_brain_barrier_disruption = Bool("blood_brain_barrier_disruption")
-    amyloid_beta_aggregation = Bool("amyloid_beta_aggregation")
-    tau_phosphorylation = Bool("tau_phosphorylation")
-    neuronal_damage = Bool("neuronal_damage")
-    disease_progression = Bool("disease_progression")
+    # Z3's default context is not thread-safe; concurrent requests each get their own
+    ctx = Context()
+    plaque_decrease = Bool("plaque_decrease", ctx)
+    cognition_improvement = Bool("cognition_improvement", ctx)
+    microglia_dysfunction = Bool("microglia_dysfunction", ctx)
+    chronic_inflammation = Bool("chronic_inflammation", ctx)
+    reduced_phagocytosis = Bool("reduced_phagocytosis", ctx)
+    cure_claim = Bool("cure_claim", ctx)
+    apoe_e4 = Bool("apoe_e4", ctx)
+    impaired_amyloid_beta_clearance = Bool("impaired_amyloid_beta_clearance", ctx)
+    blood_brain_barrier_disruption = Bool("blood_brain_barrier_disruption", ctx)
+    amyloid_beta_aggregation = Bool("amyloid_beta_aggregation", ctx)
+    tau_phosphorylation = Bool("tau_phosphorylation", ctx)
+    neuronal_damage = Bool("neuronal_damage", ctx)
+    disease_progression = Bool("disease_progression", ctx)
 
     kb_R2 = Not(Implies(plaque_decrease, cognition_improvement))
     kb_R3 = Implies(chronic_inflammation, microglia_dysfunction)
@@ -59,7 +62,7 @@ def z3_validate(hypothesis_text, dynamic_rules=None, classification=None, furthe
     kb_R11 = Implies(microglia_dysfunction, neuronal_damage)
     kb_R12 = Implies(neuronal_damage, disease_progression)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(kb_R2, kb_R3, kb_R4, kb_R5, kb_R6, kb_R7, kb_R8, kb_R9, kb_R10, kb_R11, kb_R12)
     proof_trace.append("Loaded KB rules: R2 (plaque_decrease ↛ cognition_improvement), R3 (chronic_inflammation -> microglia_dysfunction), R4 (microglia_dysfunction -> reduced_phagocytosis), R5 (no complete cure), R6 (microglia_dysfunction -> impaired_amyloid_beta_clearance), R7 (chronic_inflammation -> blood_brain_barrier_disruption), R8 (blood_brain_barrier_disruption -> microglia_dysfunction), R9 (microglia_dysfunction -> amyloid_beta_aggregation), R10 (amyloid_beta_aggregation -> tau_phosphorylation), R11 (microglia_dysfunction -> neuronal_damage), R12 (neuronal_damage -> disease_progression)")
 
@@ -148,7 +151,7 @@ def z3_validate(hypothesis_text, dynamic_rules=None, classification=None, furthe
         if preds["plaque_decrease"] and preds["cognition_improvement"]:
             implied.append((Implies(plaque_decrease, cognition_improvement), "Hypothesis implies: plaque_decrease -> cognition_improvement"))
 
-    s2 = Solver()
+    s2 = Solver(ctx=ctx)
     s2.add(kb_R2, kb_R3, kb_R4, kb_R5, kb_R6, kb_R7, kb_R8, kb_R9, kb_R10, kb_R11, kb_R12)
     for (sym, desc) in assertions:
         s2.add(sym)
@@ -157,7 +160,8 @@ def z3_validate(hypothesis_text, dynamic_rules=None, classification=None, furthe
         s2.add(impl_expr)
         proof_trace.append(desc)
 
-    sat_res = s2.check()
+    with stage("z3_solve"):
+        sat_res = s2.check()
     if sat_res == sat:
         valid = True
         reason = "No contradiction with knowledge base and dynamic rules."
@@ -168,17 +172,18 @@ def z3_validate(hypothesis_text, dynamic_rules=None, classification=None, furthe
         rules = [("R2", kb_R2), ("R3", kb_R3), ("R4", kb_R4), ("R5", kb_R5), ("R6", kb_R6),
                  ("R7", kb_R7), ("R8", kb_R8), ("R9", kb_R9), ("R10", kb_R10),
                  ("R11", kb_R11), ("R12", kb_R12)]
-        for rid, rule_expr in rules:
-            s_temp = Solver()
-            for r2id, r2expr in rules:
-                if r2id != rid:
-                    s_temp.add(r2expr)
-            for (sym, _) in assertions:
-                s_temp.add(sym)
-            for (impl_expr, _) in implied:
-                s_temp.add(impl_expr)
-            if s_temp.check() == sat:
-                contradictions.append(f"Contradiction arises due to rule {rid}")
+        with stage("z3_attribution"):
+            for rid, rule_expr in rules:
+                s_temp = Solver(ctx=ctx)
+                for r2id, r2expr in rules:
+                    if r2id != rid:
+                        s_temp.add(r2expr)
+                for (sym, _) in assertions:
+                    s_temp.add(sym)
+                for (impl_expr, _) in implied:
+                    s_temp.add(impl_expr)
+                if s_temp.check() == sat:
+                    contradictions.append(f"Contradiction arises due to rule {rid}")
         if contradictions:
             proof_trace.extend(contradictions)
 
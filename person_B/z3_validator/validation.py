@@ -0,0 +1,12 @@
+from typing import Dict
+from rules import z3_validate
+
+HYPOTHESIS_FIELDS = ("gap", "hypothesis", "evidence", "prediction", "rules", "classification", "further_data")
+
+
+def validate_hypothesis(h: Dict) -> Dict:
+    """ValidationOut for a hypothesis: its fields plus the Z3 result under validation_result.additionalProp1."""
+    res = z3_validate(h["hypothesis"], h.get("rules") or [], h.get("classification") or "", h.get("further_data") or "")
+    response = {field: h.get(field) for field in HYPOTHESIS_FIELDS}
+    response["validation_result"] = {"additionalProp1": res}
+    return response
@@ -0,0 +1,24 @@
+"""Metric hooks for the stage services: the backend's when it is importable, no-ops otherwise.
+
+Services import `stage`, `record_cache` and `ENCODE_BATCH` from here, so they
+report into /metrics and request profiles when the backend runs them
+in-process and cost nothing when they run as standalone microservices.
+"""
+try:
+    from backend.metrics import ENCODE_BATCH, record_cache, stage
+except ImportError:  # a standalone microservice without the backend package
+    from contextlib import nullcontext
+
+    def stage(name):
+        return nullcontext()
+
+    def record_cache(cache, hit):
+        pass
+
+    class _NoMetric:
+        def observe(self, value, **labels):
+            pass
+
+    ENCODE_BATCH = _NoMetric()
+
+__all__ = ["ENCODE_BATCH", "record_cache", "stage"]
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+# Same import layout as the backend: the repo root plus the service directories
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("", "person_A/ingest_search", "person_A/hypothesis_gen", "person_B/z3_validator"):
+    path = os.path.join(ROOT, path)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with the slice of the Hugging Face API the chunker uses."""
+
+    def __call__(self, text, add_special_tokens=False):
+        return {"input_ids": text.split()}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+
+@pytest.fixture
+def word_tokenizer():
+    return WordTokenizer()
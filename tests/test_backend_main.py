@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+os.environ.update(VECTOR_BACKEND="memory", LOG_DB_PATH="", JOB_DB_PATH="")
+from fastapi.testclient import TestClient  # noqa: E402
+from backend import metrics  # noqa: E402
+from backend.main import app  # noqa: E402
+
+client = TestClient(app)
+
+
+def test_metrics_label_requests_by_route_template():
+    before = metrics.REQUEST_LATENCY._values.get(("/jobs/{job_id}",), {}).get("count", 0)
+    assert client.get("/jobs/" + "0" * 32).status_code == 404
+    client.get("/no-such-path")
+
+    assert metrics.REQUEST_LATENCY._values[("/jobs/{job_id}",)]["count"] == before + 1
+    assert ("other",) in metrics.REQUEST_LATENCY._values
+    assert ("/no-such-path",) not in metrics.REQUEST_LATENCY._values
+
+
+def test_jobs_wait_out_load_shedding(monkeypatch):
+    from backend import main
+    from backend.limiter import Overloaded
+
+    sleeps, attempts = [], []
+    monkeypatch.setattr(main.time, "sleep", sleeps.append)
+
+    def shed_twice():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Overloaded("generate", "queue_full", 2)
+        return {"hypothesis": "h"}
+
+    assert main._when_capacity(shed_twice) == {"hypothesis": "h"}
+    assert sleeps == [2, 2]
+
+
+def test_jobs_give_up_waiting_after_the_capacity_deadline(monkeypatch):
+    from backend import main
+    from backend.limiter import Overloaded
+
+    clock = [0.0]
+    monkeypatch.setattr(main, "JOB_CAPACITY_WAIT", 5)
+    monkeypatch.setattr(main.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(main.time, "sleep", lambda s: clock.__setitem__(0, clock[0] + s))
+
+    def always_shed():
+        raise Overloaded("design", "queue_full", 2)
+
+    with pytest.raises(RuntimeError, match="No design capacity within 5s"):
+        main._when_capacity(always_shed)
+    assert clock[0] == 5
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+import chunk_store
+from chunk_store import MANIFEST, ChunkStore
+
+TEXTS = ["tau spreads along connected regions", "amyloid plaques and microglia"]
+
+
+def make_store(path, papers=2):
+    store = ChunkStore(str(path), segment_rows=len(TEXTS))
+    for paper_id in range(papers):
+        store.append(paper_id, f"{paper_id}.pdf", TEXTS, {"year": 2020})
+    return store
+
+
+def test_attach_embeddings_swaps_in_a_new_segment_while_the_old_one_is_mapped(tmp_path):
+    store = make_store(tmp_path)
+    first, second = store.segments()
+    table = store.read(first)  # a reader still holding the mapping
+
+    attached = store.attach_embeddings(first, table, np.ones((2, 3)), "encoder")
+
+    assert attached != first
+    assert store.segments() == [attached, second]
+    assert store.embeddings(store.read(attached), "encoder").shape == (2, 3)
+    assert table.column("text").to_pylist() == TEXTS  # the old mapping is untouched
+    assert store.num_rows() == 4
+
+
+def test_segments_still_mapped_on_windows_are_removed_later(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    first = store.segments()[0]
+    real_remove = os.remove
+
+    def locked(path):
+        if os.path.basename(path) == os.path.basename(first):
+            raise PermissionError(32, "The process cannot access the file because it is being used by another process")
+        real_remove(path)
+
+    monkeypatch.setattr(chunk_store.os, "remove", locked)
+    attached = store.attach_embeddings(first, store.read(first), np.ones((2, 3)), "encoder")
+    assert os.path.exists(first)
+    assert first not in store.segments() and attached in store.segments()
+
+    monkeypatch.setattr(chunk_store.os, "remove", real_remove)
+    store.append(2, "2.pdf", TEXTS)
+    assert not os.path.exists(first)
+    assert store.num_rows() == 6
+
+
+def test_drop_and_stores_without_a_manifest(tmp_path):
+    store = make_store(tmp_path, papers=3)
+    first, *rest = store.segments()
+    store.drop([first])
+    assert store.segments() == rest and not os.path.exists(first)
+
+    os.remove(os.path.join(str(tmp_path), MANIFEST))  # e.g. a snapshot's copy of the segments
+    assert ChunkStore(str(tmp_path)).segments() == rest
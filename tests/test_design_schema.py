@@ -0,0 +1,39 @@
+import json
+
+from person_B.experiment_design.design import design_experiment
+from person_B.experiment_design.design_schema import DESIGN_RESPONSE_FORMAT, parse_design
+
+PLAN = {
+    "model": "APP/PS1 mice",
+    "groups": ["Vehicle", "Drug"],
+    "n_per_group": 10,
+    "duration_weeks": 8,
+    "treatment_route": "oral gavage",
+    "outcome_measures": ["Amyloid plaque load"],
+    "expected_result": "Fewer plaques with the drug.",
+    "latex": "\\section*{Plan}",
+}
+
+
+def test_parse_design_accepts_a_conforming_reply():
+    assert parse_design(json.dumps(PLAN)) == PLAN
+
+
+def test_parse_design_drops_extra_keys():
+    reply = dict(PLAN, rationale="Microglia clear plaques.", notes=["pilot first"])
+    assert parse_design(json.dumps(reply)) == PLAN
+
+
+def test_parse_design_rejects_missing_fields_and_bad_json():
+    assert parse_design(json.dumps({k: v for k, v in PLAN.items() if k != "groups"})) is None
+    assert parse_design("Here is the plan: {") is None
+
+
+def test_structured_output_schema_stays_strict():
+    assert DESIGN_RESPONSE_FORMAT["json_schema"]["schema"]["additionalProperties"] is False
+
+
+def test_design_experiment_keeps_llm_plan_with_extra_keys():
+    reply = json.dumps(dict(PLAN, rationale="extra commentary"))
+    v = {"hypothesis": "Drug X reduces amyloid plaques", "rules": []}
+    assert design_experiment(v, call_llm=lambda text: reply) == PLAN
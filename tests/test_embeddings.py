@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+os.environ.update(VECTOR_BACKEND="memory")
+from chunk_store import ChunkStore, ChunkTextLookup  # noqa: E402
+from lexical_index import BM25Builder  # noqa: E402
+from person_A.ingest_search import embeddings  # noqa: E402
+from vector_index import InMemoryIndex  # noqa: E402
+
+CHUNKS = [
+    (0, "Tau pathology", "tau tangles spread through the entorhinal cortex"),
+    (1, "Amyloid and microglia", "microglia cluster around amyloid plaques"),
+    (2, "APOE", "apoe-e4 carriers accumulate amyloid earlier"),
+    (3, "Sleep", "sleep loss raises interstitial tau and amyloid levels"),
+]
+QUERIES = ["tau spreading", "microglia and amyloid plaques", "apoe-e4 amyloid", "sleep and tau"]
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    store = ChunkStore(str(tmp_path / "store"))
+    with store:
+        for pid, title, text in CHUNKS:
+            store.append(pid, title, [text])
+    texts = [text for _, _, text in CHUNKS]
+    index = InMemoryIndex(embeddings.model.get_sentence_embedding_dimension())
+    index.upsert([
+        {"id": f"{pid}_0", "values": emb.tolist(), "metadata": {"paper_id": pid, "title": title, "text": text}}
+        for (pid, title, text), emb in zip(CHUNKS, embeddings.model.encode(texts))
+    ])
+    builder = BM25Builder()
+    for pid, _, text in CHUNKS:
+        builder.add(f"{pid}_0", text, {"paper_id": pid})
+    monkeypatch.setattr(embeddings, "index", index)
+    monkeypatch.setattr(embeddings, "chunk_texts", ChunkTextLookup(store))
+    monkeypatch.setattr(embeddings, "lexical_index", builder.build())
+    monkeypatch.setattr(embeddings, "projection", None)
+    monkeypatch.setattr(embeddings, "EMBEDDING_DIMS", 0)
+
+
+@pytest.mark.parametrize("mode", ["lexical", "hybrid"])
+def test_modes_fall_back_to_dense_without_a_lexical_index(corpus, monkeypatch, caplog, mode):
+    monkeypatch.setattr(embeddings, "lexical_index", None)
+
+    dense = embeddings.semantic_search("microglia and amyloid plaques", top_k=2)
+    assert embeddings.semantic_search("microglia and amyloid plaques", top_k=2, mode=mode) == dense
+    assert embeddings.semantic_search_batch(["microglia and amyloid plaques"], top_k=2, mode=mode) == [dense]
+    assert "Lexical index not built" in caplog.text
+
+
+@pytest.mark.parametrize("mode", ["dense", "lexical", "hybrid"])
+@pytest.mark.parametrize("filters", [None, {"paper_id": {"$in": [1, 2, 3]}}])
+def test_batch_search_matches_single_searches(corpus, mode, filters):
+    single = [embeddings.semantic_search(q, top_k=3, mode=mode, filters=filters) for q in QUERIES]
+    assert embeddings.semantic_search_batch(QUERIES, top_k=3, mode=mode, filters=filters) == single
+    assert all(single)
+    if filters:
+        assert all(paper["id"] != 0 for papers in single for paper in papers)
+
+
+def test_load_projection_refuses_another_model_or_size(tmp_path, monkeypatch):
+    from projection import Projection
+
+    path = Projection.fit(np.eye(8), 4, "truncate", "stsb-roberta-large").save(str(tmp_path / "projection.npz"))
+    monkeypatch.setattr(embeddings, "EMBEDDING_MODEL", "stsb-roberta-large")
+    monkeypatch.setattr(embeddings, "EMBEDDING_DIMS", 4)
+    assert embeddings.load_projection(path).dims == 4
+
+    monkeypatch.setattr(embeddings, "EMBEDDING_DIMS", 2)
+    with pytest.raises(ValueError, match="configured for stsb-roberta-large at 2"):
+        embeddings.load_projection(path)
+    monkeypatch.setattr(embeddings, "EMBEDDING_DIMS", 4)
+    monkeypatch.setattr(embeddings, "EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    with pytest.raises(ValueError, match="maps stsb-roberta-large to 4 dims"):
+        embeddings.load_projection(path)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import encoder_service
+from encoder_service import RemoteEncoder
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return 3
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[len(t), i, 0.5] for i, t in enumerate(texts)], dtype=np.float32)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(encoder_service, "_model", model)
+    monkeypatch.setattr(encoder_service, "_cache", type(encoder_service._cache)())
+    monkeypatch.setattr(encoder_service, "ENCODE_MAX_BATCH", 1)  # encode in the request thread
+    return model
+
+
+def remote(model_name=encoder_service.EMBEDDING_MODEL):
+    encoder = RemoteEncoder("http://encoder", model_name)
+    encoder._client = TestClient(encoder_service.app, base_url="http://encoder")
+    return encoder
+
+
+def test_round_trip_matches_the_local_model(service):
+    encoder = remote()
+    texts = ["tau", "amyloid beta", "tau"]
+
+    embs = encoder.encode(texts)
+
+    assert embs.dtype == np.float32 and embs.shape == (3, 3)
+    np.testing.assert_array_equal(embs[:2], FakeModel().encode(texts[:2]))
+    np.testing.assert_array_equal(embs[2], embs[0])  # repeated text is served from the cache
+    assert service.calls == [["tau", "amyloid beta"]]
+    np.testing.assert_array_equal(encoder.encode("microglia"), FakeModel().encode(["microglia"])[0])
+    assert encoder.get_sentence_embedding_dimension() == 3
+
+
+def test_model_mismatch_is_refused(service):
+    encoder = remote("some-other-encoder")
+    with pytest.raises(RuntimeError, match="expected some-other-encoder"):
+        encoder.get_sentence_embedding_dimension()
@@ -0,0 +1,21 @@
+from evidence_packer import count_tokens, pack_evidence
+
+FILLER = "Cohort characteristics were recorded at baseline for every participant in the study. " * 6
+
+
+def test_relevant_sentence_past_the_first_300_characters_is_packed():
+    papers = [{"title": "Glia", "abstract": FILLER + "Microglial TREM2 signalling drives amyloid plaque clearance."}]
+    assert len(FILLER) > 300
+    packed = pack_evidence(papers, "TREM2 microglia plaque clearance", budget=40)
+    assert "TREM2 signalling drives amyloid plaque clearance" in packed
+
+
+def test_long_abstracts_are_cut_to_the_budget():
+    papers = [{"title": f"Paper {i}", "abstract": f"Tau spreading in region {i} follows connectivity. " + FILLER * 5}
+              for i in range(6)]
+    for budget in (60, 200):
+        assert count_tokens(pack_evidence(papers, "tau spreading connectivity", budget=budget)) <= budget
+
+
+def test_papers_without_abstracts_fall_back_to_titles():
+    assert pack_evidence([{"title": "A"}, {"title": "B", "abstract": ""}], "q") == "Title: A\nTitle: B"
@@ -0,0 +1,92 @@
+import importlib.util
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_spec = importlib.util.spec_from_file_location("frontend_utils", os.path.join(ROOT, "frontend", "utils.py"))
+utils = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(utils)
+
+
+class Stage:
+    """A call_* stand-in that counts calls and can be made to fail."""
+
+    def __init__(self, name):
+        self.__name__ = name
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise ValueError(f"{self.__name__} down")
+        return {"response": {"args": list(args), "kwargs": kwargs, "call": self.calls}, "latency": 0.0}
+
+
+def run(artifacts, search, generate, validate, query="tau", top_k=3):
+    papers = utils.cached_stage(artifacts, "search", search, query, top_k=top_k)["response"]
+    hyp = utils.cached_stage(artifacts, "generate", generate, papers, query)["response"]
+    return utils.cached_stage(artifacts, "validate", validate, hyp)["response"]
+
+
+def test_unchanged_stages_are_reused():
+    search, generate, validate = Stage("call_search"), Stage("call_generate"), Stage("call_validate")
+    artifacts = {}
+    first = run(artifacts, search, generate, validate)
+    assert run(artifacts, search, generate, validate) == first
+    assert (search.calls, generate.calls, validate.calls) == (1, 1, 1)
+
+
+def test_changed_inputs_rerun_only_that_stage():
+    search, generate, validate = Stage("call_search"), Stage("call_generate"), Stage("call_validate")
+    artifacts = {}
+    run(artifacts, search, generate, validate)
+
+    # An edited hypothesis is re-validated without re-searching or re-generating
+    edited = {"hypothesis": "edited"}
+    assert utils.cached_stage(artifacts, "validate", validate, edited)["response"]["args"] == [edited]
+    utils.cached_stage(artifacts, "validate", validate, edited)
+    assert (search.calls, generate.calls, validate.calls) == (1, 1, 2)
+
+    run(artifacts, search, generate, validate, top_k=5)
+    assert (search.calls, generate.calls, validate.calls) == (2, 2, 3)
+
+
+def test_a_failed_stage_is_retried_without_rerunning_earlier_ones():
+    search, generate, validate = Stage("call_search"), Stage("call_generate"), Stage("call_validate")
+    artifacts = {}
+    generate.fail = True
+    with pytest.raises(ValueError):
+        run(artifacts, search, generate, validate)
+    assert "generate" not in artifacts
+
+    generate.fail = False
+    run(artifacts, search, generate, validate)
+    assert (search.calls, generate.calls, validate.calls) == (1, 2, 1)
+
+
+def test_pipeline_artifacts_keeps_the_most_recently_used_runs():
+    store = {}
+    first = utils.pipeline_artifacts(store, ("a", 3), limit=2)
+    first["search"] = "kept"
+    utils.pipeline_artifacts(store, ("b", 3), limit=2)
+    assert utils.pipeline_artifacts(store, ("a", 3), limit=2) is first
+    utils.pipeline_artifacts(store, ("c", 3), limit=2)
+    assert list(store) == [("a", 3), ("c", 3)]
+
+
+def test_stages_seeded_from_a_job_are_reused_and_the_rest_called():
+    search, generate, validate = Stage("call_search"), Stage("call_generate"), Stage("call_validate")
+    job = {"status": "failed", "error": "No generate capacity within 300s",
+           "stages": {"search": {"papers": [], "query": "tau"}}, "timings": {"search": 0.4}}
+    artifacts = {}
+    utils.seed_stages(artifacts, job)
+
+    run(artifacts, search, generate, validate)
+    assert artifacts["search"][1] == {"response": {"papers": [], "query": "tau"}, "latency": 0.4}
+    assert (search.calls, generate.calls, validate.calls) == (0, 1, 1)
+
+    # Once bound to its inputs a seeded stage re-runs like any other when they change
+    run(artifacts, search, generate, validate, top_k=5)
+    assert (search.calls, generate.calls, validate.calls) == (1, 2, 2)
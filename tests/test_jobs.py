@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+import pytest
+
+from backend.jobs import JobQueue, JobStore, QueueFull
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db") if request.param == "sqlite" else None, ttl=60)
+    yield store
+    store.close()
+
+
+def wait_for(queue, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def pipeline(request, report):
+    report("search", {"papers": [request["query"]]})
+    report("generate", {"hypothesis": "h"})
+    return {"ok": True}
+
+
+def test_job_lifecycle(store):
+    queue = JobQueue(pipeline, store, workers=1)
+    job = queue.submit({"query": "tau"})
+    assert job["status"] == "queued"
+
+    done = wait_for(queue, job["id"])
+    assert done["status"] == "succeeded"
+    assert done["result"] == {"ok": True}
+    assert list(done["stages"]) == ["search", "generate"]
+    assert set(done["timings"]) == {"search", "generate"}
+    assert queue.get("missing") is None
+
+
+def test_partial_results_are_visible_while_running(store):
+    release = threading.Event()
+
+    def slow(request, report):
+        report("search", {"papers": []})
+        release.wait(5)
+        return {}
+
+    queue = JobQueue(slow, store, workers=1)
+    job_id = queue.submit({"query": "tau"})["id"]
+    deadline = time.time() + 5
+    while "search" not in queue.get(job_id)["stages"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert queue.get(job_id)["status"] == "running"
+    release.set()
+    assert wait_for(queue, job_id)["status"] == "succeeded"
+
+
+def test_failures_are_recorded(store):
+    def failing(request, report):
+        raise RuntimeError("LLM down")
+
+    queue = JobQueue(failing, store, workers=1)
+    job = wait_for(queue, queue.submit({"query": "tau"})["id"])
+    assert job["status"] == "failed" and job["error"] == "LLM down"
+
+
+def test_full_queue_rejects(store):
+    release = threading.Event()
+    queue = JobQueue(lambda request, report: release.wait(5), store, workers=1, queue_size=1)
+    first = queue.submit({"query": "a"})["id"]
+    deadline = time.time() + 5
+    while queue.get(first)["status"] == "queued" and time.time() < deadline:
+        time.sleep(0.01)
+    queue.submit({"query": "b"})
+
+    with pytest.raises(QueueFull):
+        queue.submit({"query": "c"})
+    release.set()
+
+
+def test_records_expire(store):
+    store.ttl = 0.05
+    store.put({"id": "old", "status": "succeeded"})
+    assert store.get("old") is not None
+    time.sleep(0.1)
+    assert store.get("old") is None
+
+
+def test_restart_fails_only_orphaned_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.put({"id": "orphan", "status": "running", "owner": 2 ** 22 + 12345})
+    store.put({"id": "live", "status": "running", "owner": 1})  # another worker's job
+    store.put({"id": "done", "status": "succeeded", "owner": None})
+
+    JobQueue(pipeline, store, workers=1)
+    assert store.get("orphan")["status"] == "failed"
+    assert store.get("live")["status"] == "running"
+    assert store.get("done")["status"] == "succeeded"
+
+
+def test_jobs_owned_by_this_process_or_nobody_count_as_orphaned(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.put({"id": "reused-pid", "status": "queued", "owner": os.getpid()})  # a previous process with our pid
+    store.put({"id": "unowned", "status": "running"})  # written before jobs recorded their owner
+    store.put({"id": "live", "status": "queued", "owner": os.getppid()})
+
+    JobQueue(pipeline, store, workers=1)
+    assert store.get("reused-pid")["status"] == "failed"
+    assert store.get("unowned")["status"] == "failed"
+    assert store.get("live")["status"] == "queued"
@@ -0,0 +1,65 @@
+import pytest
+
+from lexical_index import BM25Builder, BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "a": ("tau tau tau pathology in the entorhinal cortex", {"year": 2018}),
+    "b": ("tau and amyloid interact in a long review of many pathways and regions", {"year": 2021}),
+    "c": ("apoe-e4 carriers show more amyloid deposition", {"year": 2021}),
+    "d": ("microglia respond to amyloid plaques", {"year": 2016}),
+}
+
+
+@pytest.fixture
+def index():
+    builder = BM25Builder()
+    for doc_id, (text, fields) in DOCS.items():
+        builder.add(doc_id, text, fields)
+    return builder.build()
+
+
+def test_tokenize_keeps_hyphenated_identifiers_whole_and_split():
+    assert tokenize("The APOE-e4 allele") == ["apoe-e4", "apoe", "e4", "apoee4", "allele"]
+
+
+def test_term_frequency_and_length_rank_documents(index):
+    ranked = index.search("tau", top_k=10)
+    assert [doc_id for doc_id, _ in ranked] == ["a", "b"]
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_rare_terms_outweigh_common_ones(index):
+    # "amyloid" is in three documents, "microglia" in one
+    assert index.search("amyloid microglia", top_k=1)[0][0] == "d"
+    assert index.search("unknown words", top_k=5) == []
+
+
+def test_hyphenated_identifiers_match_either_form(index):
+    assert index.search("APOE e4", top_k=1)[0][0] == "c"
+    assert index.search("apoe-e4", top_k=1)[0][0] == "c"
+
+
+def test_filter_drops_documents_before_top_k(index):
+    assert [doc_id for doc_id, _ in index.search("amyloid", top_k=1, filter={"year": {"$lt": 2020}})] == ["d"]
+    assert index.search("tau", top_k=5, filter={"year": 2016}) == []
+
+
+def test_save_and_load_round_trip(tmp_path, index):
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert len(loaded) == len(index)
+    assert loaded.search("amyloid", top_k=3) == index.search("amyloid", top_k=3)
+    assert loaded.search("amyloid", top_k=3, filter={"year": 2021}) == index.search("amyloid", top_k=3, filter={"year": 2021})
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+    # found by both lists beats found by one; then the better rank wins
+    assert fused == ["b", "a", "d", "c"]
+    assert reciprocal_rank_fusion([["a", "b"]], k=0) == ["a", "b"]
+
+
+def test_rrf_ties_keep_first_seen_order():
+    assert reciprocal_rank_fusion([["x", "y"], ["y", "x"]]) == ["x", "y"]
+    assert reciprocal_rank_fusion([["p"], ["q"]]) == ["p", "q"]
+    assert reciprocal_rank_fusion([]) == []
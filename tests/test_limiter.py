@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from backend.limiter import AdaptiveLimiter, Overloaded, is_overload_signal
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def run_concurrently(limiter, n, hold=0.0):
+    """n calls that each hold a slot for `hold` seconds; returns the peak concurrency."""
+    lock, state = threading.Lock(), {"now": 0, "peak": 0}
+
+    def call():
+        with limiter.slot():
+            with lock:
+                state["now"] += 1
+                state["peak"] = max(state["peak"], state["now"])
+            time.sleep(hold)
+            with lock:
+                state["now"] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return state["peak"]
+
+
+def test_limit_caps_concurrency():
+    limiter = AdaptiveLimiter("test", initial=3, max_limit=3, queue_size=50, max_wait=5)
+
+    assert run_concurrently(limiter, 12, hold=0.02) == 3
+
+
+def test_limit_grows_additively_when_utilised():
+    limiter = AdaptiveLimiter("test", initial=2, max_limit=8, queue_size=50, max_wait=5)
+    for _ in range(10):
+        run_concurrently(limiter, 8, hold=0.005)
+
+    assert 2 < limiter.limit <= 8
+
+
+def test_idle_calls_do_not_grow_the_limit():
+    limiter = AdaptiveLimiter("test", initial=4, max_limit=32)
+    for _ in range(50):
+        with limiter.slot():
+            pass
+
+    assert limiter.limit == 4
+
+
+def test_overload_halves_once_per_burst():
+    limiter = AdaptiveLimiter("test", initial=16, max_limit=32, queue_size=50)
+    barrier = threading.Barrier(8)
+
+    def rate_limited_call():
+        with pytest.raises(RateLimited):
+            with limiter.slot():
+                barrier.wait()  # all eight started before the first 429 comes back
+                raise RateLimited()
+
+    threads = [threading.Thread(target=rate_limited_call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert limiter.limit == 8
+
+    with pytest.raises(RateLimited):
+        with limiter.slot():
+            raise RateLimited()
+    assert limiter.limit == 4
+
+
+def test_other_errors_do_not_decrease():
+    limiter = AdaptiveLimiter("test", initial=4)
+    with pytest.raises(ValueError):
+        with limiter.slot():
+            raise ValueError("bad JSON")
+
+    assert limiter.limit == 4
+    assert is_overload_signal(RateLimited()) and is_overload_signal(TimeoutError())
+    assert not is_overload_signal(ValueError())
+
+
+def test_sheds_when_queue_is_full_or_wait_expires():
+    limiter = AdaptiveLimiter("test", initial=1, max_limit=1, queue_size=1, max_wait=0.2)
+    release, waiting = threading.Event(), threading.Event()
+
+    def holder():
+        with limiter.slot():
+            release.wait(5)
+
+    def waiter():
+        waiting.set()
+        with pytest.raises(Overloaded) as exc:
+            with limiter.slot():
+                pass
+        assert exc.value.reason == "timeout"
+
+    threads = [threading.Thread(target=holder), threading.Thread(target=waiter)]
+    threads[0].start()
+    time.sleep(0.02)
+    threads[1].start()
+    waiting.wait()
+    time.sleep(0.02)
+    with pytest.raises(Overloaded) as exc:
+        with limiter.slot():
+            pass
+    assert exc.value.reason == "queue_full" and exc.value.retry_after >= 1
+    threads[1].join()
+    release.set()
+    threads[0].join()
+    assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from backend.log_store import LogStore
+
+
+def record(i, endpoint="validate", timestamp=None):
+    return {"id": f"r{i}", "timestamp": timestamp if timestamp is not None else 1000.0 + i,
+            "endpoint": endpoint, "latency_ms": i}
+
+
+def flushed(store):
+    store.close()
+    return [r[0] for r in sqlite3.connect(store.path).execute("SELECT id FROM logs ORDER BY timestamp")]
+
+
+def test_memory_view_is_bounded_and_filtered():
+    store = LogStore(path=None, memory_size=5)
+    for i in range(8):
+        store.append(record(i, "validate" if i % 2 else "design"))
+
+    assert [r["id"] for r in store.query()] == ["r7", "r6", "r5", "r4", "r3"]
+    assert [r["id"] for r in store.query(endpoint="design", limit=1)] == ["r6"]
+    assert [r["id"] for r in store.query(since=1005.0, until=1007.0)] == ["r6", "r5"]
+
+
+def test_sqlite_persists_and_queries(tmp_path):
+    store = LogStore(path=str(tmp_path / "logs.db"), flush_interval=0.01, max_age=0)
+    for i in range(10):
+        store.append(record(i))
+    assert len(flushed(store)) == 10
+
+    reopened = LogStore(path=store.path, max_age=0)
+    assert [r["id"] for r in reopened.query(limit=3, offset=1)] == ["r8", "r7", "r6"]
+    reopened.close()
+
+
+def test_table_is_pruned_to_max_rows(tmp_path):
+    store = LogStore(path=str(tmp_path / "logs.db"), batch_size=7, flush_interval=0.01, max_rows=20, max_age=0)
+    for i in range(100):
+        store.append(record(i))
+
+    assert flushed(store) == [f"r{i}" for i in range(80, 100)]
+
+
+def test_table_is_pruned_by_age(tmp_path):
+    store = LogStore(path=str(tmp_path / "logs.db"), flush_interval=0.01, max_rows=0, max_age=3600)
+    now = time.time()
+    store.append(record(1, timestamp=now - 7200))
+    store.append(record(2, timestamp=now))
+
+    assert flushed(store) == ["r2"]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from metadata_filter import BitmapFilter, build_filter, paper_fields
+
+ROWS = [
+    {"paper_id": 0, "year": 2015, "journal": "Nature", "study_type": "review"},
+    {"paper_id": 1, "year": 2019, "journal": "Brain", "study_type": "animal_study"},
+    {"paper_id": 1, "year": 2019, "journal": "Brain", "study_type": "animal_study"},
+    {"paper_id": 2, "year": None, "journal": None, "study_type": "clinical_trial"},
+    {"paper_id": 3, "year": 2023, "journal": "Nature", "study_type": None},
+]
+
+
+def matching(flt):
+    return list(np.flatnonzero(BitmapFilter.from_rows(ROWS).mask(flt)))
+
+
+@pytest.mark.parametrize("flt, expected", [
+    (None, [0, 1, 2, 3, 4]),
+    ({"journal": "Nature"}, [0, 4]),
+    ({"journal": {"$in": ["Brain", "Cell"]}}, [1, 2]),
+    ({"journal": {"$nin": ["Nature"]}}, [1, 2, 3]),
+    ({"study_type": {"$ne": "review"}}, [1, 2, 3, 4]),
+    ({"year": {"$gte": 2019}}, [1, 2, 4]),
+    ({"year": {"$lt": 2019}}, [0]),  # unknown years never match a range
+    ({"year": {"$gt": 2015, "$lte": 2019}}, [1, 2]),
+    ({"paper_id": {"$in": [0, 3]}, "journal": "Nature"}, [0, 4]),
+    ({"$or": [{"year": 2015}, {"study_type": "clinical_trial"}]}, [0, 3]),
+    ({"$and": [{"journal": "Brain"}, {"paper_id": 1}]}, [1, 2]),
+    ({"journal": "Unknown"}, []),
+])
+def test_mask(flt, expected):
+    assert matching(flt) == expected
+
+
+def test_build_filter_matches_rows():
+    flt = build_filter(paper_ids=None, year_from=2016, year_to=None, journals=["Nature", "Brain"], study_types=None)
+
+    assert flt == {"year": {"$gte": 2016}, "journal": {"$in": ["Nature", "Brain"]}}
+    assert matching(flt) == [1, 2, 4]
+    assert build_filter() is None
+
+
+def test_rejects_unknown_fields_and_ranges_on_strings():
+    with pytest.raises(ValueError):
+        matching({"author": "Smith"})
+    with pytest.raises(ValueError):
+        matching({"journal": {"$gt": "A"}})
+
+
+def test_cached_bitmaps_are_not_mutated_by_later_queries():
+    bitmap = BitmapFilter.from_rows(ROWS)
+    first = list(np.flatnonzero(bitmap.mask({"journal": "Nature"})))
+    bitmap.mask({"journal": "Nature", "year": 2023})
+
+    assert list(np.flatnonzero(bitmap.mask({"journal": "Nature"}))) == first
+
+
+def test_paper_fields_drop_unknown_values():
+    assert paper_fields(ROWS[3]) == {"paper_id": 2, "study_type": "clinical_trial"}
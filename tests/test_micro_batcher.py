@@ -0,0 +1,93 @@
+import threading
+import time
+
+import numpy as np
+
+from micro_batcher import MicroBatcher
+
+
+class GatedEncoder:
+    """Encodes "n" as the row [n]; the first pass blocks until released so requests pile up."""
+
+    def __init__(self, fail=False):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if len(self.batches) == 1:
+            self.started.set()
+            self.release.wait(5)
+        if self.fail and len(self.batches) > 1:
+            raise RuntimeError("encoder crashed")
+        return np.array([[float(t)] for t in texts], dtype=np.float32)
+
+
+def run_callers(batcher, encoder, requests):
+    """Block the first pass, queue `requests` from concurrent callers, then let them run."""
+    results = {}
+
+    def call(i, texts):
+        try:
+            results[i] = batcher.encode(texts)
+        except Exception as e:
+            results[i] = e
+
+    first = threading.Thread(target=call, args=("first", ["0"]))
+    first.start()
+    assert encoder.started.wait(5)
+    threads = [threading.Thread(target=call, args=(i, texts)) for i, texts in enumerate(requests)]
+    for t in threads:
+        t.start()
+    deadline = time.time() + 5
+    while batcher._queue.qsize() < len(requests) and time.time() < deadline:
+        time.sleep(0.005)
+    encoder.release.set()
+    for t in [first, *threads]:
+        t.join(5)
+    return results
+
+
+def test_each_caller_gets_its_own_rows_in_order():
+    encoder = GatedEncoder()
+    batcher = MicroBatcher(encoder, max_batch=64, max_wait_ms=20)
+    requests = [[str(10 * i + j) for j in range(i % 3 + 1)] for i in range(12)]
+
+    results = run_callers(batcher, encoder, requests)
+
+    for i, texts in enumerate(requests):
+        assert results[i].ravel().tolist() == [float(t) for t in texts]
+    assert len(encoder.batches) == 2  # everything that queued behind the first pass went in one batch
+
+
+def test_batches_stop_at_max_batch():
+    encoder = GatedEncoder()
+    batcher = MicroBatcher(encoder, max_batch=4, max_wait_ms=20)
+
+    results = run_callers(batcher, encoder, [[str(i)] for i in range(1, 11)])
+
+    assert [len(b) for b in encoder.batches[1:]] == [4, 4, 2]
+    assert sorted(float(r[0, 0]) for i, r in results.items() if i != "first") == [float(i) for i in range(1, 11)]
+
+
+def test_a_failed_pass_fails_every_caller_in_it():
+    encoder = GatedEncoder(fail=True)
+    batcher = MicroBatcher(encoder, max_batch=64, max_wait_ms=20)
+
+    results = run_callers(batcher, encoder, [[str(i)] for i in range(1, 6)])
+
+    assert len(encoder.batches) == 2 and len(encoder.batches[1]) == 5
+    for i in range(5):
+        assert isinstance(results[i], RuntimeError)
+    # the worker survives the failure
+    encoder.fail = False
+    assert batcher.encode(["7"]).tolist() == [[7.0]]
+
+
+def test_single_caller_waits_at_most_max_wait():
+    batcher = MicroBatcher(lambda texts: np.zeros((len(texts), 2)), max_batch=32, max_wait_ms=5)
+    start = time.perf_counter()
+    assert batcher.encode(["a", "b"]).shape == (2, 2)
+    assert time.perf_counter() - start < 0.5
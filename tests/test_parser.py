@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip("PyPDF2")
+import parser  # noqa: E402
+from chunk_store import ChunkStore  # noqa: E402
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+class FakeReader:
+    def __init__(self, path):
+        self.pages = [FakePage(f"Paper {path[-5]} sentence {i} about tau and amyloid." * 3) for i in range(20)]
+        self.metadata = None
+
+
+def test_reingest_replaces_previous_chunks(tmp_path, monkeypatch, word_tokenizer):
+    pdf_dir = tmp_path / "pdfs"
+    pdf_dir.mkdir()
+    for name in ("a.pdf", "b.pdf"):
+        (pdf_dir / name).write_bytes(b"")
+    monkeypatch.setattr(parser, "PdfReader", FakeReader)
+    monkeypatch.setattr(parser, "get_tokenizer", lambda: word_tokenizer)
+    store_dir = str(tmp_path / "store")
+
+    parser.preprocess_pdfs(str(pdf_dir), store_dir)
+    store = ChunkStore(store_dir)
+    rows = store.num_rows()
+    parser.preprocess_pdfs(str(pdf_dir), store_dir)
+
+    assert rows > 0
+    assert store.num_rows() == rows
+    ids = [(b["paper_id"], b["chunk_idx"]) for batch in store.scan(["paper_id", "chunk_idx"]) for b in batch.to_pylist()]
+    assert len(ids) == len(set(ids))
+
+
+def sentence(label, n):
+    return " ".join([label] * (n - 1)) + " end."
+
+
+def test_chunks_stay_within_budget_after_overlap(word_tokenizer):
+    text = " ".join([sentence("a", 100), sentence("B", 20), sentence("C", 110)])
+    chunks = list(parser.chunk_pages([text], max_tokens=128, overlap=32, tokenizer=word_tokenizer))
+
+    assert [len(c.split()) for c in chunks] == [120, 110]
+
+
+def test_overlap_repeats_trailing_sentences(word_tokenizer):
+    text = " ".join([sentence("a", 60), sentence("B", 20), sentence("C", 60)])
+    chunks = list(parser.chunk_pages([text], max_tokens=128, overlap=32, tokenizer=word_tokenizer))
+
+    assert len(chunks) == 2
+    assert chunks[1].startswith(sentence("B", 20))
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+os.environ.update(VECTOR_BACKEND="memory", LOG_DB_PATH="", JOB_DB_PATH="")
+from fastapi.testclient import TestClient  # noqa: E402
+from backend import profiling  # noqa: E402
+from backend.main import app  # noqa: E402
+
+client = TestClient(app)
+
+
+def span_names(span):
+    return [child["name"] for child in span["children"]]
+
+
+def test_profiled_request_nests_stage_spans_under_the_request():
+    response = client.get("/search", params={"query": "tau spreading", "top_k": 2},
+                          headers={"X-Profile": "spans", "X-Request-Id": "profiled-search"})
+    assert response.status_code == 200
+    assert response.headers["X-Profile-Id"] == "profiled-search"
+
+    profile = client.get("/profiles/profiled-search").json()
+    assert profile["request_id"] == "profiled-search"
+    assert profile["mode"] == "spans"
+    root = profile["spans"]
+    assert root["name"] == "/search"
+    assert span_names(root) == ["search_papers"]
+    endpoint = root["children"][0]
+    assert {"encode", "vector_query"} <= set(span_names(endpoint))
+    for child in endpoint["children"]:
+        assert child["start_ms"] >= endpoint["start_ms"]
+        assert child["start_ms"] + child["duration_ms"] <= endpoint["start_ms"] + endpoint["duration_ms"] + 1e-3
+    assert "profiled-search" in [p["request_id"] for p in client.get("/profiles").json()["profiles"]]
+
+
+def test_nothing_is_stored_when_profiling_is_off(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    before = len(profiling._store)
+
+    response = client.get("/search", params={"query": "amyloid", "top_k": 2}, headers={"X-Request-Id": "unprofiled"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert len(profiling._store) == before
+    assert client.get("/profiles/unprofiled").status_code == 404
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+
+from projection import Projection
+
+
+@pytest.fixture
+def embeddings():
+    # 16-dim vectors that live in a 4-dim subspace
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(200, 4)) @ rng.normal(size=(4, 16))
+
+
+def test_round_trip_keeps_the_version(tmp_path, embeddings):
+    projection = Projection.fit(embeddings, 4, "pca", "stsb-roberta-large")
+    path = projection.save(str(tmp_path / "projection.npz"))
+
+    loaded = Projection.load(path)
+    assert loaded.version == projection.version
+    assert (loaded.method, loaded.model_name, loaded.dims) == ("pca", "stsb-roberta-large", 4)
+    np.testing.assert_array_equal(loaded.apply(embeddings), projection.apply(embeddings))
+
+
+def test_version_identifies_components_method_and_model(embeddings):
+    pca = Projection.fit(embeddings, 4, "pca", "m")
+    assert Projection.fit(embeddings, 4, "pca", "m").version == pca.version
+    assert Projection.fit(embeddings, 4, "pca", "other").version != pca.version
+    assert Projection.fit(embeddings, 4, "truncate", "m").version != pca.version
+    assert Projection.fit(embeddings[:100], 4, "pca", "m").version != pca.version
+
+
+def test_refuses_a_file_whose_version_does_not_match(tmp_path, embeddings):
+    path = str(tmp_path / "projection.npz")
+    projection = Projection.fit(embeddings, 4, "pca", "m")
+    meta = {"method": "pca", "model_name": "m", "version": Projection.fit(embeddings, 3, "pca", "m").version}
+    np.savez(path, components=projection.components, meta=np.array(json.dumps(meta)))
+
+    with pytest.raises(ValueError, match="corrupt"):
+        Projection.load(path)
+
+
+def test_pca_preserves_inner_products_of_low_rank_data(embeddings):
+    projected = Projection.fit(embeddings, 4, "pca").apply(embeddings)
+    np.testing.assert_allclose(projected @ projected.T, embeddings @ embeddings.T, rtol=1e-3, atol=1e-2)
+
+
+def test_fit_rejects_bad_arguments(embeddings):
+    with pytest.raises(ValueError, match="Unknown projection method"):
+        Projection.fit(embeddings, 4, "svd")
+    with pytest.raises(ValueError, match="Cannot project"):
+        Projection.fit(embeddings, 32)
+    with pytest.raises(ValueError, match="at least 8 embeddings"):
+        Projection.fit(embeddings[:4], 8)
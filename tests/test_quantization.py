@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from quantization import CompactMatrix
+from vector_index import InMemoryIndex
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 64)).astype(np.float32)
+    vectors = centers[rng.integers(0, 20, 3000)] + 0.6 * rng.standard_normal((3000, 64)).astype(np.float32)
+    queries = centers[rng.integers(0, 20, 40)] + 0.6 * rng.standard_normal((40, 64)).astype(np.float32)
+    return vectors, queries
+
+
+def build(vectors, precision, rescore_factor=4, compact_min_bytes=0):
+    index = InMemoryIndex(vectors.shape[1], precision=precision, rescore_factor=rescore_factor,
+                          compact_min_bytes=compact_min_bytes)
+    index.upsert([{"id": str(i), "values": v} for i, v in enumerate(vectors)])
+    return index
+
+
+def top_ids(index, queries, k=10):
+    return [[m["id"] for m in r["matches"]] for r in index.query_batch(queries, k)]
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_compact_scores_track_float32(corpus, precision):
+    vectors, queries = corpus
+    exact = queries @ vectors.T
+    approx = CompactMatrix(vectors, precision).scores(queries)
+    assert np.abs(approx - exact).max() < (0.05 if precision == "float16" else 0.5)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_recall_against_float32(corpus, precision):
+    vectors, queries = corpus
+    truth = top_ids(build(vectors, "float32"), queries)
+    first_pass = top_ids(build(vectors, precision, rescore_factor=1), queries)
+    hits = sum(len(set(a) & set(b)) for a, b in zip(first_pass, truth))
+    assert hits / (len(queries) * 10) >= 0.9
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_rescoring_returns_exact_scores(corpus, precision):
+    vectors, queries = corpus
+    exact = build(vectors, "float32").query_batch(queries, 10)
+    rescored = build(vectors, precision).query_batch(queries, 10)
+    assert [[m["id"] for m in r["matches"]] for r in rescored] == [[m["id"] for m in r["matches"]] for r in exact]
+    for r, e in zip(rescored, exact):
+        np.testing.assert_allclose([m["score"] for m in r["matches"]], [m["score"] for m in e["matches"]], rtol=1e-5)
+
+
+def test_small_indexes_keep_float32_scoring(corpus):
+    vectors, queries = corpus
+    index = build(vectors, "int8", compact_min_bytes=vectors.nbytes + 1)
+    index.query_batch(queries[:1], 10)
+    assert index._compact is None
+    assert index.describe_index_stats()["vector_bytes_in_memory"] == vectors.nbytes
+    assert top_ids(index, queries) == top_ids(build(vectors, "float32"), queries)
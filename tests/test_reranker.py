@@ -0,0 +1,110 @@
+import threading
+
+from reranker import Reranker
+
+
+class FakeCrossEncoder:
+    def __init__(self, release=None):
+        self.calls = 0
+        self.release = release
+
+    def predict(self, pairs):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return [len(text) for _, text in pairs]
+
+
+def reranker(model, budget_ms=1000, concurrency=1):
+    r = Reranker(budget_ms=budget_ms, concurrency=concurrency)
+    r._model = model
+    return r
+
+
+CANDIDATES = [("a", "x"), ("b", "xxx"), ("c", "xx")]
+
+
+def test_orders_by_score_and_caches():
+    model = FakeCrossEncoder()
+    r = reranker(model)
+
+    assert r.rerank("q", CANDIDATES) == ["b", "c", "a"]
+    assert r.rerank("q", CANDIDATES) == ["b", "c", "a"]
+    assert model.calls == 1
+
+
+def test_over_budget_falls_back_and_fills_cache_later():
+    release = threading.Event()
+    model = FakeCrossEncoder(release)
+    r = reranker(model, budget_ms=20)
+
+    assert r.rerank("q", CANDIDATES) is None
+    release.set()
+    r._executor.submit(lambda: None).result(5)  # the timed-out batch has finished
+    assert r.rerank("q", CANDIDATES) == ["b", "c", "a"]
+    assert model.calls == 1
+
+
+def test_busy_workers_skip_once_the_budget_is_spent():
+    release = threading.Event()
+    model = FakeCrossEncoder(release)
+    r = reranker(model, budget_ms=20)
+
+    assert r.rerank("q1", CANDIDATES) is None
+    for i in range(5):
+        assert r.rerank(f"q{i + 2}", CANDIDATES, budget_ms=20) is None
+    release.set()
+    r._executor.submit(lambda: None).result(5)
+
+    assert model.calls == 1
+    assert r._executor._work_queue.qsize() == 0
+
+
+def test_concurrent_requests_share_the_workers():
+    release = threading.Event()
+    model = FakeCrossEncoder(release)
+    r = reranker(model, budget_ms=2000, concurrency=2)
+    results = []
+    threads = [threading.Thread(target=lambda q=q: results.append(r.rerank(q, CANDIDATES))) for q in ("q1", "q2")]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == [["b", "c", "a"]] * 2
+
+
+def test_waits_for_a_free_worker_within_the_budget():
+    first_release = threading.Event()
+
+    class SlowFirst(FakeCrossEncoder):
+        def predict(self, pairs):
+            if self.calls == 0:
+                first_release.wait(5)
+            return super().predict(pairs)
+
+    r = reranker(SlowFirst(), budget_ms=20)
+    assert r.rerank("q1", CANDIDATES) is None
+    threading.Timer(0.05, first_release.set).start()
+    assert r.rerank("q2", CANDIDATES, budget_ms=2000) == ["b", "c", "a"]
+
+
+def test_scoring_errors_keep_retrieval_order():
+    class Broken:
+        def predict(self, pairs):
+            raise RuntimeError("CUDA out of memory")
+
+    r = reranker(Broken())
+    assert r.rerank("q", CANDIDATES) is None
+    r._model = FakeCrossEncoder()
+    assert r.rerank("q", CANDIDATES) == ["b", "c", "a"]
+
+
+def test_model_load_errors_keep_retrieval_order(monkeypatch):
+    r = Reranker(model_name="no/such-model", budget_ms=1000)
+
+    def fail(self):
+        raise OSError("no/such-model is not a valid model identifier")
+
+    monkeypatch.setattr(Reranker, "model", property(fail))
+    assert r.rerank("q", CANDIDATES) is None
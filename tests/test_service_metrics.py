@@ -0,0 +1,24 @@
+import importlib
+import sys
+
+import service_metrics
+from backend import metrics
+
+
+def test_services_report_into_the_backend_metrics():
+    assert service_metrics.stage is metrics.stage
+    assert service_metrics.record_cache is metrics.record_cache
+    assert service_metrics.ENCODE_BATCH is metrics.ENCODE_BATCH
+
+
+def test_no_ops_without_the_backend_package(monkeypatch):
+    monkeypatch.setitem(sys.modules, "backend.metrics", None)  # makes the import raise ImportError
+    try:
+        standalone = importlib.reload(service_metrics)
+        with standalone.stage("encode"):
+            standalone.record_cache("encoder", True)
+            standalone.ENCODE_BATCH.observe(8)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(service_metrics)
+    assert service_metrics.stage is metrics.stage
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from backend.single_flight import SingleFlight, flight_key
+
+
+def concurrent(n, fn):
+    results, errors = [None] * n, [None] * n
+
+    def run(i):
+        try:
+            results[i] = fn()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_identical_calls_run_once():
+    flight, calls = SingleFlight("test"), []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"papers": [1, 2]}
+
+    results, _ = concurrent(10, lambda: flight.do("k", slow))
+
+    assert len(calls) == 1
+    assert all(r == {"papers": [1, 2]} for r in results)
+    assert len({id(r) for r in results}) == 10  # each caller gets its own copy
+    assert flight.in_flight() == 0
+
+
+def test_exceptions_reach_every_caller_and_are_not_cached():
+    flight, calls = SingleFlight("test"), []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("LLM down")
+
+    _, errors = concurrent(5, lambda: flight.do("k", failing))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+    assert flight.do("k", lambda: "ok") == "ok"
+    assert len(calls) == 1
+
+
+def test_sequential_calls_are_not_cached():
+    flight, calls = SingleFlight("test"), []
+    for _ in range(3):
+        flight.do("k", lambda: calls.append(1))
+
+    assert len(calls) == 3
+
+
+def test_flight_key_normalizes_whitespace_only():
+    assert flight_key(" tau  spreading ", {"b": 1, "a": ["x  y"]}) == flight_key("tau spreading", {"a": ["x y"], "b": 1})
+    assert flight_key("tau", 3) != flight_key("tau", 4)
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from chunk_store import ChunkStore
+from lexical_index import BM25Builder, BM25Index
+from projection import Projection
+from snapshot import SnapshotMismatch, current_version, open_snapshot, write_snapshot
+from vector_index import InMemoryIndex
+
+CONFIG = {"model": "stsb-roberta-large", "model_dims": 4, "dims": 4, "projection": None}
+TEXTS = ["tau spreads along connected regions", "amyloid plaques and microglia", "cognitive decline in trials"]
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = ChunkStore(str(tmp_path / "store"))
+    with store:
+        store.append(0, "a.pdf", TEXTS, {"year": 2020})
+    index = InMemoryIndex(4)
+    index.upsert([{"id": f"0_{i}", "values": np.eye(4)[i].tolist(), "metadata": {"year": 2020}} for i in range(3)])
+    builder = BM25Builder()
+    for i, text in enumerate(TEXTS):
+        builder.add(f"0_{i}", text, {"year": 2020})
+    projection = Projection.fit(np.eye(4), 4, "truncate", CONFIG["model"])
+    return store, index, builder.build(), projection
+
+
+def test_round_trip(tmp_path, state):
+    store, index, lexical, projection = state
+    root = str(tmp_path / "snapshots")
+    version = write_snapshot(root, CONFIG, index, lexical, store, projection)
+
+    path, manifest = open_snapshot(root, CONFIG)
+    assert current_version(root) == version == manifest["version"]
+    assert sorted(manifest["parts"]) == ["chunks", "index", "lexical", "projection"]
+    restored = InMemoryIndex.load(os.path.join(path, "index"))
+    assert restored.query(np.eye(4)[1].tolist(), top_k=1)["matches"][0]["id"] == "0_1"
+    assert BM25Index.load(os.path.join(path, "lexical")).search("microglia", 1)[0][0] == "0_1"
+    assert ChunkStore(os.path.join(path, "chunks")).num_rows() == 3
+    assert Projection.load(os.path.join(path, "projection.npz")).version == projection.version
+
+
+def test_refuses_other_encoder_config(tmp_path, state):
+    root = str(tmp_path / "snapshots")
+    write_snapshot(root, CONFIG, lexical_index=state[2])
+
+    with pytest.raises(SnapshotMismatch):
+        open_snapshot(root, dict(CONFIG, model="all-MiniLM-L6-v2"))
+    assert open_snapshot(str(tmp_path / "empty"), CONFIG) is None
+
+
+def test_keeps_newest_versions(tmp_path, state, monkeypatch):
+    import snapshot
+
+    monkeypatch.setattr(snapshot, "SNAPSHOT_KEEP", 2)
+    root = str(tmp_path / "snapshots")
+    versions = [write_snapshot(root, CONFIG, lexical_index=state[2]) for _ in range(3)]
+
+    assert current_version(root) == versions[-1]
+    assert sorted(d for d in os.listdir(root) if d != "CURRENT") == sorted(versions[1:])
@@ -0,0 +1,43 @@
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+os.environ.update(VECTOR_BACKEND="memory")
+from fastapi.testclient import TestClient  # noqa: E402
+from backend import stages  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_service(path, name):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def remote_search(monkeypatch):
+    """stages.search pointed at the search microservice, with semantic_search recorded."""
+    service = load_service("person_A/ingest_search/main.py", "search_service")
+    calls = []
+
+    def semantic_search(query, top_k=6, mode="dense", rerank=False, filters=None):
+        calls.append({"query": query, "top_k": top_k, "mode": mode, "rerank": rerank, "filters": filters})
+        return [{"id": 0, "title": "t", "abstract": "a"}]
+
+    monkeypatch.setattr(service, "semantic_search", semantic_search)
+    monkeypatch.setitem(stages.SERVICE_URLS, "search", "http://search")
+    monkeypatch.setattr(stages, "_client", TestClient(service.app, base_url="http://search"))
+    return calls
+
+
+def test_remote_search_passes_all_parameters(remote_search):
+    papers = stages.search("tau", top_k=2, mode="hybrid", rerank=True,
+                           params={"year_from": 2018, "journal": ["Brain"], "paper_id": None})
+
+    assert papers == [{"id": 0, "title": "t", "abstract": "a"}]
+    assert remote_search == [{"query": "tau", "top_k": 2, "mode": "hybrid", "rerank": True,
+                              "filters": {"year": {"$gte": 2018}, "journal": {"$in": ["Brain"]}}}]
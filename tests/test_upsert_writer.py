@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from upsert_writer import UpsertWriter, estimate_size
+
+
+class FakeIndex:
+    """Records upserts; the first `failures` calls raise, like a throttled Pinecone."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.batches = []
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.failures > 0
+            self.failures -= fail
+        try:
+            time.sleep(self.delay)
+            if fail:
+                raise ConnectionError("429 Too Many Requests")
+            with self._lock:
+                self.batches.append(list(vectors))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def vectors(n, dims=8, text=""):
+    return [{"id": f"0_{i}", "values": [0.1] * dims, "metadata": {"text": text}} for i in range(n)]
+
+
+def test_batches_respect_vector_and_byte_limits():
+    index = FakeIndex()
+    items = vectors(95, text="x" * 200)
+    max_bytes = 10 * estimate_size(items[0])
+    with UpsertWriter(index, max_vectors=25, max_bytes=max_bytes, concurrency=2) as writer:
+        writer.add_many(items)
+
+    assert writer.upserted == 95
+    assert sorted(v["id"] for b in index.batches for v in b) == sorted(v["id"] for v in items)
+    assert all(len(b) <= 10 for b in index.batches)
+    assert all(sum(estimate_size(v) for v in b) <= max_bytes for b in index.batches)
+
+
+def test_concurrency_is_bounded():
+    index = FakeIndex(delay=0.02)
+    with UpsertWriter(index, max_vectors=5, concurrency=3) as writer:
+        writer.add_many(vectors(100))
+
+    assert index.max_in_flight <= 3
+    assert len(index.batches) == 20
+
+
+def test_failed_batches_are_retried():
+    index = FakeIndex(failures=2)
+    with UpsertWriter(index, max_vectors=10, concurrency=1, backoff=0.001) as writer:
+        writer.add_many(vectors(30))
+
+    assert writer.upserted == 30
+    assert not writer.failed_batches
+
+
+def test_flush_raises_when_retries_run_out():
+    index = FakeIndex(failures=100)
+    writer = UpsertWriter(index, max_vectors=10, concurrency=1, max_retries=2, backoff=0.001)
+    writer.add_many(vectors(20))
+
+    with pytest.raises(RuntimeError, match="20 vectors in 2 batches"):
+        writer.close()
+
+
+def test_retried_upserts_into_local_index_do_not_duplicate():
+    from vector_index import InMemoryIndex
+
+    index = InMemoryIndex(8)
+    items = [{"id": f"0_{i}", "values": [float(i == j) for j in range(8)], "metadata": {}} for i in range(8)]
+    with UpsertWriter(index, max_vectors=3, concurrency=2) as writer:
+        writer.add_many(items)
+        writer.add_many(items[:4])  # re-sent, as a retried batch would be
+
+    assert index.describe_index_stats()["total_vector_count"] == 8
+    assert index.query([0.0, 0, 1, 0, 0, 0, 0, 0], top_k=1)["matches"][0]["id"] == "0_2"